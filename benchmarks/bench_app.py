@@ -0,0 +1,209 @@
+"""
+Offline benchmarks of the web app, replaying recorded yfinance, NewsAPI and
+OpenAI calls (see benchmarks/replay.py).
+
+Usage:
+    python -m benchmarks.bench_app --record           # first, with network access and API keys
+    python -m benchmarks.bench_app                    # replay, no network needed
+    python -m benchmarks.bench_app --latency-scale 0  # replay without simulated latency
+
+No fixtures are checked in, so recording is a required first step on every
+machine. Replaying fails as soon as a round makes a call that was never
+recorded (re-record after changing what the app calls).
+
+Replayed calls sleep for their recorded duration times --latency-scale, so
+timings stay comparable to live runs while being deterministic. Caches live
+in a temporary directory; "cold" cases clear them before every round and
+"cached" cases measure the hit path. Recording runs every case once.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+RAG_QUERIES = [
+    'What was the revenue growth last year?',
+    'Which risks does management highlight?',
+    'How much cash does the company hold?',
+]
+
+
+def synthetic_chunks(count):
+    """Deterministic filing-like chunks for the retrieval benchmark"""
+    from langchain_core.documents import Document
+
+    topics = ['revenue', 'operating margin', 'cash and equivalents', 'risk factors', 'share buybacks',
+              'guidance', 'segment results', 'debt maturities']
+    return [
+        Document(
+            page_content=f"Section {i}: discussion of {topics[i % len(topics)]} for fiscal year {2015 + i % 10}, "
+                         f"with figures compared against the prior period and management commentary.",
+            metadata={'source': f'filing_{i % 5}.pdf', 'page': i // 5},
+        )
+        for i in range(count)
+    ]
+
+
+def bench(name, fn, rounds, replay, setup=None):
+    """Time ``fn`` over ``rounds`` runs, calling the untimed ``setup`` before each"""
+    timings = []
+    for _ in range(rounds):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+        check_fixtures(replay, name)
+    return {
+        'name': name,
+        'rounds': rounds,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'max': max(timings),
+        'stddev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def check_fixtures(replay, stage):
+    """Stop the run once a replayed call had no fixture: its timings would be of an error path"""
+    if replay.missing:
+        sys.exit(f"{stage}: {replay.missing} external calls were never recorded under {replay.store.root}; "
+                 f"run the benchmark with --record first")
+
+
+def print_results(results):
+    print(f"{'benchmark':<28} {'rounds':>6} {'min ms':>10} {'median ms':>10} {'mean ms':>10} "
+          f"{'max ms':>10} {'stddev':>9}")
+    for r in results:
+        print(f"{r['name']:<28} {r['rounds']:>6} {r['min']:>10.1f} {r['median']:>10.1f} {r['mean']:>10.1f} "
+              f"{r['max']:>10.1f} {r['stddev']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--record', action='store_true', help='call the live services and save fixtures')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--latency-scale', type=float, default=1.0)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--symbol', default='AAPL')
+    parser.add_argument('--chunks', type=int, default=200, help='size of the synthetic RAG corpus')
+    parser.add_argument('--analysis-mode', default='supervisor', choices=['supervisor', 'parallel', 'prefetch'])
+    args = parser.parse_args()
+
+    from benchmarks.replay import Replay
+
+    if not args.record and not os.path.isdir(args.fixtures):
+        sys.exit(f"No fixtures in {args.fixtures}; run the benchmark with --record first")
+    replay = Replay(args.fixtures, mode='record' if args.record else 'replay', latency_scale=args.latency_scale)
+    replay.install()
+    rounds = 1 if args.record else args.rounds
+
+    # Configuration is read at import time, so point every cache at a scratch directory first
+    scratch = tempfile.mkdtemp(prefix='investiq-bench-')
+    os.environ['CACHE_DIR'] = scratch
+    os.environ['RAG_INDEX_DIR'] = os.path.join(scratch, 'rag_index')
+    os.environ['ANALYSIS_MODE'] = args.analysis_mode
+
+    from src.app import create_app
+    from src.app.cache import cache
+    from src.app.market_refresher import market_refresher
+    from src.app.routes import _analysis_cache_key, stock_service
+    from src.services.news_cache import news_cache
+    from src.services.quote_engine import quote_engine
+
+    app = create_app()
+    client = app.test_client()
+    symbol = args.symbol.upper()
+
+    def get(path):
+        def request():
+            response = client.get(path)
+            if response.status_code != 200:
+                sys.exit(f"GET {path} returned {response.status_code}")
+        return request
+
+    # Fill the dashboard snapshot once, then stop background refreshes so they don't skew timings
+    market_refresher.snapshot(wait=60)
+    market_refresher.stop()
+    check_fixtures(replay, 'dashboard snapshot')
+    # Every round re-checks upstream for new bars instead of trusting the local price history
+    quote_engine.history.refresh_interval = 0
+
+    def clear_market_data():
+        quote_engine._info_cache.clear()
+        news_cache._searches.clear()
+
+    def clear_analysis():
+        clear_market_data()
+        with app.app_context():
+            cache.delete(_analysis_cache_key(symbol))
+
+    def analyze_cold():
+        # The page only queues the analysis; wait for the job like the page's poller does
+        get(f'/stock/{symbol}')()
+        while True:
+            status = client.get(f'/api/analysis/{symbol}/status').get_json()['status']
+            if status == 'done':
+                return
+            if status not in ('queued', 'running'):
+                sys.exit(f"Analysis of {symbol} ended as {status}")
+            time.sleep(0.005)
+
+    def refresh_market_data():
+        stock_service.get_watchlist_data()
+        stock_service.get_market_overview()
+        stock_service.get_market_news(query='stocks', page_size=6)
+
+    results = [
+        bench('market data refresh', refresh_market_data, rounds, replay, setup=clear_market_data),
+        bench('dashboard (snapshot)', get('/dashboard'), rounds, replay),
+        bench('stock_detail (cold)', analyze_cold, rounds, replay, setup=clear_analysis),
+        bench('stock_detail (cached)', get(f'/stock/{symbol}'), rounds, replay),
+    ]
+    results.extend(bench_rag(args, scratch, rounds, replay))
+
+    print_results(results)
+    print(f"\n{replay.calls} external calls {'recorded to' if args.record else 'replayed from'} {args.fixtures}")
+
+
+def bench_rag(args, scratch, rounds, replay):
+    from langchain_openai import OpenAIEmbeddings
+
+    from src.agent.embedding_cache import CachedEmbeddings
+    from src.agent.rag_agent import EMBEDDING_MODEL
+    from src.agent.vector_index import PersistentVectorIndex
+
+    embeddings = CachedEmbeddings(OpenAIEmbeddings(model=EMBEDDING_MODEL),
+                                  path=os.path.join(scratch, 'embeddings.sqlite3'), model_name=EMBEDDING_MODEL)
+    index = PersistentVectorIndex(os.path.join(scratch, 'bench_index'), embeddings,
+                                  chunk_size=1000, chunk_overlap=200, model_name=EMBEDDING_MODEL)
+
+    corpus_path = os.path.join(scratch, 'corpus.txt')
+    with open(corpus_path, 'w') as f:
+        f.write(f'synthetic corpus of {args.chunks} chunks')
+    index.add(corpus_path, synthetic_chunks(args.chunks))
+    index.load([corpus_path])
+    check_fixtures(replay, 'rag index')
+
+    def search():
+        index.batch_similarity_search(RAG_QUERIES, k=4)
+
+    def forget_queries():
+        keys = [embeddings.key(query) for query in RAG_QUERIES]
+        embeddings._connection().execute(
+            f"DELETE FROM embeddings WHERE key IN ({','.join('?' * len(keys))})", keys
+        )
+
+    return [
+        bench('rag retrieval (cold)', search, rounds, replay, setup=forget_queries),
+        bench('rag retrieval (cached)', search, rounds, replay),
+    ]
+
+
+if __name__ == '__main__':
+    main()
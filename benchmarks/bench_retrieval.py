@@ -0,0 +1,84 @@
+"""
+Benchmark the vectorized retrieval engine against langchain's InMemoryVectorStore.
+
+Usage:
+    python -m benchmarks.bench_retrieval
+    python -m benchmarks.bench_retrieval --sizes 10000 100000 1000000 --dim 256 --baseline-max 1000000
+
+Both stores are filled with the same random unit vectors; no embedding API
+is called. The InMemoryVectorStore keeps every vector as a Python list and
+scores them per query, so by default it is skipped above --baseline-max rows
+where it needs many GB of memory.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.agent.retrieval import VectorSearchEngine
+
+
+def random_unit_vectors(rng, n, dim):
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def time_per_query(fn, queries, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(queries)
+    return (time.perf_counter() - started) / (repeat * len(queries)) * 1000
+
+
+def bench_engine(vectors, metadata, queries, k, repeat):
+    engine = VectorSearchEngine(vectors, metadata)
+    single = time_per_query(lambda qs: [engine.search(q, k=k) for q in qs], queries, repeat)
+    batched = time_per_query(lambda qs: engine.search(qs, k=k), queries, repeat)
+    filtered = time_per_query(lambda qs: engine.search(qs, k=k, sources=['report_0.pdf'], page_range=(0, 50)),
+                              queries, repeat)
+    return single, batched, filtered
+
+
+def bench_in_memory_store(vectors, metadata, queries, k, repeat):
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    store = InMemoryVectorStore(DeterministicFakeEmbedding(size=vectors.shape[1]))
+    for i, (vector, meta) in enumerate(zip(vectors, metadata)):
+        store.store[str(i)] = {'id': str(i), 'vector': vector.tolist(), 'text': '', 'metadata': meta}
+    return time_per_query(lambda qs: [store.similarity_search_by_vector(q.tolist(), k=k) for q in qs],
+                          queries, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--queries', type=int, default=16)
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline-max', type=int, default=100_000,
+                        help='largest size to run the InMemoryVectorStore baseline on')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = random_unit_vectors(rng, args.queries, args.dim)
+
+    print(f"{'chunks':>10} {'store ms/q':>12} {'engine ms/q':>12} {'batched ms/q':>13} {'filtered ms/q':>14} {'speedup':>8}")
+    for size in args.sizes:
+        vectors = random_unit_vectors(rng, size, args.dim)
+        metadata = [{'source': f'report_{i % 100}.pdf', 'page': i % 300} for i in range(size)]
+
+        single, batched, filtered = bench_engine(vectors, metadata, queries, args.k, args.repeat)
+        if size <= args.baseline_max:
+            baseline = bench_in_memory_store(vectors, metadata, queries, args.k, 1)
+            store_cell, speedup_cell = f"{baseline:12.2f}", f"{baseline / batched:7.0f}x"
+        else:
+            store_cell, speedup_cell = f"{'skipped':>12}", f"{'-':>8}"
+
+        print(f"{size:>10} {store_cell} {single:12.2f} {batched:13.2f} {filtered:14.2f} {speedup_cell}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Record/replay of every external call the app makes, for offline benchmarks.
+
+In ``record`` mode the real yfinance, NewsAPI and OpenAI calls run and their
+results are pickled to a fixtures directory together with how long they
+took. In ``replay`` mode the same calls are answered from the fixtures,
+after sleeping for the recorded duration times ``latency_scale``, so runs are
+deterministic and need no network or API keys.
+
+The patches are applied at the library boundary rather than on the agent
+tools, so the tools, StockService and the agents all run their real code:
+
+- ``yfinance.download``, ``yfinance.Ticker`` and ``yfinance.Tickers``
+- ``requests.Session.request`` (NewsAPI, from StockService and the news
+  agent tool, below the shared client's rate limits and retries)
+- ``ChatOpenAI`` generations and ``OpenAIEmbeddings`` calls
+
+Calls are keyed by their arguments, with API keys and message ids left out.
+The app catches most upstream errors, so a replayed call without a fixture
+would only degrade a response; ``Replay.missing`` counts them so a benchmark
+can refuse to report such a run.
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from typing import Any, Callable, Dict
+
+MODES = ('record', 'replay')
+
+
+class FixtureMissing(LookupError):
+    """A call was made in replay mode that was never recorded"""
+
+
+class RecordedError(RuntimeError):
+    """Replayed exception of a recorded call that failed"""
+
+
+def _fingerprint(parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class FixtureStore:
+    """One pickle per call, under ``<root>/<kind>/<sha256 of the call key>.pkl``"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.root, kind, key + '.pkl')
+
+    def load(self, kind: str, key: str) -> Dict[str, Any]:
+        path = self._path(kind, key)
+        if not os.path.exists(path):
+            raise FixtureMissing(f"No recorded {kind} call {key}; run the benchmark with --record first")
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def save(self, kind: str, key: str, entry: Dict[str, Any]) -> None:
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f)
+        os.replace(tmp_path, path)
+
+
+class Replay:
+    """Patches the external client libraries to record or replay their calls"""
+
+    def __init__(self, fixtures_dir: str, mode: str = 'replay', latency_scale: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        self.store = FixtureStore(fixtures_dir)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.calls = 0
+        self.missing = 0
+        self._lock = threading.Lock()
+
+    def call(self, kind: str, key_parts, fn: Callable[[], Any]) -> Any:
+        """Run ``fn`` and record its outcome, or replay the recorded one"""
+        key = _fingerprint(key_parts)
+        with self._lock:
+            self.calls += 1
+
+        if self.mode == 'replay':
+            try:
+                entry = self.store.load(kind, key)
+            except FixtureMissing:
+                with self._lock:
+                    self.missing += 1
+                raise
+            if self.latency_scale:
+                time.sleep(entry['elapsed'] * self.latency_scale)
+            if 'error' in entry:
+                raise RecordedError(entry['error'])
+            return entry['value']
+
+        started = time.perf_counter()
+        try:
+            value = fn()
+        except Exception as e:
+            self.store.save(kind, key, {'error': f"{type(e).__name__}: {e}",
+                                        'elapsed': time.perf_counter() - started})
+            raise
+        self.store.save(kind, key, {'value': value, 'elapsed': time.perf_counter() - started})
+        return value
+
+    def install(self) -> None:
+        if self.mode == 'replay':
+            # Clients refuse to initialise without keys, even though no call leaves the process
+            os.environ.setdefault('OPENAI_API_KEY', 'sk-replay')
+            os.environ.setdefault('NEWS_API_KEY', 'replay')
+        self._patch_yfinance()
+        self._patch_requests()
+        self._patch_openai()
+
+    def _patch_yfinance(self) -> None:
+        import yfinance
+
+        replay = self
+        real_download, real_ticker = yfinance.download, yfinance.Ticker
+
+        def download(*args, **kwargs):
+            # Incremental price-history updates pass today's dates; keep them out of the key
+            key_kwargs = {k: v for k, v in kwargs.items() if k not in ('start', 'end')}
+            return replay.call('yfinance', ['download', args, key_kwargs], lambda: real_download(*args, **kwargs))
+
+        class ReplayTicker:
+            """Stand-in for ``yf.Ticker`` recording each property read and method call"""
+
+            def __init__(self, ticker, *args, **kwargs):
+                self.ticker = ticker.upper() if isinstance(ticker, str) else ticker
+                self._args = (args, kwargs)
+                self._real = None
+
+            def _target(self):
+                if self._real is None:
+                    self._real = real_ticker(self.ticker, *self._args[0], **self._args[1])
+                return self._real
+
+            def __getattr__(self, name):
+                if name.startswith('_'):
+                    raise AttributeError(name)
+
+                def read():
+                    value = getattr(self._target(), name)
+                    return {'callable': True} if callable(value) else {'value': value}
+
+                attribute = replay.call('yfinance', ['Ticker', self.ticker, name], read)
+                if 'value' in attribute:
+                    return attribute['value']
+
+                def method(*args, **kwargs):
+                    return replay.call('yfinance', ['Ticker', self.ticker, name, args, kwargs],
+                                       lambda: getattr(self._target(), name)(*args, **kwargs))
+                return method
+
+        class ReplayTickers:
+            def __init__(self, tickers, *args, **kwargs):
+                symbols = tickers.replace(',', ' ').split() if isinstance(tickers, str) else list(tickers)
+                self.symbols = [symbol.upper() for symbol in symbols]
+                self.tickers = {symbol: ReplayTicker(symbol) for symbol in self.symbols}
+
+        yfinance.download = download
+        yfinance.Ticker = ReplayTicker
+        yfinance.Tickers = ReplayTickers
+
+    def _patch_requests(self) -> None:
+        import requests
+
+        replay = self
+        real_request = requests.Session.request
+
+        def request(session, method, url, params=None, **kwargs):
+            public_params = {k: v for k, v in (params or {}).items() if k.lower() != 'apikey'}
+
+            def fetch():
+                response = real_request(session, method, url, params=params, **kwargs)
+                return {'status_code': response.status_code, 'content': response.content,
+                        'headers': dict(response.headers), 'reason': response.reason}
+
+            recorded = replay.call('requests', [method.upper(), url, public_params], fetch)
+            response = requests.models.Response()
+            response.status_code = recorded['status_code']
+            response._content = recorded['content']
+            response.headers.update(recorded['headers'])
+            response.reason = recorded['reason']
+            response.url = url
+            return response
+
+        requests.Session.request = request
+
+    def _patch_openai(self) -> None:
+        from langchain_core.language_models.chat_models import BaseChatModel
+        from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+        replay = self
+        real_generate = ChatOpenAI._generate
+        real_embed_documents = OpenAIEmbeddings.embed_documents
+        real_embed_query = OpenAIEmbeddings.embed_query
+
+        def message_key(message):
+            return [message.type, message.content, getattr(message, 'name', None),
+                    [[call['name'], call['args']] for call in getattr(message, 'tool_calls', [])]]
+
+        def generate(model, messages, stop=None, run_manager=None, **kwargs):
+            options = dict(kwargs)
+            if 'tools' in options:
+                # Handoff tools are bound in set order, which changes between processes
+                options['tools'] = sorted(options['tools'], key=lambda tool: json.dumps(tool, sort_keys=True))
+            key = ['chat', model.model_name, [message_key(m) for m in messages], stop, options]
+            return replay.call('openai', key, lambda: real_generate(model, messages, stop=stop, **kwargs))
+
+        def embed_documents(embeddings, texts, *args, **kwargs):
+            return replay.call('openai', ['embed_documents', embeddings.model, list(texts)],
+                               lambda: real_embed_documents(embeddings, texts, *args, **kwargs))
+
+        def embed_query(embeddings, text, *args, **kwargs):
+            return replay.call('openai', ['embed_query', embeddings.model, text],
+                               lambda: real_embed_query(embeddings, text, *args, **kwargs))
+
+        ChatOpenAI._generate = generate
+        # Without a native _stream, streamed runs go through _generate too
+        ChatOpenAI._stream = BaseChatModel._stream
+        OpenAIEmbeddings.embed_documents = embed_documents
+        OpenAIEmbeddings.embed_query = embed_query
@@ -1,6 +1,7 @@
 from langgraph.prebuilt import create_react_agent
 from typing import Dict, Any, List
-from src.agent.tools import get_financial_data, get_news_articles, get_stock_data
+from langchain_core.tools import StructuredTool
+from src.agent.tools import aget_news_articles, get_financial_data, get_news_articles, get_stock_data
 
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.output_parsers import JsonOutputParser
@@ -35,9 +36,12 @@ class StockOverview(BaseModel):
 
 parser = JsonOutputParser(pydantic_object=StockOverview)
 
+# Same tool as the plain function, with a non-blocking version for async runs
+news_tool = StructuredTool.from_function(func=get_news_articles, coroutine=aget_news_articles)
+
 news_agent = create_react_agent(
     model="openai:o4-mini",
-    tools=[get_news_articles],
+    tools=[news_tool],
     prompt=(
         "You are a news agent.\n\n"
         "INSTRUCTIONS:\n"
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-addressed cache in front of an embeddings model.
+
+    Every text is keyed by the SHA-256 of the model name and the text, so
+    identical chunks (boilerplate repeated across filings) and repeated
+    questions are embedded once, ever. Vectors live as float32 blobs in a
+    local SQLite file shared by all workers. Misses are de-duplicated and
+    sent to the wrapped model in requests of at most ``batch_size`` texts,
+    with up to ``max_concurrency`` requests in flight, so a call with more
+    than ``batch_size`` misses is embedded concurrently.
+    """
+
+    def __init__(self, embeddings: Embeddings, path: str, model_name: str,
+                 batch_size: int = 64, max_concurrency: int = 4):
+        self.embeddings = embeddings
+        self.path = path
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, re-opened after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        conn = self._connection()
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors.items()],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.key(text) for text in texts]
+        vectors = self._lookup(list(dict.fromkeys(keys)))
+
+        # One entry per distinct missing text, whatever the number of repeats
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+
+        with self._stats_lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+        if missing:
+            items = list(missing.items())
+            batches = [items[start:start + self.batch_size] for start in range(0, len(items), self.batch_size)]
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                for fetched in executor.map(self._embed_batch, batches):
+                    self._store(fetched)
+                    vectors.update(fetched)
+
+        return [vectors[key] for key in keys]
+
+    def _embed_batch(self, batch) -> Dict[str, List[float]]:
+        embedded = self.embeddings.embed_documents([text for _, text in batch])
+        return {key: vector for (key, _), vector in zip(batch, embedded)}
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,158 @@
+import json
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Line items kept from each yfinance statement, in output order
+DEFAULT_LINE_ITEMS: Dict[str, List[str]] = {
+    'income_statement': [
+        'Total Revenue', 'Gross Profit', 'Operating Income', 'EBITDA', 'Net Income', 'Diluted EPS',
+    ],
+    'cash_flow': [
+        'Operating Cash Flow', 'Capital Expenditure', 'Free Cash Flow',
+        'Repurchase Of Capital Stock', 'Cash Dividends Paid',
+    ],
+    'balance_sheet': [
+        'Total Assets', 'Total Liabilities Net Minority Interest', 'Stockholders Equity',
+        'Cash And Cash Equivalents', 'Total Debt',
+    ],
+}
+
+STATEMENT_ATTRIBUTES = {
+    'income_statement': 'income_stmt',
+    'cash_flow': 'cash_flow',
+    'balance_sheet': 'balance_sheet',
+}
+
+UNITS = ((1e12, 'T'), (1e9, 'B'), (1e6, 'M'), (1e3, 'K'))
+
+
+def count_tokens(text: str, model: str = "o4-mini") -> int:
+    """Token count of a prompt fragment, estimated when tiktoken is unavailable"""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return len(encoding.encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def _row_unit(values: List[float]) -> Tuple[float, str]:
+    """Unit for a row of values, chosen from its largest magnitude"""
+    finite = [abs(v) for v in values if v is not None and not math.isnan(v)]
+    if not finite:
+        return 1, ''
+    largest = max(finite)
+    for scale, unit in UNITS:
+        if largest >= scale:
+            return scale, unit
+    return 1, ''
+
+
+def _format_value(value: float, scale: float) -> str:
+    if value is None or math.isnan(value):
+        return ''
+    return f"{value / scale:.2f}".rstrip('0').rstrip('.')
+
+
+class FinancialSerializer:
+    """
+    Compact text rendering of a ticker's financial statements for LLM prompts.
+
+    Only the configured line items of the latest ``periods`` fiscal years are
+    kept, each row is scaled to a single unit (K, M, B, T) and values are
+    written with two decimals, as CSV or minified JSON. A short price
+    history closes the payload.
+    """
+
+    def __init__(self, line_items: Optional[Dict[str, List[str]]] = None, periods: int = 4,
+                 fmt: str = 'csv', history_period: str = '1mo'):
+        if fmt not in ('csv', 'json'):
+            raise ValueError(f"Unsupported financial data format: {fmt}")
+        self.line_items = line_items or DEFAULT_LINE_ITEMS
+        self.periods = periods
+        self.fmt = fmt
+        self.history_period = history_period
+
+    @classmethod
+    def from_env(cls) -> 'FinancialSerializer':
+        line_items = None
+        names = os.getenv("FINANCIAL_LINE_ITEMS")
+        if names:
+            # One flat list of item names, each kept wherever a statement has it
+            wanted = [name.strip() for name in names.split(',') if name.strip()]
+            line_items = {statement: wanted for statement in STATEMENT_ATTRIBUTES}
+        return cls(
+            line_items=line_items,
+            periods=int(os.getenv("FINANCIAL_PERIODS", 4)),
+            fmt=os.getenv("FINANCIAL_FORMAT", "csv"),
+        )
+
+    def statement_rows(self, frame: pd.DataFrame, items: List[str]) -> Tuple[List[str], List[Tuple[str, str, List[str]]]]:
+        """``(periods, [(item, unit, values)])`` for the kept items of one statement"""
+        if frame is None or frame.empty:
+            return [], []
+        frame = frame.iloc[:, :self.periods]
+        periods = [column.strftime('%Y-%m-%d') if hasattr(column, 'strftime') else str(column)
+                   for column in frame.columns]
+        rows = []
+        for item in items:
+            if item not in frame.index:
+                continue
+            values = pd.to_numeric(frame.loc[item], errors='coerce').astype(float).tolist()
+            if all(math.isnan(value) for value in values):
+                continue
+            scale, unit = _row_unit(values) if 'EPS' not in item else (1, '')
+            rows.append((item, unit, [_format_value(value, scale) for value in values]))
+        return periods, rows
+
+    def history_rows(self, ticker: str) -> List[Tuple[str, str, str]]:
+        """Daily close and volume over ``history_period``, from the local price history store"""
+        from src.services.price_history import price_history, window_days
+
+        price_history.update([ticker])
+        bars = price_history.window(ticker, window_days(self.history_period))
+        if not len(bars):
+            return []
+        scale, unit = _row_unit(bars['volume'].tolist())
+        return [
+            (str(date), f"{close:.2f}", _format_value(float(volume), scale) + unit)
+            for date, close, volume in zip(bars['date'], bars['close'], bars['volume'])
+        ]
+
+    def serialize(self, stock) -> str:
+        """Render the statements and price history of a ``yf.Ticker``"""
+        statements = {}
+        for name, attribute in STATEMENT_ATTRIBUTES.items():
+            items = self.line_items.get(name)
+            if items:
+                statements[name] = self.statement_rows(getattr(stock, attribute), items)
+        history = self.history_rows(stock.ticker)
+
+        if self.fmt == 'json':
+            payload = {
+                name: {'periods': periods, 'items': {item: [unit] + values for item, unit, values in rows}}
+                for name, (periods, rows) in statements.items() if rows
+            }
+            payload['price_history'] = [list(row) for row in history]
+            return json.dumps(payload, separators=(',', ':'))
+
+        sections = []
+        for name, (periods, rows) in statements.items():
+            if rows:
+                lines = [f"item,unit,{','.join(periods)}"]
+                lines += [f"{item},{unit},{','.join(values)}" for item, unit, values in rows]
+                sections.append(f"{name}:\n" + '\n'.join(lines))
+        if history:
+            lines = ["date,close,volume"] + [','.join(row) for row in history]
+            sections.append("price_history:\n" + '\n'.join(lines))
+        return '\n\n'.join(sections)
+
+
+# Singleton instance
+financial_serializer = FinancialSerializer.from_env()
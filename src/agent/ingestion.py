@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+def parse_pdf(file_path: str) -> List[Document]:
+    """Parse one PDF into page documents (runs in a worker process)"""
+    from langchain_community.document_loaders import PyPDFLoader
+
+    return PyPDFLoader(file_path).load()
+
+
+class IngestionPipeline:
+    """
+    Streaming PDF ingestion into a PersistentVectorIndex.
+
+    PDFs are parsed in parallel by a process pool with at most
+    ``2 * max_workers`` files in flight, and each file's pages flow lazily
+    through the text splitter as soon as it is parsed. Chunks from all files
+    are embedded in fixed-size batches, and a file's segment is written as
+    soon as its last chunk has been embedded, so memory holds only the files
+    currently in flight plus one batch.
+    """
+
+    def __init__(self, index, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 batch_size: int = 256, max_workers: int = None):
+        self.index = index
+        self.batch_size = batch_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True,
+        )
+
+    def parse(self, file_paths: List[str]) -> Iterator[Tuple[str, List[Document]]]:
+        """Yield ``(file_path, pages)`` in completion order, keeping the pool's backlog bounded"""
+        remaining = list(reversed(file_paths))
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+            while remaining or in_flight:
+                while remaining and len(in_flight) < 2 * self.max_workers:
+                    file_path = remaining.pop()
+                    in_flight[executor.submit(parse_pdf, file_path)] = file_path
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = in_flight.pop(future)
+                    pdf_file = os.path.basename(file_path)
+                    try:
+                        pages = future.result()
+                    except Exception as e:
+                        print(f"Error loading {pdf_file}: {str(e)}")
+                        continue
+                    print(f"Loaded {len(pages)} pages from {pdf_file}")
+                    yield file_path, pages
+
+    def chunks(self, pages: List[Document]) -> Iterator[Document]:
+        """Split pages one at a time, so chunks are produced lazily"""
+        for page in pages:
+            yield from self.text_splitter.split_documents([page])
+
+    def run(self, file_paths: List[str]) -> int:
+        """Parse, chunk, embed and index the given PDFs, returning the number of chunks written"""
+        pending: Dict[str, Dict] = {}
+        batch: List[Tuple[str, Document]] = []
+        written = 0
+
+        for file_path, pages in self.parse(file_paths):
+            state = pending[file_path] = {'chunks': [], 'vectors': [], 'queued': 0, 'split': False}
+            for chunk in self.chunks(pages):
+                state['chunks'].append(chunk)
+                state['queued'] += 1
+                batch.append((file_path, chunk))
+                if len(batch) >= self.batch_size:
+                    written += self._flush(batch, pending)
+                    batch = []
+            del pages
+            state['split'] = True
+            if state['queued'] == 0:
+                del pending[file_path]
+                print(f"No text found in {os.path.basename(file_path)}")
+            else:
+                written += self._write_complete([file_path], pending)
+
+        if batch:
+            written += self._flush(batch, pending)
+        return written
+
+    def _flush(self, batch: List[Tuple[str, Document]], pending: Dict[str, Dict]) -> int:
+        """Embed one batch and write the segments of files that are now complete"""
+        vectors = np.asarray(
+            self.index.embeddings.embed_documents([chunk.page_content for _, chunk in batch]), dtype=np.float32
+        )
+        for (file_path, _), vector in zip(batch, vectors):
+            pending[file_path]['vectors'].append(vector)
+        return self._write_complete({file_path for file_path, _ in batch}, pending)
+
+    def _write_complete(self, file_paths, pending: Dict[str, Dict]) -> int:
+        """Write the segment of every file that is fully split and embedded"""
+        written = 0
+        for file_path in file_paths:
+            state = pending.get(file_path)
+            if state and state['split'] and len(state['vectors']) == state['queued']:
+                self.index.write(file_path, state['chunks'], np.vstack(state['vectors']))
+                written += len(state['chunks'])
+                del pending[file_path]
+        return written
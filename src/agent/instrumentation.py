@@ -0,0 +1,296 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+def _agent(metadata: Optional[Dict], default: str) -> str:
+    """Agent a run belongs to, from its checkpoint namespace (``'stock_agent:<id>|tools:<id>'``)"""
+    namespace = (metadata or {}).get('langgraph_checkpoint_ns')
+    return namespace.split('|')[0].split(':')[0] if namespace else default
+
+
+def _token_usage(response) -> Tuple[int, int]:
+    """``(prompt, completion)`` tokens of an LLM result"""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None)
+            if usage:
+                return usage.get('input_tokens', 0), usage.get('output_tokens', 0)
+    usage = (response.llm_output or {}).get('token_usage') or {}
+    return usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0)
+
+
+class TraceHandler(BaseCallbackHandler):
+    """LangChain callback handler recording a graph run into a Trace"""
+
+    def __init__(self, trace: 'Trace'):
+        self.trace = trace
+        self._started: Dict[Any, Tuple[float, Dict]] = {}
+        self._open_nodes = set()
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, **fields) -> None:
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), fields)
+
+    def _stop(self, run_id) -> Tuple[Optional[float], Dict]:
+        with self._lock:
+            started, fields = self._started.pop(run_id, (None, {}))
+        return (time.perf_counter() - started if started is not None else None), fields
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, name=None, **kwargs):
+        metadata = metadata or {}
+        namespace = metadata.get('langgraph_checkpoint_ns', '')
+        # Only the outermost run of each agent-level node, not its inner steps
+        if not namespace or '|' in namespace or name != metadata.get('langgraph_node'):
+            return
+        with self._lock:
+            if namespace in self._open_nodes:
+                return
+            self._open_nodes.add(namespace)
+        self._start(run_id, kind='node', node=name, namespace=namespace)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    def _end_node(self, run_id) -> None:
+        if run_id not in self._started:
+            return
+        elapsed, fields = self._stop(run_id)
+        with self._lock:
+            self._open_nodes.discard(fields.get('namespace'))
+        if fields.get('kind') == 'node':
+            self.trace.add_node(fields['node'], elapsed)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start_llm(run_id, metadata)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start_llm(run_id, metadata)
+
+    def _start_llm(self, run_id, metadata) -> None:
+        metadata = metadata or {}
+        self._start(run_id, agent=_agent(metadata, self.trace.name), model=metadata.get('ls_model_name', 'unknown'))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        elapsed, fields = self._stop(run_id)
+        prompt_tokens, completion_tokens = _token_usage(response)
+        self.trace.add_llm_call(fields.get('agent', self.trace.name), fields.get('model', 'unknown'),
+                                elapsed or 0.0, prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        elapsed, fields = self._stop(run_id)
+        self.trace.add_llm_call(fields.get('agent', self.trace.name), fields.get('model', 'unknown'),
+                                elapsed or 0.0, 0, 0, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, name=None, **kwargs):
+        tool = (serialized or {}).get('name') or name or 'unknown'
+        self._start(run_id, agent=_agent(metadata, self.trace.name), tool=tool)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        elapsed, fields = self._stop(run_id)
+        self.trace.add_tool_call(fields.get('agent', self.trace.name), fields.get('tool', 'unknown'), elapsed or 0.0)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        elapsed, fields = self._stop(run_id)
+        self.trace.add_tool_call(fields.get('agent', self.trace.name), fields.get('tool', 'unknown'),
+                                 elapsed or 0.0, error=True)
+
+
+class Trace:
+    """
+    Timings and token counts of one pipeline run: wall time per graph node,
+    every LLM call with its prompt/completion tokens, every tool call and the
+    token size of tool outputs that are handed to an LLM.
+    Pass ``config()`` to a graph or model invocation to record it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.nodes: List[Dict[str, Any]] = []
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.tool_outputs: List[Dict[str, Any]] = []
+        self.handler = TraceHandler(self)
+        self._lock = threading.Lock()
+
+    def config(self) -> Dict[str, Any]:
+        return {"callbacks": [self.handler]}
+
+    def add_node(self, node: str, seconds: float) -> None:
+        with self._lock:
+            self.nodes.append({'node': node, 'seconds': seconds})
+
+    def add_llm_call(self, agent: str, model: str, seconds: float, prompt_tokens: int,
+                     completion_tokens: int, error: bool = False) -> None:
+        with self._lock:
+            self.llm_calls.append({
+                'agent': agent, 'model': model, 'seconds': seconds,
+                'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens, 'error': error,
+            })
+
+    def add_tool_call(self, agent: str, tool: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            self.tool_calls.append({'agent': agent, 'tool': tool, 'seconds': seconds, 'error': error})
+
+    def add_tool_output(self, tool: str, tokens: int) -> None:
+        with self._lock:
+            self.tool_outputs.append({'tool': tool, 'tokens': tokens})
+
+    def call_tool(self, tool: str, fn: Callable, *args, **kwargs):
+        """Call a tool function directly (outside a graph) and record it"""
+        started = time.perf_counter()
+        error = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.add_tool_call(self.name, tool, time.perf_counter() - started, error=error)
+
+    def finish(self) -> None:
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started
+            metrics.observe(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def ms(seconds):
+            return round(seconds * 1000, 1)
+
+        duration = self.duration if self.duration is not None else time.perf_counter() - self.started
+        with self._lock:
+            return {
+                'pipeline': self.name,
+                'duration_ms': ms(duration),
+                'llm_calls': len(self.llm_calls),
+                'prompt_tokens': sum(call['prompt_tokens'] for call in self.llm_calls),
+                'completion_tokens': sum(call['completion_tokens'] for call in self.llm_calls),
+                'nodes': [{'node': n['node'], 'duration_ms': ms(n['seconds'])} for n in self.nodes],
+                'llm': [{**{k: v for k, v in c.items() if k != 'seconds'}, 'duration_ms': ms(c['seconds'])}
+                        for c in self.llm_calls],
+                'tools': [{**{k: v for k, v in c.items() if k != 'seconds'}, 'duration_ms': ms(c['seconds'])}
+                          for c in self.tool_calls],
+                'tool_outputs': list(self.tool_outputs),
+            }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar('investiq_trace', default=None)
+
+
+@contextmanager
+def instrument(name: str) -> Iterator[Trace]:
+    """
+    Trace of the current request, started here if none is active. Nested
+    uses share the outer trace, which is added to the metrics once, when
+    the outermost block exits.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+
+
+def record_tool_output(tool: str, tokens: int) -> None:
+    """Add the token size of a tool's output to the active trace, if any"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_tool_output(tool, tokens)
+
+
+class Metrics:
+    """
+    Process-wide aggregates of finished traces, rendered in the Prometheus
+    text exposition format. Each worker process keeps its own counters.
+    """
+
+    FAMILIES = {
+        'investiq_pipeline_runs_total': ('counter', 'Instrumented pipeline runs'),
+        'investiq_pipeline_duration_seconds': ('summary', 'Wall time of pipeline runs'),
+        'investiq_node_duration_seconds': ('summary', 'Wall time of agent graph nodes'),
+        'investiq_llm_calls_total': ('counter', 'LLM calls'),
+        'investiq_llm_errors_total': ('counter', 'Failed LLM calls'),
+        'investiq_llm_duration_seconds': ('summary', 'LLM call latency'),
+        'investiq_llm_tokens_total': ('counter', 'LLM tokens by type'),
+        'investiq_tool_calls_total': ('counter', 'Tool calls'),
+        'investiq_tool_errors_total': ('counter', 'Failed tool calls'),
+        'investiq_tool_duration_seconds': ('summary', 'Tool call latency'),
+        'investiq_tool_output_tokens_total': ('counter', 'Tokens of tool outputs passed to LLMs'),
+    }
+
+    def __init__(self):
+        self._values: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._lock = threading.Lock()
+
+    def _inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def _observe(self, name: str, seconds: float, **labels) -> None:
+        self._inc(f'{name}_sum', seconds, **labels)
+        self._inc(f'{name}_count', 1, **labels)
+
+    def observe(self, trace: Trace) -> None:
+        with self._lock:
+            self._inc('investiq_pipeline_runs_total', pipeline=trace.name)
+            self._observe('investiq_pipeline_duration_seconds', trace.duration or 0.0, pipeline=trace.name)
+            for node in trace.nodes:
+                self._observe('investiq_node_duration_seconds', node['seconds'], node=node['node'])
+            for call in trace.llm_calls:
+                labels = {'agent': call['agent'], 'model': call['model']}
+                self._inc('investiq_llm_calls_total', **labels)
+                if call['error']:
+                    self._inc('investiq_llm_errors_total', **labels)
+                self._observe('investiq_llm_duration_seconds', call['seconds'], **labels)
+                self._inc('investiq_llm_tokens_total', call['prompt_tokens'], type='prompt', **labels)
+                self._inc('investiq_llm_tokens_total', call['completion_tokens'], type='completion', **labels)
+            for call in trace.tool_calls:
+                labels = {'agent': call['agent'], 'tool': call['tool']}
+                self._inc('investiq_tool_calls_total', **labels)
+                if call['error']:
+                    self._inc('investiq_tool_errors_total', **labels)
+                self._observe('investiq_tool_duration_seconds', call['seconds'], **labels)
+            for output in trace.tool_outputs:
+                self._inc('investiq_tool_output_tokens_total', output['tokens'], tool=output['tool'])
+
+    def render(self) -> str:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = []
+        for family, (kind, help_text) in self.FAMILIES.items():
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+            for (name, labels), value in values:
+                if name == family or (kind == 'summary' and name in (f'{family}_sum', f'{family}_count')):
+                    label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels)
+                    sample = f'{name}{{{label_text}}}' if label_text else name
+                    lines.append(f'{sample} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Singleton instance
+metrics = Metrics()
@@ -0,0 +1,114 @@
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from langchain.chat_models import init_chat_model
+
+from src.agent.agents import StockOverview
+from src.agent.instrumentation import Trace, instrument
+from src.agent.supervisor import prepare_human_message
+from src.agent.tools import get_financial_data, get_news_articles, get_stock_data
+
+SUMMARY_CHARS = 600
+DESCRIPTION_CHARS = 200
+MAX_ARTICLES = 10
+
+analysis_model = init_chat_model("openai:o4-mini").with_structured_output(
+    StockOverview, method="function_calling"
+)
+
+SYSTEM_PROMPT = """
+You are an expert financial analyst. Analyze the stock data, financial
+statements and news provided by the user and fill in the requested analysis.
+
+Guidelines:
+- Be objective and data-driven
+- Include both technical and fundamental analysis
+- Consider recent news impact
+- Provide clear, actionable recommendations
+- overall sentiment rating score should reflect certainty (-10 to +10)
+"""
+
+_fetch_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix='prefetch')
+
+
+def fetch_analysis_inputs(ticker: str, trace: Trace) -> Dict[str, Any]:
+    """Run the stock, financial and news tools for a ticker concurrently"""
+    tools = {
+        'stock': ('get_stock_data', get_stock_data),
+        'financials': ('get_financial_data', get_financial_data),
+        'news': ('get_news_articles', get_news_articles),
+    }
+    # Tools run in copies of the caller's context (a background job's rate-limit wait)
+    futures = {
+        name: _fetch_executor.submit(contextvars.copy_context().run, trace.call_tool, tool_name, tool, ticker)
+        for name, (tool_name, tool) in tools.items()
+    }
+    inputs = {}
+    for name, future in futures.items():
+        try:
+            inputs[name] = future.result()
+        except Exception as e:
+            print(f"Error fetching {name} for {ticker}: {str(e)}")
+            inputs[name] = {"error": str(e)}
+    return inputs
+
+
+def _truncate(text: str, limit: int) -> str:
+    text = ' '.join(str(text).split())
+    return text if len(text) <= limit else text[:limit].rstrip() + '...'
+
+
+def compact_stock_data(data: Dict[str, Any]) -> str:
+    if 'error' in data:
+        return data['error']
+    fields = {key: value for key, value in data.items() if value not in (None, "N/A")}
+    if 'longBusinessSummary' in fields:
+        fields['longBusinessSummary'] = _truncate(fields['longBusinessSummary'], SUMMARY_CHARS)
+    return json.dumps(fields, separators=(',', ':'), default=str)
+
+
+def compact_news(articles: List[Dict]) -> str:
+    if isinstance(articles, dict):
+        return articles.get('error', 'Not available')
+    lines = []
+    for article in articles[:MAX_ARTICLES]:
+        published = article.get('published_at', '')[:10]
+        source = article.get('source', '')
+        line = f"- [{published}] {article.get('title', '')} ({source})"
+        if article.get('description'):
+            line += f": {_truncate(article['description'], DESCRIPTION_CHARS)}"
+        lines.append(line)
+    return '\n'.join(lines) or 'No recent articles'
+
+
+def build_analysis_context(inputs: Dict[str, Any]) -> str:
+    """Compact the raw tool outputs into one context block for the model"""
+    financials = inputs['financials']
+    if isinstance(financials, dict):
+        financials = financials.get('error', 'Not available')
+    return f"""{compact_stock_data(inputs['stock'])}
+
+FINANCIAL DATA:
+{financials}
+
+RECENT NEWS:
+{compact_news(inputs['news'])}
+"""
+
+
+def invoke_prefetch_analysis(ticker: str) -> Dict[str, Any]:
+    """
+    Analyze a ticker with one model call: the data the agents would fetch
+    through tool calls is fetched here in code, concurrently, and the model
+    answers directly in the StockOverview schema.
+    """
+    ticker = ticker.upper()
+    with instrument("prefetch") as trace:
+        context = build_analysis_context(fetch_analysis_inputs(ticker, trace))
+        result = analysis_model.invoke([
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prepare_human_message(ticker, context)},
+        ], config=trace.config())
+    return result.dict()
@@ -1,48 +1,74 @@
 from langchain_openai import OpenAIEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 import os
+import threading
+import time
 from pathlib import Path
 env_path = Path(__file__).parent.parent.parent / '.env'
 from dotenv import load_dotenv
 load_dotenv(dotenv_path=env_path, override=True)
+
+from src.agent.embedding_cache import CachedEmbeddings
+from src.agent.ingestion import IngestionPipeline
+from src.agent.instrumentation import instrument
+from src.agent.streaming import astream_graph
+from src.agent.vector_index import PersistentVectorIndex
+
+EMBEDDING_MODEL = "text-embedding-3-large"
+DEFAULT_INDEX_DIR = os.environ.get('RAG_INDEX_DIR', str(Path(__file__).parent.parent.parent / '.cache' / 'rag_index'))
+
 class RAGAgent:
-    def __init__(self, data_dir):
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
-        self.vector_store = InMemoryVectorStore(self.embeddings)
+    def __init__(self, data_dir, index_dir=DEFAULT_INDEX_DIR, chunk_size=1000, chunk_overlap=200,
+                 embedding_batch_size=256, ingest_workers=None):
+        # Chunks and queries are embedded once per distinct text, across restarts and workers.
+        # Each ingestion batch is split into one request per concurrent slot.
+        embedding_concurrency = int(os.environ.get('RAG_EMBEDDING_CONCURRENCY', 4))
+        self.embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(model=EMBEDDING_MODEL),
+            path=os.path.join(index_dir, 'embeddings.sqlite3'),
+            model_name=EMBEDDING_MODEL,
+            batch_size=max(1, -(-embedding_batch_size // embedding_concurrency)),
+            max_concurrency=embedding_concurrency,
+        )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.embedding_batch_size = embedding_batch_size
+        self.ingest_workers = ingest_workers or int(os.environ.get('RAG_INGEST_WORKERS', os.cpu_count() or 1))
+        self.vector_store = PersistentVectorIndex(
+            index_dir, self.embeddings,
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, model_name=EMBEDDING_MODEL
+        )
         self.data_dir = data_dir
         self.agent = None
-        self.documents = []
         self.load_data()
-        self.chunk_documents()
         self.create_rag_agent()
 
+    def pdf_paths(self):
+        return [os.path.join(self.data_dir, f) for f in sorted(os.listdir(self.data_dir)) if f.endswith('.pdf')]
     
     def load_data(self):
-        pdf_files = [f for f in os.listdir(self.data_dir) if f.endswith('.pdf')]
-
-        for pdf_file in pdf_files:
-            file_path = os.path.join(self.data_dir, pdf_file)
-            print(f"Loading {pdf_file}...")
-            try:
-                loader = PyPDFLoader(file_path)
-                pages = loader.load()
-                self.documents.extend(pages)
-                print(f"Loaded {len(pages)} pages from {pdf_file}")
-            except Exception as e:
-                print(f"Error loading {pdf_file}: {str(e)}")
-
-    def chunk_documents(self, chunk_size=1000, chunk_overlap=200):
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,  
-            chunk_overlap=chunk_overlap,  
-            add_start_index=True, 
-        )
+        """
+        Stream the PDFs that have no up-to-date segment in the on-disk index
+        through the parallel ingestion pipeline, then load the index
+        """
+        pdf_paths = self.pdf_paths()
+        for file_path in pdf_paths:
+            if self.vector_store.has(file_path):
+                print(f"Using indexed embeddings for {os.path.basename(file_path)}")
+
+        changed = [file_path for file_path in pdf_paths if not self.vector_store.has(file_path)]
+        if changed:
+            pipeline = IngestionPipeline(
+                self.vector_store,
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                batch_size=self.embedding_batch_size,
+                max_workers=self.ingest_workers,
+            )
+            print(f"Embedded {pipeline.run(changed)} chunks from {len(changed)} new or changed files")
 
-        all_splits = text_splitter.split_documents(self.documents)
-        self.vector_store.add_documents(documents=all_splits)
+        self.vector_store.load(pdf_paths)
+        print(f"Indexed {len(self.vector_store)} chunks")
 
     def create_rag_agent(self):
         from langchain.tools import tool
@@ -74,12 +100,85 @@ class RAGAgent:
 
         self.agent = agent
 
-    def query(self, query):
+    async def aquery(self, query):
+        """Run the agent on a question, returning its final state"""
         if self.agent is None:
             raise ValueError("Agent not created. Call create_rag_agent first.")
         
-        return self.agent.invoke(
-            {"messages": [{"role": "user", "content": query}]}
-        )
+        with instrument("rag_agent") as trace:
+            return await self.agent.ainvoke(
+                {"messages": [{"role": "user", "content": query}]},
+                config=trace.config(),
+            )
+
+    def astream(self, query):
+        """Yield tool call and answer token events while the agent runs"""
+        if self.agent is None:
+            raise ValueError("Agent not created. Call create_rag_agent first.")
+        
+        return astream_graph(self.agent, query, answer_agent="rag_agent")
+
+
+class RAGAgentLoader:
+    """
+    Builds the RAGAgent on a background thread so importing this module, and
+    starting the app, never waits on parsing or embedding the corpus.
+
+    ``state`` is one of ``not_started``, ``warming_up``, ``ready``,
+    ``failed`` or ``unavailable`` (no dataset directory).
+    """
+
+    def __init__(self, data_dir, **agent_kwargs):
+        self.data_dir = data_dir
+        self.agent_kwargs = agent_kwargs
+        self.agent = None
+        self.state = 'not_started'
+        self.error = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start building the agent in the background, if not already started"""
+        with self._lock:
+            if self.state != 'not_started':
+                return
+            if not os.path.isdir(self.data_dir):
+                self.state = 'unavailable'
+                self.error = f"Dataset directory not found: {self.data_dir}"
+                return
+            self.state = 'warming_up'
+        threading.Thread(target=self._build, name='rag-agent-warmup', daemon=True).start()
+
+    def _build(self):
+        started = time.time()
+        try:
+            agent = RAGAgent(data_dir=self.data_dir, **self.agent_kwargs)
+        except Exception as e:
+            print(f"Error building RAG agent: {str(e)}")
+            with self._lock:
+                self.state = 'failed'
+                self.error = str(e)
+            return
+        print(f"RAG agent ready in {time.time() - started:.1f}s")
+        with self._lock:
+            self.agent = agent
+            self.state = 'ready'
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    def get(self):
+        """The agent once it is ready, otherwise None (starting the warm-up if needed)"""
+        self.start()
+        return self.agent if self.ready else None
+
+    def status(self):
+        status = {'state': self.state}
+        if self.error:
+            status['error'] = self.error
+        if self.ready:
+            status['chunks'] = len(self.agent.vector_store)
+            status['embedding_cache'] = self.agent.embeddings.stats()
+        return status
 
-rag_agent = RAGAgent(data_dir=os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "dataset", "Structured data-20250319T105519Z-001", "Structured data"))
\ No newline at end of file
+rag_agent = RAGAgentLoader(data_dir=os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "dataset", "Structured data-20250319T105519Z-001", "Structured data"))
\ No newline at end of file
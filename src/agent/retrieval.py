@@ -0,0 +1,112 @@
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class VectorSearchEngine:
+    """
+    Exact top-k cosine search over L2-normalized float32 matrices.
+
+    The rows may be split over several segment matrices (memory-mapped
+    ``.npy`` files of a PersistentVectorIndex), which are searched where
+    they are instead of being copied into one matrix. Scores for a whole
+    batch of queries come from one matrix product per segment, the best
+    ``k`` rows per query and segment are selected with ``argpartition``
+    (linear time), and the per-segment winners are merged the same way.
+    An optional metadata pre-filter on source file and page range restricts
+    the candidate rows before scoring, using arrays built once when the
+    engine is created.
+    """
+
+    def __init__(self, vectors: Union[np.ndarray, Sequence[np.ndarray]], metadata: Sequence[Dict]):
+        matrices = list(vectors) if isinstance(vectors, (list, tuple)) else [vectors]
+        # A no-op for float32 memory maps, which stay on disk
+        self.segments = [np.ascontiguousarray(matrix, dtype=np.float32) for matrix in matrices if len(matrix)]
+        self.offsets = np.cumsum([0] + [len(matrix) for matrix in self.segments])
+        if self.offsets[-1] != len(metadata):
+            raise ValueError(f"Got {self.offsets[-1]} vectors for {len(metadata)} metadata rows")
+
+        # Integer-coded source file and page per row, for vectorized pre-filtering
+        sources = [os.path.basename(str(row.get('source', ''))) for row in metadata]
+        self.source_names, self.source_codes = np.unique(np.array(sources, dtype=object), return_inverse=True)
+        self.source_names = list(self.source_names)
+        self.pages = np.array([row.get('page', -1) if row.get('page') is not None else -1 for row in metadata],
+                              dtype=np.int64)
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Tuple[np.ndarray, List[Dict]]]) -> 'VectorSearchEngine':
+        """Build one engine from the ``(vectors, records)`` segments of a PersistentVectorIndex"""
+        matrices, metadata = [], []
+        for vectors, records in segments:
+            matrices.append(vectors)
+            metadata.extend(record['metadata'] for record in records)
+        return cls(matrices, metadata)
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def candidates(self, sources: Optional[Sequence[str]] = None,
+                   page_range: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
+        """
+        Row indices passing the metadata pre-filter, or None when there is no
+        filter. ``sources`` match on file name, ``page_range`` is inclusive.
+        """
+        if sources is None and page_range is None:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        if sources is not None:
+            wanted = {os.path.basename(source) for source in sources}
+            codes = [code for code, name in enumerate(self.source_names) if name in wanted]
+            mask &= np.isin(self.source_codes, codes)
+        if page_range is not None:
+            low, high = page_range
+            mask &= (self.pages >= low) & (self.pages <= high)
+        return np.flatnonzero(mask)
+
+    def search(self, queries: np.ndarray, k: int = 4, sources: Optional[Sequence[str]] = None,
+               page_range: Optional[Tuple[int, int]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Top-``k`` ``(row, score)`` pairs for each query, best first.
+
+        ``queries`` is a ``(n, dim)`` batch or a single ``(dim,)`` vector;
+        they are normalized here, so raw embeddings can be passed in.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        rows = self.candidates(sources, page_range)
+        if len(self) == 0 or k <= 0 or (rows is not None and len(rows) == 0):
+            return [[] for _ in queries]
+
+        ids, scores = [], []
+        for start, matrix in zip(self.offsets, self.segments):
+            local = None
+            if rows is not None:
+                low, high = np.searchsorted(rows, [start, start + len(matrix)])
+                if low == high:
+                    continue
+                local = rows[low:high] - start
+                matrix = matrix[local]
+            # (n_queries, n_rows) scores of the segment in one product
+            top, top_scores = self._top(queries @ matrix.T, k)
+            ids.append((top if local is None else local[top]) + start)
+            scores.append(top_scores)
+
+        # Merge the per-segment winners
+        top, top_scores = self._top(np.concatenate(scores, axis=1), k)
+        top = np.take_along_axis(np.concatenate(ids, axis=1), top, axis=1)
+        return [list(zip(row_ids.tolist(), row_scores.tolist())) for row_ids, row_scores in zip(top, top_scores)]
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Columns and values of the best ``k`` scores of every row, best first"""
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            top = np.argpartition(scores, -k, axis=1)[:, -k:]
+        else:
+            top = np.broadcast_to(np.arange(k), (len(scores), k))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
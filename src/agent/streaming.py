@@ -0,0 +1,91 @@
+from typing import Any, AsyncIterator, Dict, Iterator
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.agent.instrumentation import Trace
+
+HANDOFF_PREFIXES = ('transfer_to_', 'transfer_back_to_')
+
+
+def _agent_name(namespace, default: str) -> str:
+    """Agent a streamed item belongs to, from its subgraph namespace (``'stock_agent:<id>'``)"""
+    return namespace[0].split(':')[0] if namespace else default
+
+
+def _handoff_target(tool_name: str) -> str:
+    for prefix in HANDOFF_PREFIXES:
+        if tool_name.startswith(prefix):
+            return tool_name[len(prefix):]
+    return None
+
+
+async def astream_graph(graph, message: str, answer_agent: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run a compiled LangGraph graph on a user message with ``astream`` and
+    yield its progress as ``{'event': ..., 'data': ...}`` dicts, ready to be
+    sent as Server-Sent Events:
+
+    - ``handoff``: control moved to another agent
+    - ``tool_call``: an agent called one of its tools
+    - ``token``: a piece of ``answer_agent``'s reply, as the model produces it
+    - ``done``: the run finished, with the complete final ``response``
+
+    Tokens of the other agents are intermediate work and are not streamed.
+    The run is recorded in the agent metrics under ``answer_agent``.
+    """
+    trace = Trace(answer_agent)
+    collector = _EventCollector(answer_agent)
+    try:
+        stream = graph.astream(
+            {"messages": [{"role": "user", "content": message}]},
+            config=trace.config(),
+            stream_mode=["updates", "messages"],
+            subgraphs=True,
+        )
+        async for namespace, mode, data in stream:
+            for event in collector.events(namespace, mode, data):
+                yield event
+        yield collector.done()
+    finally:
+        trace.finish()
+
+
+class _EventCollector:
+    """Turns the items of a graph stream into events, remembering the final answer"""
+
+    def __init__(self, answer_agent: str):
+        self.answer_agent = answer_agent
+        self.seen = set()
+        self.final_response = ''
+
+    def events(self, namespace, mode: str, data) -> Iterator[Dict[str, Any]]:
+        agent = _agent_name(namespace, self.answer_agent)
+
+        if mode == 'messages':
+            chunk, _ = data
+            if isinstance(chunk, AIMessageChunk) and agent == self.answer_agent and isinstance(chunk.content, str) and chunk.content:
+                yield {'event': 'token', 'data': {'agent': agent, 'content': chunk.content}}
+            return
+
+        # 'updates': full messages written by each node, repeated by parent graphs
+        for update in data.values():
+            if not isinstance(update, dict):
+                continue
+            for msg in update.get('messages', []):
+                if not isinstance(msg, AIMessage) or msg.id in self.seen:
+                    continue
+                self.seen.add(msg.id)
+                sender = msg.name or agent
+
+                for tool_call in msg.tool_calls:
+                    target = _handoff_target(tool_call['name'])
+                    if target:
+                        yield {'event': 'handoff', 'data': {'from': sender, 'to': target}}
+                    else:
+                        yield {'event': 'tool_call', 'data': {'agent': sender, 'tool': tool_call['name'], 'args': tool_call['args']}}
+
+                if sender == self.answer_agent and not msg.tool_calls and isinstance(msg.content, str) and msg.content:
+                    self.final_response = msg.content
+
+    def done(self) -> Dict[str, Any]:
+        return {'event': 'done', 'data': {'response': self.final_response}}
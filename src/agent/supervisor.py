@@ -1,7 +1,13 @@
+import operator
+from typing import Annotated, Any, Dict, TypedDict
+
+from langgraph.graph import StateGraph, START, END
 from langgraph_supervisor import create_supervisor
 from langchain.chat_models import init_chat_model
 
 from src.agent.agents import json_parser_agent, news_agent, stock_agent
+from src.agent.instrumentation import instrument
+from src.agent.streaming import astream_graph
 
 supervisor = create_supervisor(
     model=init_chat_model("openai:gpt-4.1"),
@@ -18,38 +24,109 @@ supervisor = create_supervisor(
     output_mode="full_history",
 ).compile()
 
-def prepare_human_message(ticker: str) -> str:
+def prepare_human_message(ticker: str, context: str = "") -> str:
     return f"""
 Analyze this stock data, financial information, recent news and provide your analysis in the requested JSON format.
 
 STOCK DATA for {ticker.upper()}:
-
+{context}
 Provide your analysis in the proper JSON format, with no additional text.
 """
 
+class AnalysisState(TypedDict):
+    ticker: str
+    reports: Annotated[Dict[str, str], operator.or_]
+    analysis: Dict[str, Any]
+
+
+def _last_content(result) -> str:
+    return result['messages'][-1].content
+
+
+def stock_node(state: AnalysisState) -> Dict[str, Any]:
+    ticker = state['ticker']
+    result = stock_agent.invoke({"messages": [{
+        "role": "user",
+        "content": f"Get the stock data and financial information for {ticker}.",
+    }]})
+    return {"reports": {"stock": _last_content(result)}}
+
+
+def news_node(state: AnalysisState) -> Dict[str, Any]:
+    ticker = state['ticker']
+    result = news_agent.invoke({"messages": [{
+        "role": "user",
+        "content": f"Find the most recent news articles about {ticker} and its company.",
+    }]})
+    return {"reports": {"news": _last_content(result)}}
+
+
+def synthesis_node(state: AnalysisState) -> Dict[str, Any]:
+    reports = state['reports']
+    context = f"""{reports.get('stock', 'Not available')}
+
+RECENT NEWS:
+{reports.get('news', 'Not available')}
+"""
+    message = prepare_human_message(state['ticker'], context)
+    result = json_parser_agent.invoke({"messages": [{"role": "user", "content": message}]})
+    import json
+    return {"analysis": json.loads(_last_content(result))}
+
+
+# Ticker analysis with the independent stock and news branches running
+# concurrently and joining into the JSON synthesis step
+analysis_builder = StateGraph(AnalysisState)
+analysis_builder.add_node("stock_agent", stock_node)
+analysis_builder.add_node("news_agent", news_node)
+analysis_builder.add_node("json_parser_agent", synthesis_node)
+analysis_builder.add_edge(START, "stock_agent")
+analysis_builder.add_edge(START, "news_agent")
+analysis_builder.add_edge(["stock_agent", "news_agent"], "json_parser_agent")
+analysis_builder.add_edge("json_parser_agent", END)
+analysis_graph = analysis_builder.compile()
+
+
+def invoke_analysis_graph(ticker: str) -> Dict[str, Any]:
+    with instrument("analysis_graph") as trace:
+        response = analysis_graph.invoke({"ticker": ticker.upper(), "reports": {}}, config=trace.config())
+    return response['analysis']
+
 def invoke_supervisor(message: str) -> str:
-    response = supervisor.invoke(
-    {
-        "messages": [
-            {
-                "role": "user",
-                "content": message,
-            }
-        ]
-    })
+    with instrument("supervisor") as trace:
+        response = supervisor.invoke(
+        {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": message,
+                }
+            ]
+        }, config=trace.config())
     
     import json
     lm = response['messages'][-1]
     return json.loads(lm.model_dump()['content'])
 
-def query_supervisor(question: str) -> str:
-    response = supervisor.invoke(
-    {
-        "messages": [
-            {
-                "role": "user",
-                "content": question,
-            }
-        ]
-    })
+async def ainvoke_supervisor(message: str) -> str:
+    """``invoke_supervisor`` for event loops"""
+    with instrument("supervisor") as trace:
+        response = await supervisor.ainvoke(
+            {"messages": [{"role": "user", "content": message}]}, config=trace.config()
+        )
+    
+    import json
+    lm = response['messages'][-1]
+    return json.loads(lm.model_dump()['content'])
+
+async def aquery_supervisor(question: str) -> str:
+    """The supervisor's plain-text answer to a question"""
+    with instrument("supervisor") as trace:
+        response = await supervisor.ainvoke(
+            {"messages": [{"role": "user", "content": question}]}, config=trace.config()
+        )
     return response['messages'][-1].content
+
+def astream_supervisor(message: str):
+    """Yield handoff, tool call and answer token events while the supervisor runs"""
+    return astream_graph(supervisor, message, answer_agent="supervisor")
@@ -1,6 +1,9 @@
 from dotenv import load_dotenv
 from typing import Dict, Any, List
 import yfinance as yf
+
+from src.services.http_client import http_client
+from src.services.news_cache import news_cache
 load_dotenv() 
 
 
@@ -19,7 +22,7 @@ def get_stock_data(ticker: str) -> Dict[str, Any]:
     """
     try:
         stock = yf.Ticker(ticker)
-        info = stock.info
+        info = http_client.call("yfinance", lambda: stock.info)
 
         if not info:
             return {"error": f"Could not retrieve data for ticker: {ticker}. It might be invalid."}
@@ -47,7 +50,7 @@ def get_stock_data(ticker: str) -> Dict[str, Any]:
 
 
 def get_financial_data(ticker: str) -> str:
-    """Fetches stock data for a
+    """Fetches financial statements for a
       given stock ticker using yfinance.
     
     Args:
@@ -55,34 +58,23 @@ def get_financial_data(ticker: str) -> str:
       symbol (e.g., "AAPL", "MSFT").
     
     Returns:
-        str: A String of data containing income_statement, 
-        cash_flow, balance_sheet, financials, historical_month_data
+        str: Compact CSV (or JSON) of the key income_statement,
+        cash_flow and balance_sheet line items with scaled units,
+        followed by one month of daily closes,
       or an error message if the ticker is invalid.
     """
     try:
+        from src.agent.financials import count_tokens, financial_serializer
+        from src.agent.instrumentation import record_tool_output
+
         stock = yf.Ticker(ticker)
-        info = stock.info
+        info = http_client.call("yfinance", lambda: stock.info)
 
         if not info:
             return {"error": f"Could not retrieve data for ticker: {ticker}. It might be invalid."}
 
-        # Extract relevant information
-        data = f"""
-            'income_statement': 
-            {stock.income_stmt}
-
-            'cash_flow': 
-            {stock.cash_flow}
-
-            'balance_sheet': 
-            {stock.balance_sheet}
-
-            'financials': 
-            {stock.financials}
-
-            'historical_month_data':
-            {stock.history(period='1mo')}
-        """
+        data = financial_serializer.serialize(stock)
+        record_tool_output("get_financial_data", count_tokens(data))
         return data
     except Exception as e:
         return {"error": f"An unexpected error occurred while fetching data for {ticker}: {e}"}
@@ -96,19 +88,20 @@ def get_news_articles(query: str) -> List[Dict]:
         query: Search keywords or phrases (str)
             
     Returns:
-        List of news articles with title, description, url, etc.
+        List of news articles with title, description, url,
+        source and published_at.
     """
     try:
-        from newsapi import NewsApiClient
-        import os
-        
-        newsapi = NewsApiClient(api_key=os.getenv("NEWS_API_KEY"))
-        response = newsapi.get_everything(
-            q=query,
-            language="en",
-            sort_by="publishedAt",
-            page_size=10
-        )
-        return response.get("articles", [])
+        articles = news_cache.search(query, language="en", sort_by="publishedAt", page_size=10)
+        return [{key: value for key, value in article.items() if key != "image_url"} for article in articles]
+    except Exception as e:
+        return {"error": f"Failed to fetch news: {str(e)}"}
+
+
+async def aget_news_articles(query: str) -> List[Dict]:
+    """Async version of get_news_articles, used when the agents run with ainvoke/astream"""
+    try:
+        articles = await news_cache.asearch(query, language="en", sort_by="publishedAt", page_size=10)
+        return [{key: value for key, value in article.items() if key != "image_url"} for article in articles]
     except Exception as e:
         return {"error": f"Failed to fetch news: {str(e)}"}
\ No newline at end of file
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.agent.retrieval import VectorSearchEngine
+
+
+class PersistentVectorIndex:
+    """
+    On-disk embedding index for the RAG agent.
+
+    Every source file gets its own segment: a float32 ``.npy`` matrix of
+    L2-normalized chunk embeddings, opened memory-mapped, and a ``.json``
+    sidecar holding the chunk text and metadata row for row. Segments are
+    keyed by the file's content hash together with the chunking parameters
+    and embedding model, so an unchanged PDF is never parsed or embedded
+    again and any change to the file or to the chunking produces a new key.
+    """
+
+    def __init__(self, index_dir: str, embeddings, chunk_size: int, chunk_overlap: int, model_name: str):
+        self.index_dir = index_dir
+        self.embeddings = embeddings
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.model_name = model_name
+        self.segments: Dict[str, Tuple[np.ndarray, List[Dict]]] = {}
+        self.records: List[Dict] = []
+        self.engine = VectorSearchEngine.from_segments([])
+        self._keys: Dict[str, str] = {}
+        os.makedirs(index_dir, exist_ok=True)
+
+    def segment_key(self, file_path: str) -> str:
+        """Content hash of a file, salted with the chunking parameters and model"""
+        key = self._keys.get(file_path)
+        if key is None:
+            digest = hashlib.sha256(f"{self.model_name}:{self.chunk_size}:{self.chunk_overlap}:".encode())
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            key = self._keys[file_path] = digest.hexdigest()
+        return key
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.index_dir, key)
+        return base + '.npy', base + '.json'
+
+    def has(self, file_path: str) -> bool:
+        """Whether an up-to-date segment exists for the file"""
+        vectors_path, records_path = self._paths(self.segment_key(file_path))
+        return os.path.exists(vectors_path) and os.path.exists(records_path)
+
+    def add(self, file_path: str, chunks: List[Document]) -> None:
+        """Embed a file's chunks and write them as its segment"""
+        vectors = np.asarray(
+            self.embeddings.embed_documents([chunk.page_content for chunk in chunks]), dtype=np.float32
+        ).reshape(len(chunks), -1)
+        self.write(file_path, chunks, vectors)
+
+    def write(self, file_path: str, chunks: List[Document], vectors: np.ndarray) -> None:
+        """Write precomputed chunk embeddings as the file's segment"""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        records = [{'page_content': chunk.page_content, 'metadata': chunk.metadata} for chunk in chunks]
+
+        # Write to temporary files (unique per worker and thread) first, so a
+        # crash never leaves a half segment behind and concurrent writers of
+        # the same segment don't clobber each other's files
+        vectors_path, records_path = self._paths(self.segment_key(file_path))
+        suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(vectors_path + suffix, 'wb') as f:
+                np.save(f, vectors.astype(np.float32))
+            with open(records_path + suffix, 'w', encoding='utf-8') as f:
+                json.dump(records, f)
+            # Segment files of one key hold the same chunks, so the vectors and
+            # records of two writers always line up; load() checks the row counts
+            os.replace(vectors_path + suffix, vectors_path)
+            os.replace(records_path + suffix, records_path)
+        finally:
+            for tmp_path in (vectors_path + suffix, records_path + suffix):
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def load(self, file_paths: List[str], prune: bool = True) -> None:
+        """
+        Memory-map the segments of the given files and build the search
+        engine over them. With ``prune``, segment files of removed or changed
+        sources are deleted from disk.
+        """
+        segments = {}
+        for file_path in file_paths:
+            if not self.has(file_path):
+                continue
+            vectors_path, records_path = self._paths(self.segment_key(file_path))
+            with open(records_path, encoding='utf-8') as f:
+                records = json.load(f)
+            vectors = np.load(vectors_path, mmap_mode='r')
+            if len(vectors) != len(records):
+                print(f"Skipping inconsistent index segment for {file_path}: "
+                      f"{len(vectors)} vectors, {len(records)} records")
+                continue
+            segments[file_path] = (vectors, records)
+        self.segments = segments
+        self.records = [record for _, records in segments.values() for record in records]
+        self.engine = VectorSearchEngine.from_segments(segments.values())
+
+        if prune:
+            live = {self.segment_key(file_path) for file_path in segments}
+            for name in os.listdir(self.index_dir):
+                key, ext = os.path.splitext(name)
+                if ext in ('.npy', '.json') and key not in live:
+                    os.remove(os.path.join(self.index_dir, name))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def similarity_search(self, query: str, k: int = 4, sources: Optional[List[str]] = None,
+                          page_range: Optional[Tuple[int, int]] = None) -> List[Document]:
+        """Cosine-similarity search, optionally restricted to source files and a page range"""
+        return self.batch_similarity_search([query], k=k, sources=sources, page_range=page_range)[0]
+
+    def batch_similarity_search(self, queries: List[str], k: int = 4, sources: Optional[List[str]] = None,
+                                page_range: Optional[Tuple[int, int]] = None) -> List[List[Document]]:
+        """Embed and search several queries at once, one result list per query"""
+        if not queries:
+            return []
+        if not len(self):
+            return [[] for _ in queries]
+        query_vectors = np.asarray(self.embeddings.embed_documents(list(queries)), dtype=np.float32)
+        results = self.engine.search(query_vectors, k=k, sources=sources, page_range=page_range)
+        return [[self._document(row) for row, _ in hits] for hits in results]
+
+    def _document(self, row: int) -> Document:
+        record = self.records[row]
+        return Document(page_content=record['page_content'], metadata=record['metadata'])
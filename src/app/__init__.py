@@ -15,14 +15,32 @@ def create_app():
     app = Flask(__name__, template_folder=template_dir)
     app.config.from_object(Config)
     
-    # Configure cache
-    app.config['CACHE_TYPE'] = 'SimpleCache' 
-    app.config['CACHE_DEFAULT_TIMEOUT'] = 1800  
+    # Async views (the agent endpoints) share one long-lived event loop
+    from .agent_loop import agent_loop
+    app.async_to_sync = agent_loop.async_to_sync
+    
+    # Configure cache (backend and bounds come from Config)
     cache.init_app(app)
     
     from . import routes
     app.register_blueprint(routes.main)
     
+    # Stock analyses run on a worker pool, watchlist symbols first
+    from .analysis_jobs import analysis_jobs
+    analysis_jobs.start(app, routes._run_analysis_job, routes.stock_service.top_tickers)
+    
+    # Quote API data comes from StockService, cached for STOCK_QUOTE_TTL
+    from .stock_quotes import stock_quotes
+    stock_quotes.init_app(app, routes.stock_service)
+    
+    # Keep the dashboard's market data fresh in the background
+    from .market_refresher import market_refresher
+    market_refresher.start(app, routes.stock_service)
+    
+    # Build the RAG index in the background so startup stays fast
+    from src.agent.rag_agent import rag_agent
+    rag_agent.start()
+    
     app.jinja_env.filters['time_ago'] = time_ago
     
     @app.context_processor
@@ -0,0 +1,103 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+
+async def _await(awaitable: Awaitable) -> Any:
+    return await awaitable
+
+
+class AgentLoop:
+    """
+    The one event loop every agent call runs on.
+
+    The chat models are built once at import time, and ``langchain_openai``
+    caches their ``httpx.AsyncClient`` for the whole process, so its
+    connections belong to the loop they were first used on. Flask's default
+    of a new loop per async view breaks the next request with "Event loop is
+    closed"; instead the views run here (``async_to_sync`` is installed as
+    ``Flask.async_to_sync``). Under WSGI servers the loop runs on a daemon
+    thread; the ASGI entry point ``attach``es the server's own loop, so the
+    agent routes run natively on it.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='agent-loop', daemon=True).start()
+            return self._loop
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Run the agent calls on ``loop``, the ASGI server's running loop"""
+        with self._lock:
+            if self._loop is not None and self._loop is not loop and not self._loop.is_closed():
+                raise RuntimeError("Agent calls already run on another event loop")
+            self._loop = loop
+
+    def submit(self, awaitable: Awaitable, context: Optional[contextvars.Context] = None) -> Future:
+        """Schedule ``awaitable`` on the loop from another thread, in ``context`` (default: a copy of the caller's)"""
+        loop = self.loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("Can't block on the agent loop from the loop itself; await instead")
+
+        context = context if context is not None else contextvars.copy_context()
+        future: Future = Future()
+
+        def done(task: asyncio.Task) -> None:
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        def start() -> None:
+            loop.create_task(_await(awaitable), context=context).add_done_callback(done)
+
+        loop.call_soon_threadsafe(start)
+        return future
+
+    def run(self, awaitable: Awaitable) -> Any:
+        """Run ``awaitable`` on the loop and wait for its result"""
+        return self.submit(awaitable).result()
+
+    def iterate(self, events: AsyncIterator) -> Iterator:
+        """
+        Iterate an async generator from sync code (a WSGI response body). Every
+        step runs in the same context, so context variables set by the
+        generator survive between items.
+        """
+        context = contextvars.copy_context()
+        try:
+            while True:
+                try:
+                    yield self.submit(events.__anext__(), context).result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            # Also runs when the client disconnects and the response is closed
+            self.submit(events.aclose(), context).result()
+
+    def async_to_sync(self, func: Callable[..., Awaitable]) -> Callable[..., Any]:
+        """``Flask.async_to_sync`` running async views on this loop"""
+        @wraps(func)
+        def view(*args, **kwargs):
+            return self.run(func(*args, **kwargs))
+        return view
+
+
+# Singleton instance
+agent_loop = AgentLoop()
@@ -0,0 +1,238 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.services.http_client import http_client
+
+# Lower runs first
+PRIORITY_WATCHLIST = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_REFRESH = 2
+
+ACTIVE = ('queued', 'running')
+
+
+class QueueFull(RuntimeError):
+    """Too many analysis jobs are already waiting"""
+
+
+def analysis_state(job: Optional[Dict[str, Any]], has_analysis: bool) -> str:
+    """
+    What the status API reports for a symbol: its active job's status,
+    ``done`` only once an analysis is cached, else the last job's outcome
+    (``missing`` when a finished job's analysis isn't in the cache).
+    """
+    if job is not None and job['status'] in ACTIVE:
+        return job['status']
+    if has_analysis:
+        return 'done'
+    if job is None or job['status'] == 'done':
+        return 'missing'
+    return job['status']
+
+
+class AnalysisJobQueue:
+    """
+    Background queue of stock analysis jobs.
+
+    Requests enqueue a job instead of running the agents themselves, so web
+    workers are never tied up for a whole analysis. A fixed pool of worker
+    threads runs the jobs by priority (watchlist symbols first, background
+    refreshes of stale analyses last) and at most ``max_queued`` jobs wait.
+
+    A symbol has at most one job at a time across worker processes: the
+    first process to enqueue it takes a cache lock that lives until the job
+    ends (or ``job_timeout``). Job records are kept in the app cache, so the
+    status of a job can be read from any process; this process forgets its
+    finished jobs after ``record_ttl``, or sooner beyond ``max_records``.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queued: int = 100, job_timeout: int = 600,
+                 record_ttl: int = 3600, max_records: int = 1000):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.job_timeout = job_timeout
+        self.record_ttl = record_ttl
+        self.max_records = max_records
+        self.priority_symbols = set()
+        self._app = None
+        self._run_job: Optional[Callable[[str], Any]] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._available = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def start(self, app, run_job: Callable[[str], Any], priority_symbols: Iterable[str] = ()) -> None:
+        """Start the worker threads (once per process); ``run_job`` is called in an app context"""
+        if self._threads:
+            return
+        self._app = app
+        self._run_job = run_job
+        self.priority_symbols = {symbol.upper() for symbol in priority_symbols}
+        self.max_workers = app.config['ANALYSIS_WORKERS']
+        self.max_queued = app.config['ANALYSIS_QUEUE_LIMIT']
+        self.job_timeout = app.config['ANALYSIS_JOB_TIMEOUT']
+        for i in range(self.max_workers):
+            thread = threading.Thread(target=self._work, name=f'analysis-job-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    @staticmethod
+    def _key(symbol: str) -> str:
+        return f'analysis_job:{symbol}'
+
+    def acquire(self, symbol: str) -> bool:
+        """Take the cross-process lock of a symbol's analysis; False when another job holds it"""
+        from .cache import cache
+
+        return cache.add(f'{self._key(symbol.upper())}:lock', os.getpid(), timeout=self.job_timeout)
+
+    def release(self, symbol: str) -> None:
+        from .cache import cache
+
+        cache.delete(f'{self._key(symbol.upper())}:lock')
+
+    def submit(self, symbol: str, priority: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Enqueue an analysis of ``symbol`` unless one is already queued or
+        running (in any process), and return the job's status. A queued job
+        submitted again with a higher priority is moved up.
+        """
+        symbol = symbol.upper()
+        if priority is None:
+            priority = PRIORITY_WATCHLIST if symbol in self.priority_symbols else PRIORITY_DEFAULT
+
+        with self._available:
+            job = self._jobs.get(symbol)
+            if job is not None and job['status'] in ACTIVE:
+                if job['status'] == 'queued' and priority < job['priority']:
+                    job['priority'] = priority
+                    heapq.heappush(self._heap, (priority, next(self._counter), symbol))
+                    self._available.notify()
+                return self.status(symbol)
+            if sum(job['status'] == 'queued' for job in self._jobs.values()) >= self.max_queued:
+                raise QueueFull(f"{self.max_queued} analysis jobs are already queued")
+
+        if not self.acquire(symbol):
+            # Queued or running in another worker process
+            return self.status(symbol) or {'symbol': symbol, 'status': 'queued'}
+
+        job = {
+            'symbol': symbol,
+            'status': 'queued',
+            'priority': priority,
+            'enqueued_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'error': None,
+        }
+        with self._available:
+            self._prune()
+            self._jobs[symbol] = job
+            heapq.heappush(self._heap, (priority, next(self._counter), symbol))
+            self._available.notify()
+        self._save(job)
+        return self.status(symbol)
+
+    def _prune(self) -> None:
+        """Drop finished jobs older than ``record_ttl``, then the oldest beyond ``max_records`` (lock held)"""
+        now = time.time()
+        cutoff = now - self.record_ttl
+        # A job that just ended may not have its finish time yet
+        finished = sorted((job['finished_at'] or now, symbol) for symbol, job in self._jobs.items()
+                          if job['status'] not in ACTIVE)
+        # Room for the job being added
+        excess = len(self._jobs) + 1 - self.max_records
+        for finished_at, symbol in finished:
+            if finished_at >= cutoff and excess <= 0:
+                break
+            del self._jobs[symbol]
+            excess -= 1
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        from .cache import cache
+
+        cache.set(self._key(job['symbol']), dict(job), timeout=self.record_ttl)
+
+    def _next(self) -> str:
+        with self._available:
+            while True:
+                while not self._heap:
+                    self._available.wait()
+                priority, _, symbol = heapq.heappop(self._heap)
+                job = self._jobs.get(symbol)
+                # Skip entries left behind when a job was moved up
+                if job is not None and job['status'] == 'queued' and job['priority'] == priority:
+                    job['status'] = 'running'
+                    job['started_at'] = time.time()
+                    return symbol
+
+    def _work(self) -> None:
+        while True:
+            symbol = self._next()
+            job = self._jobs[symbol]
+            with self._app.app_context():
+                try:
+                    self._save(job)
+                    with http_client.background():
+                        self._run_job(symbol)
+                    job['status'] = 'done'
+                except Exception as e:
+                    self._app.logger.error(f"Error in analysis job for {symbol}: {str(e)}")
+                    job['status'] = 'failed'
+                    job['error'] = str(e)
+                job['finished_at'] = time.time()
+                try:
+                    self._save(job)
+                except Exception as e:
+                    self._app.logger.error(f"Error saving analysis job for {symbol}: {str(e)}")
+                try:
+                    self.release(symbol)
+                except Exception as e:
+                    self._app.logger.error(f"Error releasing analysis job lock for {symbol}: {str(e)}")
+
+    def status(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Status of the latest job of ``symbol``, with its position in the
+        queue and elapsed time; None when no job is known. A finished job
+        of this process gives way to a newer one of another process (read
+        from the cache, so this must be called in an app context).
+        """
+        from .cache import cache
+
+        symbol = symbol.upper()
+        with self._available:
+            job = self._jobs.get(symbol)
+            job = dict(job) if job is not None else None
+            if job is not None and job['status'] == 'queued':
+                ahead = sorted((j['priority'], j['enqueued_at']) for j in self._jobs.values()
+                               if j['status'] == 'queued')
+                job['position'] = ahead.index((job['priority'], job['enqueued_at'])) + 1
+        # An active local job holds the symbol's lock, so no other process has a newer one
+        if job is None or job['status'] not in ACTIVE:
+            shared = cache.get(self._key(symbol))
+            if isinstance(shared, dict) and (job is None or shared['enqueued_at'] > job['enqueued_at']):
+                job = shared
+            if job is None:
+                return None
+        now = time.time()
+        job['waited_s'] = round((job['started_at'] or now) - job['enqueued_at'], 1)
+        if job['started_at']:
+            job['elapsed_s'] = round((job['finished_at'] or now) - job['started_at'], 1)
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        with self._available:
+            counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+            counts['workers'] = len(self._threads)
+            return counts
+
+
+# Singleton instance
+analysis_jobs = AnalysisJobQueue()
@@ -0,0 +1,139 @@
+import asyncio
+import inspect
+from typing import Any, Dict, Optional
+
+from flask import request
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from src.services.http_client import http_client
+from .agent_loop import agent_loop
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+async def _until_disconnect(receive) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def _environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    builder = EnvironBuilder(
+        path=scope['path'],
+        base_url=f"{scope.get('scheme', 'http')}://{server[0]}:{server[1]}",
+        method=scope['method'],
+        query_string=scope.get('query_string', b'').decode('latin1'),
+        headers=[(name.decode('latin1'), value.decode('latin1')) for name, value in scope.get('headers', [])],
+        data=body,
+        environ_overrides={'REMOTE_ADDR': client[0]},
+    )
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+
+def _encode(chunk) -> bytes:
+    return chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+
+class AsgiApp:
+    """
+    Serves the Flask app's async views (the chat and RAG endpoints) natively
+    on the ASGI server's event loop, so a request waiting on the agents
+    holds no thread. Their response bodies are sent as they are; bodies with
+    ``__aiter__`` (agent event streams) are iterated on the loop until the
+    client disconnects. Every other request goes to ``wsgi``, the Flask app
+    behind a WSGI adapter.
+    """
+
+    def __init__(self, flask_app, wsgi):
+        self.flask_app = flask_app
+        self.wsgi = wsgi
+        self.urls = flask_app.url_map.bind('localhost')
+
+    def async_view(self, scope: Dict[str, Any]) -> Optional[str]:
+        """Endpoint of the async view handling an HTTP request, if any"""
+        if scope['type'] != 'http':
+            return None
+        try:
+            endpoint, _ = self.urls.match(scope['path'], method=scope['method'])
+        except HTTPException:
+            return None
+        return endpoint if inspect.iscoroutinefunction(self.flask_app.view_functions.get(endpoint)) else None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        agent_loop.attach(asyncio.get_running_loop())
+        if self.async_view(scope) is None:
+            return await self.wsgi(scope, receive, send)
+        await self.dispatch(scope, receive, send)
+
+    async def dispatch(self, scope, receive, send) -> None:
+        app = self.flask_app
+        environ = _environ(scope, await _read_body(receive))
+        with app.request_context(environ):
+            try:
+                rv = await app.view_functions[request.url_rule.endpoint](**request.view_args)
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+            response = app.process_response(app.make_response(rv))
+            try:
+                await send({
+                    'type': 'http.response.start',
+                    'status': response.status_code,
+                    'headers': [(name.lower().encode('latin1'), value.encode('latin1'))
+                                for name, value in response.headers.to_wsgi_list()],
+                })
+                if hasattr(response.response, '__aiter__'):
+                    await self.stream(response.response, receive, send)
+                else:
+                    await send({'type': 'http.response.body', 'body': response.get_data()})
+            finally:
+                response.close()
+
+    @staticmethod
+    async def stream(body, receive, send) -> None:
+        """Send an async body chunk by chunk, stopping it if the client goes away"""
+        chunks = body.__aiter__()
+
+        async def forward():
+            try:
+                async for chunk in chunks:
+                    await send({'type': 'http.response.body', 'body': _encode(chunk), 'more_body': True})
+                await send({'type': 'http.response.body', 'body': b''})
+            finally:
+                await chunks.aclose()
+
+        streaming = asyncio.ensure_future(forward())
+        disconnected = asyncio.ensure_future(_until_disconnect(receive))
+        try:
+            await asyncio.wait([streaming, disconnected], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (streaming, disconnected):
+                task.cancel()
+            await asyncio.wait([streaming, disconnected])
+
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                agent_loop.attach(asyncio.get_running_loop())
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await http_client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
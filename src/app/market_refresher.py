@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.services.http_client import http_client
+
+OVERVIEW_PARTS = ('indices', 'market_status', 'crypto', 'sentiment', 'movers')
+
+
+class MarketDataRefresher:
+    """
+    Background refresh of the dashboard's market data into a shared snapshot.
+
+    Every part (indices, market status, crypto, VIX sentiment, movers,
+    watchlist, news) is re-fetched on its own interval by a scheduler thread
+    and stored in the app cache, so the dashboard route only reads memory
+    and never waits on yfinance or NewsAPI. Refreshes are deduplicated across
+    worker processes with a per-part cache lock that lives for one interval.
+    Every refresh also stamps a single ``market_snapshot:updated`` key, and
+    every process polls only that key, reading the parts again when it
+    changed, to pick up the others' results.
+    """
+
+    def __init__(self, poll_interval: float = 1.0, max_workers: int = 4):
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self._app = None
+        self._service = None
+        self._jobs: Dict[str, Tuple[Callable[[], Any], int]] = {}
+        self._parts: Dict[str, Dict[str, Any]] = {}
+        self._next_run: Dict[str, float] = {}
+        self._in_flight = set()
+        self._in_flight_lock = threading.Lock()
+        self._synced = None
+        self._changed = threading.Condition()
+        self._thread = None
+        self._stop = threading.Event()
+        self._executor = None
+
+    def start(self, app, service) -> None:
+        """Start the scheduler thread (once per process)"""
+        if self._thread is not None:
+            return
+        self._app = app
+        self._service = service
+        quotes = app.config['MARKET_REFRESH_QUOTES']
+        tasks = service.overview_tasks()
+        self._jobs = {
+            'indices': (tasks['indices'], quotes),
+            'market_status': (tasks['market_status'], quotes),
+            'crypto': (tasks['crypto'], quotes),
+            'sentiment': (tasks['sentiment'], app.config['MARKET_REFRESH_SENTIMENT']),
+            'movers': (tasks['movers'], quotes),
+            'watchlist': (service.get_watchlist_data, quotes),
+            'news': (lambda: service.get_market_news(query='stocks', page_size=6), app.config['MARKET_REFRESH_NEWS']),
+        }
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='market-refresh')
+        self._thread = threading.Thread(target=self._run, name='market-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.time()
+            for name, (_, interval) in self._jobs.items():
+                with self._in_flight_lock:
+                    if name in self._in_flight or now < self._next_run.get(name, 0):
+                        continue
+                    self._next_run[name] = now + interval
+                    self._in_flight.add(name)
+                self._executor.submit(self._refresh, name)
+            try:
+                self._sync()
+            except Exception as e:
+                print(f"Error reading market snapshot: {str(e)}")
+            self._stop.wait(self.poll_interval)
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return f'market_snapshot:{name}'
+
+    def _refresh(self, name: str) -> None:
+        """Fetch one part, unless another process already did within its interval"""
+        from .cache import cache
+
+        fetch, interval = self._jobs[name]
+        try:
+            with self._app.app_context():
+                if not cache.add(f'{self._key(name)}:lock', os.getpid(), timeout=interval):
+                    return
+                started = time.perf_counter()
+                with http_client.background():
+                    data = fetch()
+                entry = {
+                    'data': data,
+                    'updated_at': time.time(),
+                    'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+                }
+                # Kept without expiry: old data beats an empty dashboard
+                cache.set(self._key(name), entry, timeout=0)
+                cache.set(self._key('updated'), entry['updated_at'], timeout=0)
+            self._publish({name: entry})
+        except Exception as e:
+            print(f"Error refreshing {name}: {str(e)}")
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.discard(name)
+
+    def _sync(self) -> None:
+        """Pick up parts refreshed by other processes, once the update stamp changed"""
+        from .cache import cache
+
+        with self._app.app_context():
+            # Compared for equality: stamps of concurrent refreshes can land out of order
+            updated = cache.get(self._key('updated'))
+            if updated is None or updated == self._synced:
+                return
+            entries = cache.get_many(*[self._key(name) for name in self._jobs])
+        self._synced = updated
+        self._publish({name: entry for name, entry in zip(self._jobs, entries) if entry})
+
+    def _publish(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        with self._changed:
+            changed = False
+            for name, entry in entries.items():
+                current = self._parts.get(name)
+                if current is None or entry['updated_at'] > current['updated_at']:
+                    self._parts[name] = entry
+                    changed = True
+            if changed:
+                self._changed.notify_all()
+
+    def part_names(self) -> List[str]:
+        return list(self._jobs)
+
+    def snapshot(self, wait: float = 0) -> Dict[str, Dict[str, Any]]:
+        """
+        Current entry of every loaded part. With ``wait``, block up to that
+        many seconds while parts are still missing (first requests after
+        startup).
+        """
+        deadline = time.time() + wait
+        with self._changed:
+            while self._jobs and len(self._parts) < len(self._jobs) and time.time() < deadline:
+                self._changed.wait(deadline - time.time())
+            return dict(self._parts)
+
+    def dashboard_data(self, wait: float = 0) -> Tuple[List[Dict], Dict[str, Any], List[Dict]]:
+        """``(watchlist, market_overview, recent_news)`` for the dashboard, from the snapshot"""
+        parts = self.snapshot(wait)
+
+        market_overview = {}
+        if all(name in parts for name in OVERVIEW_PARTS):
+            results = {name: parts[name]['data'] for name in OVERVIEW_PARTS}
+            timings = {name: parts[name]['duration_ms'] for name in OVERVIEW_PARTS}
+            market_overview = self._service.assemble_overview(results, timings)
+            oldest = min(parts[name]['updated_at'] for name in OVERVIEW_PARTS)
+            market_overview['last_updated'] = datetime.fromtimestamp(oldest).strftime('%Y-%m-%d %H:%M:%S')
+
+        watchlist = parts['watchlist']['data'] if 'watchlist' in parts else []
+        recent_news = parts['news']['data'] if 'news' in parts else []
+        return watchlist, market_overview, recent_news
+
+    def status(self) -> Dict[str, Optional[float]]:
+        """Age in seconds of every part, None when not loaded yet"""
+        now = time.time()
+        parts = dict(self._parts)
+        return {name: round(now - parts[name]['updated_at'], 1) if name in parts else None for name in self._jobs}
+
+
+# Singleton instance
+market_refresher = MarketDataRefresher()
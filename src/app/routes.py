@@ -1,11 +1,24 @@
-from flask import Blueprint, render_template, jsonify, request, current_app
-from datetime import datetime, timedelta
+from flask import Blueprint, Response, abort, render_template, jsonify, request, current_app
+from datetime import datetime, timedelta, timezone
+import hashlib
 import random
 import json
+import re
 import time
 from functools import wraps
 from flask_caching import Cache
-from src.agent.supervisor import invoke_supervisor, prepare_human_message, query_supervisor
+import orjson
+from src.agent.instrumentation import instrument, metrics
+from src.agent.prefetch import invoke_prefetch_analysis
+from src.agent.supervisor import (
+    ainvoke_supervisor, aquery_supervisor, astream_supervisor, invoke_analysis_graph, invoke_supervisor,
+    prepare_human_message
+)
+from src.agent.rag_agent import rag_agent
+from .agent_loop import agent_loop
+from .analysis_jobs import PRIORITY_REFRESH, QueueFull, analysis_jobs, analysis_state
+from .market_refresher import market_refresher
+from .stock_quotes import stock_quotes
 
 
 import os
@@ -15,46 +28,201 @@ from pathlib import Path
 env_path = Path(__file__).parent.parent.parent / '.env'
 load_dotenv(dotenv_path=env_path, override=True)
 
-import sys
-sys.path.append(str(Path(__file__).parent.parent))
-from services.stock_service import stock_service
+from src.services.http_client import http_client
+from src.services.news_cache import news_cache
+from src.services.stock_record import STOCK_FIELDS, StockRecord, json_default
+from src.services.stock_service import stock_service
 
 main = Blueprint('main', __name__)
 
+# Ticker symbols as yfinance spells them: BRK-B, ^GSPC, BTC-USD, EURUSD=X
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9.^=-]{1,15}$')
+
 def init_app(app):
     """Initialize the application"""
     return app
 
 # Extended mock data for demonstration
 mock_stock_data = {
+    'AAPL': StockRecord(
+        symbol='AAPL',
+        name='Apple Inc.',
+        exchange='NASDAQ',
+        industry='Consumer Electronics',
+        sector='Technology',
+        ceo='Tim Cook',
+        employees=164000,
+        city='Cupertino',
+        country='United States',
+        founded=1976,
+        website='https://www.apple.com',
+        description='Apple Inc. designs, manufactures, and markets smartphones, personal computers, tablets, wearables, and accessories worldwide. The company offers iPhone, a line of smartphones; Mac, a line of personal computers; iPad, a line of multi-purpose tablets; and wearables, home, and accessories comprising AirPods, Apple TV, Apple Watch, Beats products, and HomePod.',
+        price=187.68,
+        change=2.35,
+        change_percent=1.27,
+        market_cap=2945.23,
+        pe_ratio=32.15,
+        eps=5.84,
+        dividend_yield=0.52,
+        week52_high=198.23,
+        week52_low=124.17,
+        avg_volume=57892345,
+        shares_outstanding=15680000000,
+        revenue_ttm=394328000000,
+        gross_profit=169559000000,
+        profit_margin=0.2534,
+        return_on_equity=1.46
+    ),
+    'MSFT': StockRecord(
+        symbol='MSFT',
+        name='Microsoft Corporation',
+        exchange='NASDAQ',
+        industry='Software—Infrastructure',
+        sector='Technology',
+        ceo='Satya Nadella',
+        employees=221000,
+        city='Redmond',
+        country='United States',
+        founded=1975,
+        website='https://www.microsoft.com',
+        description='Microsoft Corporation develops, licenses, and supports software, services, devices, and solutions worldwide. The company operates in three segments: Productivity and Business Processes, Intelligent Cloud, and More Personal Computing.',
+        price=425.52,
+        change=-1.24,
+        change_percent=-0.29,
+        market_cap=3162.45,
+        pe_ratio=36.78,
+        eps=11.57,
+        dividend_yield=0.71,
+        week52_high=440.82,
+        week52_low=275.37,
+        avg_volume=25678923,
+        shares_outstanding=7434000000,
+        revenue_ttm=218310000000,
+        gross_profit=135620000000,
+        profit_margin=0.3642,
+        return_on_equity=0.39
+    ),
+    'GOOGL': StockRecord(
+        symbol='GOOGL',
+        name='Alphabet Inc.',
+        exchange='NASDAQ',
+        industry='Internet Content & Information',
+        sector='Communication Services',
+        ceo='Sundar Pichai',
+        employees=190234,
+        city='Mountain View',
+        country='United States',
+        founded=1998,
+        website='https://abc.xyz',
+        description='Alphabet Inc. provides online advertising services in the United States, Europe, the Middle East, Africa, the Asia-Pacific, Canada, and Latin America. The company offers performance and brand advertising services. It operates through Google Services, Google Cloud, and Other Bets segments.',
+        price=175.22,
+        change=0.87,
+        change_percent=0.50,
+        market_cap=2215.67,
+        pe_ratio=28.93,
+        eps=6.05,
+        dividend_yield=0.00,
+        week52_high=182.94,
+        week52_low=101.86,
+        avg_volume=32789123,
+        shares_outstanding=12650000000,
+        revenue_ttm=307394000000,
+        gross_profit=174142000000,
+        profit_margin=0.2134,
+        return_on_equity=0.28
+    ),
+    'AMZN': StockRecord(
+        symbol='AMZN',
+        name='Amazon.com, Inc.',
+        exchange='NASDAQ',
+        industry='Internet Retail',
+        sector='Consumer Cyclical',
+        ceo='Andrew Jassy',
+        employees=1608000,
+        city='Seattle',
+        country='United States',
+        founded=1994,
+        website='https://www.amazon.com',
+        description='Amazon.com, Inc. engages in the retail sale of consumer products and subscriptions in North America and internationally. The company operates through three segments: North America, International, and Amazon Web Services (AWS).',
+        price=185.19,
+        change=1.23,
+        change_percent=0.67,
+        market_cap=1925.34,
+        pe_ratio=62.45,
+        eps=2.96,
+        dividend_yield=0.00,
+        week52_high=189.77,
+        week52_low=101.15,
+        avg_volume=45678912,
+        shares_outstanding=10400000000,
+        revenue_ttm=574785000000,
+        gross_profit=225152000000,
+        profit_margin=0.0276,
+        return_on_equity=0.15
+    ),
+    'TSLA': StockRecord(
+        symbol='TSLA',
+        name='Tesla, Inc.',
+        exchange='NASDAQ',
+        industry='Auto Manufacturers',
+        sector='Consumer Cyclical',
+        ceo='Elon Musk',
+        employees=127855,
+        city='Austin',
+        country='United States',
+        founded=2003,
+        website='https://www.tesla.com',
+        description='Tesla, Inc. designs, develops, manufactures, leases, and sells electric vehicles, and energy generation and storage systems in the United States, China, and internationally. The company operates in two segments, Automotive, and Energy Generation and Storage.',
+        price=252.64,
+        change=-3.21,
+        change_percent=-1.25,
+        market_cap=802.45,
+        pe_ratio=68.92,
+        eps=3.66,
+        dividend_yield=0.00,
+        week52_high=313.80,
+        week52_low=138.80,
+        avg_volume=98765432,
+        shares_outstanding=3175000000,
+        revenue_ttm=98650000000,
+        gross_profit=20890000000,
+        profit_margin=0.1032,
+        return_on_equity=0.29
+    ),
+    'NVDA': StockRecord(
+        symbol='NVDA',
+        name='NVIDIA Corporation',
+        exchange='NASDAQ',
+        industry='Semiconductors',
+        sector='Technology',
+        ceo='Jensen Huang',
+        employees=26400,
+        city='Santa Clara',
+        country='United States',
+        founded=1993,
+        website='https://www.nvidia.com',
+        description='NVIDIA Corporation provides graphics, and compute and networking solutions in the United States, Taiwan, China, and internationally. The company operates through Graphics, Compute & Networking segments.',
+        price=950.02,
+        change=25.45,
+        change_percent=2.75,
+        market_cap=2345.67,
+        pe_ratio=76.45,
+        eps=12.43,
+        dividend_yield=0.02,
+        week52_high=974.00,
+        week52_low=222.97,
+        avg_volume=45678901,
+        shares_outstanding=2468000000,
+        revenue_ttm=60922000000,
+        gross_profit=44351000000,
+        profit_margin=0.4876,
+        return_on_equity=0.88
+    )
+}
+
+# Analyst ratings of the mock stocks (not stock record fields)
+mock_analyst_data = {
     'AAPL': {
-        'symbol': 'AAPL',
-        'name': 'Apple Inc.',
-        'exchange': 'NASDAQ',
-        'industry': 'Consumer Electronics',
-        'sector': 'Technology',
-        'ceo': 'Tim Cook',
-        'employees': 164000,
-        'city': 'Cupertino',
-        'country': 'United States',
-        'founded': 1976,
-        'website': 'https://www.apple.com',
-        'description': 'Apple Inc. designs, manufactures, and markets smartphones, personal computers, tablets, wearables, and accessories worldwide. The company offers iPhone, a line of smartphones; Mac, a line of personal computers; iPad, a line of multi-purpose tablets; and wearables, home, and accessories comprising AirPods, Apple TV, Apple Watch, Beats products, and HomePod.',
-        'price': 187.68,
-        'change': 2.35,
-        'change_percent': 1.27,
-        'market_cap': 2945.23,
-        'pe_ratio': 32.15,
-        'eps': 5.84,
-        'dividend_yield': 0.52,
-        'week52_high': 198.23,
-        'week52_low': 124.17,
-        'avg_volume': 57892345,
-        'shares_outstanding': 15680000000,
-        'revenue_ttm': 394328000000,
-        'gross_profit': 169559000000,
-        'profit_margin': 0.2534,
-        'return_on_equity': 1.46,
         'analyst_ratings': {
             'strong_buy': 15,
             'buy': 22,
@@ -71,33 +239,6 @@ mock_stock_data = {
         }
     },
     'MSFT': {
-        'symbol': 'MSFT',
-        'name': 'Microsoft Corporation',
-        'exchange': 'NASDAQ',
-        'industry': 'Software—Infrastructure',
-        'sector': 'Technology',
-        'ceo': 'Satya Nadella',
-        'employees': 221000,
-        'city': 'Redmond',
-        'country': 'United States',
-        'founded': 1975,
-        'website': 'https://www.microsoft.com',
-        'description': 'Microsoft Corporation develops, licenses, and supports software, services, devices, and solutions worldwide. The company operates in three segments: Productivity and Business Processes, Intelligent Cloud, and More Personal Computing.',
-        'price': 425.52,
-        'change': -1.24,
-        'change_percent': -0.29,
-        'market_cap': 3162.45,
-        'pe_ratio': 36.78,
-        'eps': 11.57,
-        'dividend_yield': 0.71,
-        'week52_high': 440.82,
-        'week52_low': 275.37,
-        'avg_volume': 25678923,
-        'shares_outstanding': 7434000000,
-        'revenue_ttm': 218310000000,
-        'gross_profit': 135620000000,
-        'profit_margin': 0.3642,
-        'return_on_equity': 0.39,
         'analyst_ratings': {
             'strong_buy': 32,
             'buy': 18,
@@ -114,33 +255,6 @@ mock_stock_data = {
         }
     },
     'GOOGL': {
-        'symbol': 'GOOGL',
-        'name': 'Alphabet Inc.',
-        'exchange': 'NASDAQ',
-        'industry': 'Internet Content & Information',
-        'sector': 'Communication Services',
-        'ceo': 'Sundar Pichai',
-        'employees': 190234,
-        'city': 'Mountain View',
-        'country': 'United States',
-        'founded': 1998,
-        'website': 'https://abc.xyz',
-        'description': 'Alphabet Inc. provides online advertising services in the United States, Europe, the Middle East, Africa, the Asia-Pacific, Canada, and Latin America. The company offers performance and brand advertising services. It operates through Google Services, Google Cloud, and Other Bets segments.',
-        'price': 175.22,
-        'change': 0.87,
-        'change_percent': 0.50,
-        'market_cap': 2215.67,
-        'pe_ratio': 28.93,
-        'eps': 6.05,
-        'dividend_yield': 0.00,
-        'week52_high': 182.94,
-        'week52_low': 101.86,
-        'avg_volume': 32789123,
-        'shares_outstanding': 12650000000,
-        'revenue_ttm': 307394000000,
-        'gross_profit': 174142000000,
-        'profit_margin': 0.2134,
-        'return_on_equity': 0.28,
         'analyst_ratings': {
             'strong_buy': 28,
             'buy': 24,
@@ -157,33 +271,6 @@ mock_stock_data = {
         }
     },
     'AMZN': {
-        'symbol': 'AMZN',
-        'name': 'Amazon.com, Inc.',
-        'exchange': 'NASDAQ',
-        'industry': 'Internet Retail',
-        'sector': 'Consumer Cyclical',
-        'ceo': 'Andrew Jassy',
-        'employees': 1608000,
-        'city': 'Seattle',
-        'country': 'United States',
-        'founded': 1994,
-        'website': 'https://www.amazon.com',
-        'description': 'Amazon.com, Inc. engages in the retail sale of consumer products and subscriptions in North America and internationally. The company operates through three segments: North America, International, and Amazon Web Services (AWS).',
-        'price': 185.19,
-        'change': 1.23,
-        'change_percent': 0.67,
-        'market_cap': 1925.34,
-        'pe_ratio': 62.45,
-        'eps': 2.96,
-        'dividend_yield': 0.00,
-        'week52_high': 189.77,
-        'week52_low': 101.15,
-        'avg_volume': 45678912,
-        'shares_outstanding': 10400000000,
-        'revenue_ttm': 574785000000,
-        'gross_profit': 225152000000,
-        'profit_margin': 0.0276,
-        'return_on_equity': 0.15,
         'analyst_ratings': {
             'strong_buy': 42,
             'buy': 18,
@@ -200,33 +287,6 @@ mock_stock_data = {
         }
     },
     'TSLA': {
-        'symbol': 'TSLA',
-        'name': 'Tesla, Inc.',
-        'exchange': 'NASDAQ',
-        'industry': 'Auto Manufacturers',
-        'sector': 'Consumer Cyclical',
-        'ceo': 'Elon Musk',
-        'employees': 127855,
-        'city': 'Austin',
-        'country': 'United States',
-        'founded': 2003,
-        'website': 'https://www.tesla.com',
-        'description': 'Tesla, Inc. designs, develops, manufactures, leases, and sells electric vehicles, and energy generation and storage systems in the United States, China, and internationally. The company operates in two segments, Automotive, and Energy Generation and Storage.',
-        'price': 252.64,
-        'change': -3.21,
-        'change_percent': -1.25,
-        'market_cap': 802.45,
-        'pe_ratio': 68.92,
-        'eps': 3.66,
-        'dividend_yield': 0.00,
-        'week52_high': 313.80,
-        'week52_low': 138.80,
-        'avg_volume': 98765432,
-        'shares_outstanding': 3175000000,
-        'revenue_ttm': 98650000000,
-        'gross_profit': 20890000000,
-        'profit_margin': 0.1032,
-        'return_on_equity': 0.29,
         'analyst_ratings': {
             'strong_buy': 12,
             'buy': 15,
@@ -243,33 +303,6 @@ mock_stock_data = {
         }
     },
     'NVDA': {
-        'symbol': 'NVDA',
-        'name': 'NVIDIA Corporation',
-        'exchange': 'NASDAQ',
-        'industry': 'Semiconductors',
-        'sector': 'Technology',
-        'ceo': 'Jensen Huang',
-        'employees': 26400,
-        'city': 'Santa Clara',
-        'country': 'United States',
-        'founded': 1993,
-        'website': 'https://www.nvidia.com',
-        'description': 'NVIDIA Corporation provides graphics, and compute and networking solutions in the United States, Taiwan, China, and internationally. The company operates through Graphics, Compute & Networking segments.',
-        'price': 950.02,
-        'change': 25.45,
-        'change_percent': 2.75,
-        'market_cap': 2345.67,
-        'pe_ratio': 76.45,
-        'eps': 12.43,
-        'dividend_yield': 0.02,
-        'week52_high': 974.00,
-        'week52_low': 222.97,
-        'avg_volume': 45678901,
-        'shares_outstanding': 2468000000,
-        'revenue_ttm': 60922000000,
-        'gross_profit': 44351000000,
-        'profit_margin': 0.4876,
-        'return_on_equity': 0.88,
         'analyst_ratings': {
             'strong_buy': 38,
             'buy': 22,
@@ -374,11 +407,10 @@ def get_mock_news(symbol):
 @main.route('/dashboard')
 def dashboard():
     try:
-        watchlist = stock_service.get_watchlist_data()
-        
-        market_overview = stock_service.get_market_overview()
-        
-        recent_news = stock_service.get_market_news(query='stocks', page_size=6)
+        # Refreshed in the background; the page never waits on market data APIs
+        watchlist, market_overview, recent_news = market_refresher.dashboard_data(
+            wait=current_app.config['MARKET_SNAPSHOT_WAIT']
+        )
         
         # TODO: Implement AI insights
         ai_insights = {
@@ -400,6 +432,7 @@ def dashboard():
             market_overview=market_overview,
             recent_news=recent_news,
             ai_insights=ai_insights,
+            poll_interval=current_app.config['DASHBOARD_POLL_INTERVAL'],
         )
         
     except Exception as e:
@@ -419,53 +452,108 @@ def dashboard():
             market_overview={},
             recent_news=recent_news,
             ai_insights={},
-            recent_activity=[]
+            recent_activity=[],
+            poll_interval=current_app.config['DASHBOARD_POLL_INTERVAL'],
         )
 
-def get_stock_analysis(symbol):
-    """Helper function to get stock analysis from supervisor agent with caching"""
+def _analysis_cache_key(symbol):
+    return f'stock_analysis_{symbol}'
+
+def _compute_stock_analysis(symbol):
+    """Run the supervisor for a symbol and cache the analysis with its generation time"""
     from .cache import cache
     
-    cache_key = f'stock_analysis_{symbol}'
-    
-    analysis = cache.get(cache_key)
-    if analysis is not None:
-        current_app.logger.info(f"Cache hit for {symbol}")
-        return analysis
-        
-    try:
-        current_app.logger.info(f"Cache miss for {symbol}, fetching from supervisor")
+    mode = current_app.config['ANALYSIS_MODE']
+    if mode == 'prefetch':
+        analysis = invoke_prefetch_analysis(symbol)
+    elif mode == 'parallel':
+        analysis = invoke_analysis_graph(symbol)
+    else:
         prompt = prepare_human_message(symbol)
         analysis = invoke_supervisor(prompt)
-        if not analysis:
-            raise ValueError(f"No analysis returned for {symbol}")
+    if not analysis:
+        raise ValueError(f"No analysis returned for {symbol}")
 
-        cache.set(cache_key, analysis, timeout=1800)
-        return analysis
-        
-    except Exception as e:
-        current_app.logger.error(f"Error in get_stock_analysis for {symbol}: {str(e)}")
+    entry = {'analysis': analysis, 'generated_at': time.time()}
+    cache.set(_analysis_cache_key(symbol), entry, timeout=current_app.config['ANALYSIS_HARD_TTL'])
+    return entry
+
+def _cached_analysis_entry(symbol):
+    from .cache import cache
+    
+    entry = cache.get(_analysis_cache_key(symbol))
+    if not isinstance(entry, dict) or 'generated_at' not in entry:
+        return None
+    return entry
+
+def _run_analysis_job(symbol):
+    """Analysis job run by the job queue's workers (in an app context)"""
+    # Another worker may have refreshed it while this job was queued
+    entry = _cached_analysis_entry(symbol)
+    if entry and time.time() - entry['generated_at'] < current_app.config['ANALYSIS_SOFT_TTL']:
+        return entry
+    current_app.logger.info(f"Running analysis job for {symbol}")
+    return _compute_stock_analysis(symbol)
+
+def _enqueue_analysis(symbol, priority=None):
+    """Queue an analysis job, returning its status (None when the queue is full)"""
+    try:
+        return analysis_jobs.submit(symbol, priority=priority)
+    except QueueFull as e:
+        current_app.logger.warning(f"Not queueing analysis for {symbol}: {str(e)}")
         return None
 
+def get_stock_analysis_entry(symbol):
+    """
+    Get the cached stock analysis entry for a symbol, along with its age.
+
+    An analysis older than ANALYSIS_SOFT_TTL is returned right away marked
+    as stale, and a background job refreshes it. When there is no entry at
+    all (it is past ANALYSIS_HARD_TTL), an analysis job is queued and None
+    returned.
+    """
+    entry = _cached_analysis_entry(symbol)
+    if entry is None:
+        current_app.logger.info(f"Cache miss for {symbol}, queueing analysis job")
+        _enqueue_analysis(symbol)
+        return None
+    
+    age = time.time() - entry['generated_at']
+    stale = age >= current_app.config['ANALYSIS_SOFT_TTL']
+    if not stale:
+        current_app.logger.info(f"Cache hit for {symbol}")
+    else:
+        current_app.logger.info(f"Stale cache hit for {symbol} ({int(age)}s old), refreshing in background")
+        _enqueue_analysis(symbol, priority=PRIORITY_REFRESH)
+    return dict(entry, age=age, stale=stale)
+
 @main.route('/stock/<symbol>')
 def stock_detail(symbol):
     symbol = symbol.upper()
+    # Any symbol would queue an analysis job, so only accept ticker-shaped ones
+    if not SYMBOL_PATTERN.match(symbol):
+        abort(404)
     stock = mock_stock_data.get(symbol)
     
     if not stock:
-        stock = mock_stock_data['AAPL'].copy()
-        stock['symbol'] = symbol
-        stock['name'] = f"{symbol} Company Inc."
-        stock['exchange'] = 'NASDAQ'
-        stock['industry'] = 'Technology'
-        stock['sector'] = 'Technology'
-        stock['ceo'] = 'John Smith'
-        stock['employees'] = 10000
-        stock['city'] = 'San Francisco'
-        stock['country'] = 'United States'
-        stock['founded'] = 2000
-    
-    analysis = get_stock_analysis(symbol)
+        stock = StockRecord(**dict(
+            mock_stock_data['AAPL'].to_dict(),
+            symbol=symbol,
+            name=f"{symbol} Company Inc.",
+            exchange='NASDAQ',
+            industry='Technology',
+            sector='Technology',
+            ceo='John Smith',
+            employees=10000,
+            city='San Francisco',
+            country='United States',
+            founded=2000,
+        ))
+    
+    # A missing analysis is queued and the page polls for it, instead of waiting here
+    analysis_entry = get_stock_analysis_entry(symbol)
+    analysis = analysis_entry['analysis'] if analysis_entry else None
+    analysis_job = analysis_jobs.status(symbol) if analysis_entry is None else None
     recent_news = get_mock_news(symbol)[:5]
     
     default_analysis = {
@@ -484,7 +572,6 @@ def stock_detail(symbol):
     }
     
     if analysis is None:
-        current_app.logger.warning(f"No analysis available for {symbol}, using defaults")
         analysis = default_analysis
     
     context = {
@@ -494,29 +581,144 @@ def stock_detail(symbol):
         'sentiment_events': analysis.get('sentiment_analysis', {}).get('news_sentiment', []),
         'company_overview': analysis.get('company_overview', default_analysis['company_overview']),
         'stock_recommendation': analysis.get('stock_recommendation', default_analysis['stock_recommendation']),
-        'risk_assessment': analysis.get('risk_assessment', default_analysis['risk_assessment'])
+        'risk_assessment': analysis.get('risk_assessment', default_analysis['risk_assessment']),
+        'analysis_generated_at': datetime.utcfromtimestamp(analysis_entry['generated_at']) if analysis_entry else None,
+        'analysis_stale': analysis_entry['stale'] if analysis_entry else False,
+        'analysis_pending': analysis_entry is None,
+        'analysis_job': analysis_job,
+        'analyst_consensus': mock_analyst_data.get(symbol, mock_analyst_data['AAPL'])['analyst_consensus']
     }
     
-    stock['website'] = '#'
-    stock['description'] = f"{symbol} is a leading technology company specializing in innovative solutions for the modern digital age."
-    
-    context['stock'] = stock
+    # A copy, so the shared mock records stay as they are
+    context['stock'] = StockRecord(**dict(
+        stock.to_dict(),
+        website='#',
+        description=f"{symbol} is a leading technology company specializing in innovative solutions for the modern digital age.",
+    ))
     
     return render_template('stock_detail.html', **context)
 
+@main.route('/api/analysis/<symbol>/status')
+def analysis_status(symbol):
+    """Progress of a symbol's analysis job, with the analysis once one is available"""
+    symbol = symbol.upper()
+    job = analysis_jobs.status(symbol)
+    entry = _cached_analysis_entry(symbol)
+    
+    payload = {'symbol': symbol, 'status': analysis_state(job, entry is not None), 'job': job}
+    if entry:
+        age = time.time() - entry['generated_at']
+        payload.update(
+            analysis=entry['analysis'],
+            generated_at=datetime.utcfromtimestamp(entry['generated_at']).isoformat(),
+            stale=age >= current_app.config['ANALYSIS_SOFT_TTL']
+        )
+    return jsonify(payload)
+
 @main.route('/api/stock/<symbol>')
 def stock_data(symbol):
-    symbol = symbol.upper()
-    stock = mock_stock_data.get(symbol, {})
-    return jsonify(stock)
+    """Data of one stock, with optional ?fields=price,change,... projection."""
+    return _stocks_response([symbol], single=True)
+
+@main.route('/api/stocks')
+def stocks_data():
+    """
+    Data of many stocks, ?symbols=AAPL,MSFT,... with optional ?fields=...
+    projection. Conditional requests (If-None-Match / If-Modified-Since)
+    get a 304 until one of the stocks' data changes.
+    """
+    symbols = _split_param(request.args.get('symbols'))
+    if not symbols:
+        return jsonify({'error': 'No symbols given'}), 400
+    
+    max_symbols = current_app.config['STOCKS_API_MAX_SYMBOLS']
+    if len(symbols) > max_symbols:
+        return jsonify({'error': f'At most {max_symbols} symbols per request'}), 400
+    
+    return _stocks_response(symbols)
+
+def _split_param(value):
+    return list(dict.fromkeys(item.strip() for item in (value or '').split(',') if item.strip()))
+
+def _stocks_response(symbols, single=False):
+    symbols = [symbol.upper() for symbol in symbols]
+    invalid = [symbol for symbol in symbols if not SYMBOL_PATTERN.match(symbol)]
+    if invalid:
+        return jsonify({'error': f"Invalid symbols: {', '.join(invalid)}"}), 400
+    
+    fields = _split_param(request.args.get('fields'))
+    unknown = [field for field in fields if field not in STOCK_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}", 'fields': list(STOCK_FIELDS)}), 400
+    if fields and 'symbol' not in fields:
+        fields.insert(0, 'symbol')
+    
+    try:
+        entries = stock_quotes.get(symbols)
+    except Exception as e:
+        current_app.logger.error(f"Error in stocks API: {str(e)}")
+        return jsonify({'error': 'An error occurred while fetching stock data'}), 500
+    
+    found = [symbol for symbol in symbols if entries[symbol]['data'] is not None]
+    if single and not found:
+        return jsonify({'error': f'No data for {symbols[0]}'}), 404
+    
+    # Validators come from the cached digests, so an unchanged response is
+    # answered without projecting or serializing anything
+    etag = hashlib.blake2b(
+        '|'.join([','.join(fields), str(single)] + [f"{symbol}:{entries[symbol]['digest']}" for symbol in symbols])
+        .encode(), digest_size=12
+    ).hexdigest()
+    last_modified = datetime.fromtimestamp(int(max(entry['updated_at'] for entry in entries.values())), timezone.utc)
+    
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+    
+    if not_modified:
+        response = Response(status=304)
+    else:
+        missing = [symbol for symbol in symbols if symbol not in found]
+        if fields:
+            stocks = [entries[symbol]['data'].to_dict(fields) for symbol in found]
+            body = orjson.dumps(stocks[0] if single else {'stocks': stocks, 'missing': missing})
+        elif single:
+            body = entries[symbols[0]]['json']
+        else:
+            # Full records are spliced in as they were serialized when fetched
+            body = b''.join([
+                b'{"stocks":[', b','.join(entries[symbol]['json'] for symbol in found),
+                b'],"missing":', orjson.dumps(missing), b'}'
+            ])
+        response = Response(body, mimetype='application/json')
+    
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
 
 @main.route('/health')
 def health_check():
-    return jsonify({
+    from .cache import cache
+    
+    health = {
         'status': 'healthy',
         'timestamp': datetime.utcnow().isoformat(),
         'version': '1.0.0'
-    })
+    }
+    
+    # Hit/miss/eviction counters when the cache backend keeps them
+    if hasattr(cache.cache, 'stats'):
+        health['cache'] = cache.cache.stats()
+    
+    health['rag'] = rag_agent.status()
+    health['market_data_age_s'] = market_refresher.status()
+    health['upstreams'] = http_client.status()
+    health['news_cache'] = news_cache.stats()
+    health['analysis_jobs'] = analysis_jobs.stats()
+    
+    return jsonify(health)
 
 @main.route('/ai-chat')
 def ai_chat():
@@ -524,7 +726,7 @@ def ai_chat():
     return render_template('ai_chat.html')
 
 @main.route('/api/chat', methods=['POST'])
-def chat_api():
+async def chat_api():
     """Handle chat messages and return AI responses."""
     try:
         data = request.get_json()
@@ -533,19 +735,23 @@ def chat_api():
         if not message:
             return jsonify({'error': 'Empty message'}), 400
 
-        response = invoke_supervisor(message)
+        with instrument('chat') as trace:
+            response = await ainvoke_supervisor(message)
 
-        return jsonify({
+        payload = {
             'response': response,
             'timestamp': datetime.utcnow().isoformat()
-        })
+        }
+        if _wants_trace(data):
+            payload['trace'] = trace.to_dict()
+        return jsonify(payload)
         
     except Exception as e:
         current_app.logger.error(f"Error in chat_api: {str(e)}")
         return jsonify({'error': 'An error occurred while processing your request'}), 500
 
 @main.route('/api/rag/query', methods=['POST'])
-def rag_query():
+async def rag_query():
     """Handle RAG-based queries and return responses."""
     try:
         data = request.get_json()
@@ -554,13 +760,136 @@ def rag_query():
         if not question:
             return jsonify({'error': 'Empty question'}), 400
         
-        response = query_supervisor(question)
-        print(response)
-        return jsonify({
+        agent = rag_agent.get()
+        if agent is None and rag_agent.state in ('not_started', 'warming_up'):
+            return _rag_warming_up_response()
+        
+        # Without a document corpus, fall back to the supervisor agents
+        with instrument('rag_query') as trace:
+            if agent is None:
+                response = await aquery_supervisor(question)
+            else:
+                response = (await agent.aquery(question))['messages'][-1].content
+        
+        payload = {
             'answer': response,
             'timestamp': datetime.utcnow().isoformat()
-        })
+        }
+        if _wants_trace(data):
+            payload['trace'] = trace.to_dict()
+        return jsonify(payload)
         
     except Exception as e:
         current_app.logger.error(f"Error in rag_query: {str(e)}")
-        return jsonify({'error': 'An error occurred while processing your RAG query'}), 500
\ No newline at end of file
+        return jsonify({'error': 'An error occurred while processing your RAG query'}), 500
+
+def _wants_trace(data):
+    """Per-request agent trace, asked for with ?trace=1 or "trace": true"""
+    return request.args.get('trace') in ('1', 'true') or bool(data.get('trace'))
+
+@main.route('/metrics')
+def metrics_endpoint():
+    """Aggregated agent, LLM and tool metrics in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def _rag_warming_up_response():
+    response = jsonify({
+        'error': 'The document index is still warming up. Please try again shortly.',
+        'status': 'warming_up'
+    })
+    response.headers['Retry-After'] = '10'
+    return response, 503
+
+class EventStream:
+    """
+    Server-Sent Events body for agent events (an async generator), starting
+    the stream right away. The ASGI entry point iterates it natively on the
+    server's loop; WSGI servers iterate it synchronously, each step running
+    on the agent loop.
+    """
+    
+    def __init__(self, events, logger):
+        self.events = events
+        self.logger = logger
+    
+    async def __aiter__(self):
+        yield _sse('start', {'timestamp': datetime.utcnow().isoformat()})
+        try:
+            async for event in self.events():
+                if event['event'] == 'done':
+                    event['data']['timestamp'] = datetime.utcnow().isoformat()
+                yield _sse(event['event'], event['data'])
+        except Exception as e:
+            self.logger.error(f"Error while streaming response: {str(e)}")
+            yield _sse('error', {'error': 'An error occurred while processing your request'})
+    
+    def __iter__(self):
+        return agent_loop.iterate(self.__aiter__())
+
+def _sse_response(events):
+    """Send agent events as Server-Sent Events"""
+    return Response(
+        EventStream(events, current_app.logger),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=json_default)}\n\n"
+
+@main.route('/api/dashboard')
+def dashboard_updates():
+    """
+    Latest background-refreshed dashboard data, ?parts=indices,watchlist,...
+    Polled by the dashboard page; conditional requests (If-None-Match) get a
+    304 until one of the parts is refreshed.
+    """
+    parts = market_refresher.snapshot()
+    names = _split_param(request.args.get('parts')) or list(parts)
+    unknown = [name for name in names if name not in market_refresher.part_names()]
+    if unknown:
+        return jsonify({'error': f"Unknown parts: {', '.join(unknown)}"}), 400
+    
+    loaded = [name for name in names if name in parts]
+    etag = hashlib.blake2b(
+        '|'.join(f"{name}:{parts[name]['updated_at']}" for name in loaded).encode(), digest_size=12
+    ).hexdigest()
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = {name: {'data': parts[name]['data'], 'updated_at': parts[name]['updated_at']} for name in loaded}
+        response = Response(json.dumps(body, default=json_default), mimetype='application/json')
+    
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+@main.route('/api/chat/stream', methods=['POST'])
+async def chat_stream_api():
+    """Stream the supervisor's handoffs, tool calls and answer tokens as Server-Sent Events."""
+    data = request.get_json() or {}
+    message = data.get('message', '').strip()
+    
+    if not message:
+        return jsonify({'error': 'Empty message'}), 400
+    
+    return _sse_response(lambda: astream_supervisor(message))
+
+@main.route('/api/rag/query/stream', methods=['POST'])
+async def rag_query_stream():
+    """Stream a RAG answer as Server-Sent Events."""
+    data = request.get_json() or {}
+    question = data.get('question', '').strip()
+    
+    if not question:
+        return jsonify({'error': 'Empty question'}), 400
+    
+    agent = rag_agent.get()
+    if agent is None and rag_agent.state in ('not_started', 'warming_up'):
+        return _rag_warming_up_response()
+    
+    # Without a document corpus, fall back to the supervisor agents
+    if agent is None:
+        return _sse_response(lambda: astream_supervisor(question))
+    return _sse_response(lambda: agent.astream(question))
@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+class _Call:
+    """An in-flight computation that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent computations of the same cache key.
+
+    Within a process, the first caller for a key runs ``fn`` and every other
+    thread asking for the same key meanwhile waits for it and gets the same
+    result (or exception). When the cache backend is shared between
+    processes (``backend.shared``), the leader also takes a short-lived lock
+    entry in the cache, and leaders in other workers poll the cache for the
+    value instead of starting their own computation.
+
+    ``fn`` is expected to store its result in the cache under ``key``, so
+    waiters in other processes can pick it up from there.
+    """
+
+    def __init__(self, lock_timeout: int = 300, poll_interval: float = 0.5):
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any], cache=None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn, cache)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _run(self, key: str, fn: Callable[[], Any], cache) -> Any:
+        if cache is None or not getattr(cache.cache, 'shared', False):
+            return fn()
+
+        lock_key = f'{key}:inflight'
+        deadline = time.time() + self.lock_timeout
+        while True:
+            if cache.add(lock_key, os.getpid(), timeout=self.lock_timeout):
+                try:
+                    # Another worker may have finished between our miss and the lock
+                    value = self._cached(cache, key)
+                    return value if value is not None else fn()
+                finally:
+                    cache.delete(lock_key)
+
+            value = self._cached(cache, key)
+            if value is not None:
+                return value
+            if time.time() >= deadline:
+                return fn()
+            time.sleep(self.poll_interval)
+
+    @staticmethod
+    def _cached(cache, key: str) -> Any:
+        return cache.get(key) if cache.has(key) else None
+
+
+# Singleton instance
+single_flight = SingleFlight()
@@ -0,0 +1,287 @@
+import math
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import orjson
+from flask_caching.backends.base import BaseCache
+
+# Leading tag byte of a stored value, telling how the rest was serialized
+_JSON = b'j'
+_PICKLE = b'p'
+
+# Pending access times flushed outside a write once there are this many
+_MAX_PENDING_ACCESSES = 1024
+
+
+def _is_plain_json(value: Any, depth: int = 0) -> bool:
+    """Whether orjson round-trips ``value`` exactly (no tuples, datetimes, subclasses, ...)"""
+    kind = type(value)
+    if value is None or kind is str or kind is bool:
+        return True
+    if kind is int:
+        return -2 ** 63 <= value < 2 ** 64
+    if kind is float:
+        return math.isfinite(value)
+    # orjson refuses to nest deeper than 254 levels
+    if depth > 200:
+        return False
+    if kind is list:
+        return all(_is_plain_json(item, depth + 1) for item in value)
+    if kind is dict:
+        return all(type(key) is str and _is_plain_json(item, depth + 1) for key, item in value.items())
+    return False
+
+
+class SQLiteCache(BaseCache):
+    """
+    Flask-Caching backend backed by a single SQLite file.
+
+    Unlike ``SimpleCache`` the entries live on local disk, so every worker
+    process of a gunicorn deployment shares them without running an outside
+    service. Plain JSON values (the analyses, quote payloads) are stored as
+    compact orjson and everything else is pickled, so values come back
+    exactly as they were set.
+
+    Reads are plain SELECTs and never take SQLite's write lock. The access
+    times used for LRU eviction are collected in memory and written with
+    the next write. Entry count and payload size are kept up to date by
+    triggers, so a write only evicts (expired rows first, then the least
+    recently used ones) once the table is over ``threshold`` entries or
+    ``max_bytes`` of payload. Hit/miss/eviction counters are per process.
+    """
+
+    #: Entries are visible to every process pointing at the same file
+    shared = True
+
+    def __init__(
+        self,
+        path: str,
+        default_timeout: int = 300,
+        threshold: int = 500,
+        max_bytes: int = 64 * 1024 * 1024,
+        ignore_errors: bool = False,
+    ):
+        super().__init__(default_timeout)
+        self.path = path
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.ignore_errors = ignore_errors
+        self._local = threading.local()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._accessed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL, "
+                "accessed REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'totals'").fetchone() is None:
+                conn.execute("CREATE TABLE totals (entries INTEGER NOT NULL, bytes INTEGER NOT NULL)")
+                conn.execute("INSERT INTO totals SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache")
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN "
+                "UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache BEGIN "
+                "UPDATE totals SET bytes = bytes + NEW.size - OLD.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN "
+                "UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size; END"
+            )
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        args.insert(0, os.path.join(config['CACHE_DIR'], 'investiq_cache.sqlite3'))
+        kwargs.update(
+            dict(
+                threshold=config['CACHE_THRESHOLD'],
+                max_bytes=config.get('CACHE_MAX_BYTES', 64 * 1024 * 1024),
+                ignore_errors=config['CACHE_IGNORE_ERRORS'],
+            )
+        )
+        return cls(*args, **kwargs)
+
+    # Connection handling
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, re-opened after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    # Serialization
+
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        if _is_plain_json(value):
+            return _JSON + orjson.dumps(value)
+        return _PICKLE + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _loads(data: bytes) -> Any:
+        tag, payload = data[:1], data[1:]
+        if tag == _JSON:
+            return orjson.loads(payload)
+        return pickle.loads(payload)
+
+    def _expiry(self, timeout: Optional[int]) -> float:
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout != 0 else 0
+
+    def _count(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += delta
+
+    # Cache API
+
+    def get(self, key: str) -> Any:
+        try:
+            now = time.time()
+            row = self._connection().execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] and row[1] <= now):
+                self._count('misses')
+                return None
+            self._count('hits')
+            self._touch(key, now)
+            return self._loads(row[0])
+        except Exception as e:
+            if not self.ignore_errors:
+                raise
+            print(f"Error reading cache key {key}: {str(e)}")
+            return None
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        return self._write(key, value, timeout, replace=True)
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        return self._write(key, value, timeout, replace=False)
+
+    def _write(self, key: str, value: Any, timeout: Optional[int], replace: bool) -> bool:
+        data = self._dumps(value)
+        now = time.time()
+        try:
+            with self._transaction() as conn:
+                self._flush_accesses(conn)
+                if not replace:
+                    conn.execute("DELETE FROM cache WHERE key = ? AND expires > 0 AND expires <= ?", (key, now))
+                values = (key, data, self._expiry(timeout), now, len(data))
+                if replace:
+                    cursor = conn.execute(
+                        "INSERT INTO cache (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires, "
+                        "accessed = excluded.accessed, size = excluded.size",
+                        values,
+                    )
+                else:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO cache (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                        values,
+                    )
+                written = cursor.rowcount == 1
+                if written:
+                    self._prune(conn, now)
+            return written
+        except Exception as e:
+            if not self.ignore_errors:
+                raise
+            print(f"Error writing cache key {key}: {str(e)}")
+            return False
+
+    def delete(self, key: str) -> bool:
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount == 1
+
+    def has(self, key: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM cache WHERE key = ? AND (expires = 0 OR expires > ?)", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def clear(self) -> bool:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache")
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """This process's hit/miss/eviction counters plus the current entry count and payload size"""
+        with self._lock:
+            stats = dict(self._counters)
+        entries, size = self._connection().execute("SELECT entries, bytes FROM totals").fetchone()
+        stats.update({'entries': entries, 'bytes': size})
+        return stats
+
+    # Housekeeping
+
+    def _touch(self, key: str, now: float) -> None:
+        """Remember a read for LRU eviction; written with the next write, or in a batch"""
+        with self._lock:
+            self._accessed[key] = now
+            if len(self._accessed) < _MAX_PENDING_ACCESSES:
+                return
+        with self._transaction() as conn:
+            self._flush_accesses(conn)
+
+    def _flush_accesses(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        if accessed:
+            conn.executemany(
+                "UPDATE cache SET accessed = ? WHERE key = ? AND accessed < ?",
+                [(when, key, when) for key, when in accessed.items()],
+            )
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        """While over the size bounds, drop expired rows, then least recently used ones"""
+        if not self._over_bounds(conn):
+            return
+        conn.execute("DELETE FROM cache WHERE expires > 0 AND expires <= ?", (now,))
+
+        evicted = 0
+        while self._over_bounds(conn):
+            keys = conn.execute("SELECT key FROM cache ORDER BY accessed ASC LIMIT 32").fetchall()
+            if not keys:
+                break
+            for (key,) in keys:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                evicted += 1
+                if not self._over_bounds(conn):
+                    break
+        self._count('evictions', evicted)
+
+    def _over_bounds(self, conn: sqlite3.Connection) -> bool:
+        entries, size = conn.execute("SELECT entries, bytes FROM totals").fetchone()
+        return entries > self.threshold or size > self.max_bytes
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT`` around a block, rolled back on error"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
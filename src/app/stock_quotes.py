@@ -0,0 +1,98 @@
+import hashlib
+import time
+from typing import Any, Dict, Iterable, List
+
+
+def digest(serialized: bytes) -> str:
+    """Short content hash of serialized data"""
+    return hashlib.blake2b(serialized, digest_size=8).hexdigest()
+
+
+class StockQuotes:
+    """
+    Cached stock data behind the quote API.
+
+    Every symbol's data is kept in the app cache (shared by the worker
+    processes) for ``ttl`` seconds; the symbols of a request that miss are
+    fetched together, with one batched quote download that concurrent
+    requests for the same symbols share (in and across processes). Symbols
+    without data are cached as well, so polling for them doesn't hit
+    yfinance either.
+
+    Entries carry their data serialized once, when it is fetched, with a
+    digest of it, the fetch time (``checked_at``) and the time the data last
+    changed (``updated_at``). That is all the API needs: full records are
+    spliced into responses as they are, and an unchanged response is
+    recognised from the digests without being built. Entries stay cached for
+    ``KEEP_TTLS`` times the ttl, so a refetch that finds the same data keeps
+    its ``updated_at``.
+    """
+
+    KEEP_TTLS = 10
+
+    def __init__(self, ttl: int = 60):
+        self.ttl = ttl
+        self._service = None
+
+    def init_app(self, app, service) -> None:
+        self.ttl = app.config['STOCK_QUOTE_TTL']
+        self._service = service
+
+    @staticmethod
+    def _key(symbol: str) -> str:
+        return f'stock_quote:{symbol}'
+
+    def get(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Entries (``data``, ``json``, ``digest``, ``checked_at``,
+        ``updated_at``) of the symbols, keyed by symbol; ``data`` is a
+        ``StockRecord``, or None for symbols without price history.
+        """
+        from .cache import cache
+        from .singleflight import single_flight
+
+        symbols = list(dict.fromkeys(symbols))
+        cached = cache.get_many(*[self._key(symbol) for symbol in symbols])
+        now = time.time()
+        entries, previous = {}, {}
+        for symbol, entry in zip(symbols, cached):
+            if not (isinstance(entry, dict) and 'checked_at' in entry):
+                continue
+            if now - entry['checked_at'] < self.ttl:
+                entries[symbol] = entry
+            else:
+                previous[symbol] = entry
+
+        missing = sorted(symbol for symbol in symbols if symbol not in entries)
+        if missing:
+            # Concurrent requests missing the same symbols share one download
+            batch_key = f"stock_quote_batch:{','.join(missing)}"
+            entries.update(single_flight.do(batch_key, lambda: self._fetch(missing, previous, batch_key), cache=cache))
+        return entries
+
+    def _fetch(
+        self, symbols: List[str], previous: Dict[str, Dict[str, Any]], batch_key: str
+    ) -> Dict[str, Dict[str, Any]]:
+        from .cache import cache
+
+        stocks = self._service.get_stocks_data(symbols)
+        now = time.time()
+        entries = {}
+        for symbol in symbols:
+            data = stocks.get(symbol)
+            serialized = data.to_json() if data is not None else b'null'
+            entry = {'data': data, 'json': serialized, 'digest': digest(serialized), 'checked_at': now, 'updated_at': now}
+            old = previous.get(symbol)
+            if old is not None and old['digest'] == entry['digest']:
+                entry['updated_at'] = old['updated_at']
+            entries[symbol] = entry
+        cache.set_many(
+            {self._key(symbol): entry for symbol, entry in entries.items()}, timeout=self.ttl * self.KEEP_TTLS
+        )
+        # The whole batch as well, for the requests of other processes waiting on this download
+        cache.set(batch_key, entries, timeout=self.ttl)
+        return entries
+
+
+# Singleton instance
+stock_quotes = StockQuotes()
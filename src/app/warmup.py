@@ -0,0 +1,122 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.agent.instrumentation import instrument
+from src.services.http_client import http_client
+
+# USD per million (prompt, completion) tokens; unknown models are priced like the most expensive one
+MODEL_PRICES = {
+    'gpt-4.1': (2.00, 8.00),
+    'o4-mini': (1.10, 4.40),
+}
+
+
+def llm_cost(llm_calls: Iterable[Dict[str, Any]]) -> float:
+    """Estimated USD cost of the LLM calls of a trace"""
+    fallback = max(MODEL_PRICES.values())
+    cost = 0.0
+    for call in llm_calls:
+        prompt_price, completion_price = next(
+            (prices for model, prices in MODEL_PRICES.items() if call['model'].startswith(model)), fallback
+        )
+        cost += (call['prompt_tokens'] * prompt_price + call['completion_tokens'] * completion_price) / 1_000_000
+    return cost
+
+
+class AnalysisWarmup:
+    """
+    Precompute stock analyses into the analysis cache, so the first views
+    of the day are cache hits.
+
+    Symbols whose cached analysis is younger than ``fresh_for`` seconds are
+    skipped, as are symbols a web worker is already analysing (the job
+    queue's lock is taken for every run). At most ``concurrency`` analyses
+    run at once, and no new one starts once the spent cost plus the
+    expected cost of the running ones would exceed ``budget`` USD; the
+    expected cost of a run is the mean of the finished ones, starting
+    from ``initial_estimate``.
+    """
+
+    def __init__(self, app, compute, concurrency: int = 2, budget: float = 1.0, fresh_for: Optional[float] = None,
+                 initial_estimate: float = 0.05):
+        self.app = app
+        self.compute = compute
+        self.concurrency = concurrency
+        self.budget = budget
+        self.fresh_for = app.config['ANALYSIS_SOFT_TTL'] if fresh_for is None else fresh_for
+        self.initial_estimate = initial_estimate
+        self.spent = 0.0
+        self.results: List[Dict[str, Any]] = []
+
+    def _estimate(self) -> float:
+        costs = [r['cost'] for r in self.results if r['status'] == 'done']
+        return sum(costs) / len(costs) if costs else self.initial_estimate
+
+    def _is_fresh(self, symbol: str) -> bool:
+        from .routes import _cached_analysis_entry
+
+        entry = _cached_analysis_entry(symbol)
+        return entry is not None and time.time() - entry['generated_at'] < self.fresh_for
+
+    def _run(self, symbol: str) -> Dict[str, Any]:
+        from .analysis_jobs import analysis_jobs
+
+        result = {'symbol': symbol, 'status': 'done', 'seconds': 0.0, 'tokens': 0, 'cost': 0.0, 'error': None}
+        with self.app.app_context():
+            if self._is_fresh(symbol):
+                result['status'] = 'fresh'
+                return result
+            if not analysis_jobs.acquire(symbol):
+                result['status'] = 'busy'
+                return result
+            try:
+                with instrument('warmup') as trace, http_client.background():
+                    self.compute(symbol)
+            except Exception as e:
+                result['status'] = 'failed'
+                result['error'] = str(e)
+            finally:
+                analysis_jobs.release(symbol)
+
+        result['seconds'] = round(trace.duration or 0.0, 1)
+        result['tokens'] = sum(c['prompt_tokens'] + c['completion_tokens'] for c in trace.llm_calls)
+        result['cost'] = llm_cost(trace.llm_calls)
+        return result
+
+    def run(self, symbols: Iterable[str]) -> List[Dict[str, Any]]:
+        """Warm up the symbols in order, printing a line as each one finishes"""
+        pending = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='warmup') as executor:
+            while pending or running:
+                while pending and len(running) < self.concurrency:
+                    if self.spent + (len(running) + 1) * self._estimate() > self.budget:
+                        break
+                    symbol = pending.pop(0)
+                    running[executor.submit(self._run, symbol)] = symbol
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    result = future.result()
+                    self.spent += result['cost']
+                    self.results.append(result)
+                    print_result(result)
+
+        for symbol in pending:
+            result = {'symbol': symbol, 'status': 'over budget', 'seconds': 0.0, 'tokens': 0, 'cost': 0.0,
+                      'error': None}
+            self.results.append(result)
+            print_result(result)
+        return self.results
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    """One summary line per symbol"""
+    line = (f"{result['symbol']:<8} {result['status']:<12} {result['seconds']:>7.1f}s "
+            f"{result['tokens']:>9,} tokens  ${result['cost']:.4f}")
+    if result['error']:
+        line += f"  {result['error']}"
+    print(line, flush=True)
@@ -0,0 +1,32 @@
+"""
+ASGI entry point, for serving many slow agent requests from one process.
+
+The agent endpoints (/api/chat, /api/rag/query and their /stream variants)
+are async Flask views, and here they run natively on the server's event
+loop: the agents are awaited with LangGraph's ainvoke/astream, the OpenAI
+calls use the async client and NewsAPI goes through the shared async HTTP
+client, so a waiting request holds no thread. Every other route goes to the
+Flask app through uvicorn's WSGI middleware (a2wsgi's, when that is
+installed), on a pool of ``ASGI_WSGI_THREADS`` threads. Those routes don't
+wait on upstream services anymore: the dashboard renders the background
+market snapshot and /stock/<symbol> queues its analysis, so the pool only
+needs to cover rendering.
+
+An ASGI server is not part of requirements.txt; install one to use this
+mode, e.g.
+
+    pip install uvicorn
+    uvicorn src.asgi:app --host 0.0.0.0 --port 5000
+
+src/wsgi.py remains the entry point for WSGI servers.
+"""
+import os
+
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+from src.app import create_app
+from src.app.asgi import AsgiApp
+
+flask_app = create_app()
+
+app = AsgiApp(flask_app, WSGIMiddleware(flask_app, workers=int(os.getenv('ASGI_WSGI_THREADS', 64))))
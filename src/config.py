@@ -10,3 +10,44 @@ class Config:
     DEBUG = os.environ.get('FLASK_DEBUG', 'True') == 'True'
     MAX_TOKENS = int(os.environ.get('MAX_TOKENS', 1000))
     TEMPERATURE = float(os.environ.get('TEMPERATURE', 0.7))
+
+    # Cache shared by all worker processes; set CACHE_TYPE=SimpleCache for a per-process cache
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'src.app.sqlite_cache.SQLiteCache')
+    CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(project_root, '.cache'))
+    CACHE_DEFAULT_TIMEOUT = 1800
+    CACHE_THRESHOLD = int(os.environ.get('CACHE_THRESHOLD', 500))
+    CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # Stock analyses older than the soft TTL are served stale and refreshed in
+    # the background; only past the hard TTL does a request wait for a new run
+    ANALYSIS_SOFT_TTL = int(os.environ.get('ANALYSIS_SOFT_TTL', 1800))
+    ANALYSIS_HARD_TTL = int(os.environ.get('ANALYSIS_HARD_TTL', 86400))
+
+    # How /stock/<symbol> analyses are produced: 'supervisor' hands work to one
+    # agent at a time, 'parallel' runs the stock and news agents concurrently,
+    # 'prefetch' fetches all data in code and makes a single model call
+    ANALYSIS_MODE = os.environ.get('ANALYSIS_MODE', 'supervisor')
+
+    # Analyses run as background jobs: worker threads per process, how many
+    # jobs may wait, and how long a job holds its symbol's cross-process lock
+    ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 2))
+    ANALYSIS_QUEUE_LIMIT = int(os.environ.get('ANALYSIS_QUEUE_LIMIT', 100))
+    ANALYSIS_JOB_TIMEOUT = int(os.environ.get('ANALYSIS_JOB_TIMEOUT', 600))
+
+    # Pre-market warm-up of the analysis cache (warmup.py); empty tickers means watchlist and top tickers
+    WARMUP_TICKERS = [t for t in os.environ.get('WARMUP_TICKERS', '').replace(',', ' ').split() if t]
+    WARMUP_CONCURRENCY = int(os.environ.get('WARMUP_CONCURRENCY', 2))
+    WARMUP_BUDGET_USD = float(os.environ.get('WARMUP_BUDGET_USD', 1.0))
+
+    # Dashboard data is refreshed in the background every N seconds
+    MARKET_REFRESH_QUOTES = int(os.environ.get('MARKET_REFRESH_QUOTES', 60))
+    MARKET_REFRESH_SENTIMENT = int(os.environ.get('MARKET_REFRESH_SENTIMENT', 300))
+    MARKET_REFRESH_NEWS = int(os.environ.get('MARKET_REFRESH_NEWS', 600))
+    # How long the first dashboard views after startup wait for the initial refresh
+    MARKET_SNAPSHOT_WAIT = float(os.environ.get('MARKET_SNAPSHOT_WAIT', 5))
+    # Seconds between the dashboard page's conditional polls of /api/dashboard
+    DASHBOARD_POLL_INTERVAL = int(os.environ.get('DASHBOARD_POLL_INTERVAL', 15))
+
+    # Quote API (/api/stocks): seconds a symbol's data is cached, and symbols allowed per request
+    STOCK_QUOTE_TTL = int(os.environ.get('STOCK_QUOTE_TTL', 60))
+    STOCKS_API_MAX_SYMBOLS = int(os.environ.get('STOCKS_API_MAX_SYMBOLS', 100))
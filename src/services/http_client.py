@@ -0,0 +1,396 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, MutableMapping, Optional, Tuple, Type
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Longer rate-limit wait allowed for calls made in ``HttpClient.background()``
+_background_wait: ContextVar[Optional[float]] = ContextVar('http_background_wait', default=None)
+
+
+class UpstreamUnavailable(RuntimeError):
+    """The upstream's circuit is open, or its rate limit would block for too long"""
+
+
+class RetryableResponse(Exception):
+    """HTTP response (``requests`` or ``httpx``) with a status worth retrying (429, 5xx)"""
+
+    def __init__(self, response):
+        reason = getattr(response, 'reason', None) or getattr(response, 'reason_phrase', '')
+        super().__init__(f"{response.status_code} {reason} for {response.url}")
+        self.response = response
+        self.retry_after = _retry_after(response)
+
+
+def _retry_after(response) -> Optional[float]:
+    value = response.headers.get('Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Allows ``rate`` calls per second on average, with bursts of up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take one token if there is one; otherwise the seconds until there will be"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: float) -> bool:
+        """Take one token, waiting up to ``timeout`` seconds for it"""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, timeout: float) -> bool:
+        """``acquire`` for event loops: waits without blocking other tasks"""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects calls
+    for ``reset_timeout`` seconds; then lets one trial call through, which
+    closes the circuit on success and re-opens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_timeout else 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+    def release(self) -> None:
+        """Free the trial slot of a call that ended without a result (e.g. cancelled)"""
+        with self._lock:
+            self._trial = False
+
+
+class Upstream:
+    """
+    Rate limit, retries and circuit breaker of one external service.
+
+    ``call`` waits for a token of the upstream's bucket, runs the function
+    and retries it on the ``retry_on`` exceptions with full-jitter
+    exponential backoff (or the server's ``Retry-After``). Every failed
+    attempt, and any other exception, counts towards the circuit breaker;
+    while the circuit is open calls fail fast with ``UpstreamUnavailable``. A call waits at most
+    ``max_wait`` seconds for a token, so a request thread is never parked
+    behind the rate limit for long; background work may wait longer.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, retries: int = 2, backoff: float = 0.5,
+                 max_backoff: float = 10, max_wait: float = 2, failure_threshold: int = 5,
+                 reset_timeout: float = 30, retry_on: Tuple[Type[BaseException], ...] = (requests.RequestException,)):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self.retry_on = retry_on + (RetryableResponse,)
+
+    def _max_wait(self) -> float:
+        background = _background_wait.get()
+        return self.max_wait if background is None else max(self.max_wait, background)
+
+    def _delay(self, attempt: int, error: BaseException) -> float:
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _circuit_open(self) -> UpstreamUnavailable:
+        return UpstreamUnavailable(f"{self.name} circuit is open after repeated failures")
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        for attempt in range(self.retries + 1):
+            if self.breaker.state == 'open':
+                raise self._circuit_open()
+            # The token comes first, so a denied token never holds the half-open trial slot
+            if not self.bucket.acquire(self._max_wait()):
+                raise UpstreamUnavailable(f"{self.name} rate limit exceeded")
+            if not self.breaker.allow():
+                raise self._circuit_open()
+            try:
+                result = fn(*args, **kwargs)
+            except self.retry_on as e:
+                self.breaker.record_failure()
+                if attempt == self.retries:
+                    raise
+                time.sleep(self._delay(attempt, e))
+                continue
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                self.breaker.release()
+
+    async def acall(self, fn: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """``call`` for coroutine functions"""
+        for attempt in range(self.retries + 1):
+            if self.breaker.state == 'open':
+                raise self._circuit_open()
+            if not await self.bucket.acquire_async(self._max_wait()):
+                raise UpstreamUnavailable(f"{self.name} rate limit exceeded")
+            if not self.breaker.allow():
+                raise self._circuit_open()
+            try:
+                result = await fn(*args, **kwargs)
+            except self.retry_on as e:
+                self.breaker.record_failure()
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(self._delay(attempt, e))
+                continue
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                self.breaker.release()
+
+    def status(self) -> Dict[str, Any]:
+        return {'circuit': self.breaker.state, 'consecutive_failures': self.breaker.failures}
+
+
+class UpstreamSession(requests.Session):
+    """
+    Pooled keep-alive session that sends requests to known hosts through
+    their ``Upstream`` and applies a default timeout to every request.
+    Responses with a retryable status are retried; the last one is
+    returned as-is once retries are exhausted.
+    """
+
+    def __init__(self, client: 'HttpClient', pool_size: int):
+        super().__init__()
+        self.client = client
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.client.timeout)
+        upstream = self.client.upstream_for(url)
+        if upstream is None:
+            return super().request(method, url, **kwargs)
+
+        def send():
+            response = super(UpstreamSession, self).request(method, url, **kwargs)
+            if response.status_code in RETRY_STATUSES:
+                raise RetryableResponse(response)
+            return response
+
+        try:
+            return upstream.call(send)
+        except RetryableResponse as e:
+            return e.response
+
+
+class HttpClient:
+    """
+    Shared access to the external services: one pooled ``session`` for the
+    HTTP APIs (NewsAPI), and ``call`` for client libraries that bring their
+    own transport (yfinance needs its curl_cffi session, so only the rate
+    limit, retries and circuit breaker are applied around its calls).
+    Async code uses ``aget``, on a pooled ``httpx.AsyncClient`` per event
+    loop, with the same upstream limits. Code running a short-lived loop
+    closes the loop's client with ``aclose`` before the loop ends; clients
+    of loops that were closed without it are dropped on the next
+    ``async_client`` call.
+    """
+
+    def __init__(self, timeout: float = 10, pool_size: int = 20, background_wait: float = 30):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.background_wait = background_wait
+        self.upstreams: Dict[str, Upstream] = {}
+        self.hosts: Dict[str, str] = {}
+        self.session = UpstreamSession(self, pool_size)
+        self._async_clients: MutableMapping[asyncio.AbstractEventLoop, Any] = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+
+    def register(self, upstream: Upstream, *hosts: str) -> None:
+        self.upstreams[upstream.name] = upstream
+        for host in hosts:
+            self.hosts[host] = upstream.name
+
+    def upstream_for(self, url: str) -> Optional[Upstream]:
+        name = self.hosts.get(urlparse(url).hostname or '')
+        return self.upstreams.get(name) if name else None
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.session.get(url, **kwargs)
+
+    def async_client(self):
+        """The ``httpx.AsyncClient`` of the running event loop (clients can't be shared across loops)"""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                for closed in [other for other in self._async_clients if other.is_closed()]:
+                    del self._async_clients[closed]
+                limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+                client = self._async_clients[loop] = httpx.AsyncClient(timeout=self.timeout, limits=limits)
+        return client
+
+    async def aget(self, url: str, **kwargs):
+        """Async GET through the upstream of the URL's host, returning an ``httpx.Response``"""
+        import httpx
+
+        client = self.async_client()
+        upstream = self.upstream_for(url)
+        if upstream is None:
+            return await client.get(url, **kwargs)
+
+        async def send():
+            try:
+                response = await client.get(url, **kwargs)
+            except httpx.TransportError as e:
+                # Retried (and counted by the breaker) like connection errors of the sync session
+                raise requests.ConnectionError(str(e)) from e
+            if response.status_code in RETRY_STATUSES:
+                raise RetryableResponse(response)
+            return response
+
+        try:
+            return await upstream.acall(send)
+        except RetryableResponse as e:
+            return e.response
+
+    async def aclose(self) -> None:
+        """Close the async client of the running event loop"""
+        with self._async_lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    @contextmanager
+    def background(self) -> Iterator[None]:
+        """
+        Let calls made in this context (scheduled refreshes, analysis jobs,
+        not request threads) wait up to ``background_wait`` seconds for a
+        rate-limit token. Threads started inside need a copy of the context.
+        """
+        token = _background_wait.set(self.background_wait)
+        try:
+            yield
+        finally:
+            _background_wait.reset(token)
+
+    def call(self, upstream: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run a client library call through the named upstream's limits"""
+        return self.upstreams[upstream].call(fn, *args, **kwargs)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: upstream.status() for name, upstream in self.upstreams.items()}
+
+
+def _yfinance_errors() -> Tuple[Type[BaseException], ...]:
+    from curl_cffi.requests.exceptions import RequestException as CurlRequestException
+    from yfinance.exceptions import YFRateLimitError
+
+    return (YFRateLimitError, CurlRequestException, requests.RequestException)
+
+
+def _build_client() -> HttpClient:
+    client = HttpClient(
+        timeout=float(os.getenv('HTTP_TIMEOUT', 10)),
+        pool_size=int(os.getenv('HTTP_POOL_SIZE', 20)),
+        background_wait=float(os.getenv('HTTP_BACKGROUND_MAX_WAIT', 30)),
+    )
+    settings = {
+        'retries': int(os.getenv('HTTP_RETRIES', 2)),
+        'max_wait': float(os.getenv('HTTP_MAX_WAIT', 2)),
+        'failure_threshold': int(os.getenv('CIRCUIT_FAILURES', 5)),
+        'reset_timeout': float(os.getenv('CIRCUIT_RESET', 30)),
+    }
+    client.register(
+        Upstream('newsapi', rate=float(os.getenv('NEWSAPI_RATE', 1)), burst=int(os.getenv('NEWSAPI_BURST', 5)),
+                 **settings),
+        'newsapi.org',
+    )
+    client.register(
+        Upstream('yfinance', rate=float(os.getenv('YFINANCE_RATE', 5)), burst=int(os.getenv('YFINANCE_BURST', 20)),
+                 retry_on=_yfinance_errors(), **settings),
+    )
+    return client
+
+
+# Singleton instance
+http_client = _build_client()
@@ -0,0 +1,182 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .http_client import http_client
+
+EVERYTHING_URL = 'https://newsapi.org/v2/everything'
+OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a NewsAPI search: whitespace collapsed and terms
+    lower-cased, with plain keyword lists sorted (``"Stock  AAPL"`` and
+    ``"aapl stock"`` are the same search). Queries using operators,
+    phrases or groups keep their term order.
+    """
+    terms = [term if term in OPERATORS else term.lower() for term in query.split()]
+    if not any(term in OPERATORS or term[0] in '+-"(' or term[-1] in '")' for term in terms):
+        terms = sorted(set(terms))
+    return ' '.join(terms)
+
+
+def compact_article(article: Dict[str, Any]) -> Dict[str, str]:
+    """The fields of a NewsAPI article the dashboard and the agents use"""
+    return {
+        'title': article.get('title') or '',
+        'description': article.get('description') or '',
+        'url': article.get('url') or '',
+        'source': (article.get('source') or {}).get('name') or '',
+        'published_at': article.get('publishedAt') or '',
+        'image_url': article.get('urlToImage') or '',
+    }
+
+
+class NewsCache:
+    """
+    Short-lived cache of NewsAPI searches shared by the dashboard and the
+    agents.
+
+    Searches are keyed by their normalized query and parameters; the page
+    size is not part of the key, as a search fetched with a larger page
+    serves smaller ones. Articles are stored once by URL across all cached
+    searches, as compact records, and each search keeps the list of its
+    URLs. Concurrent misses of the same search wait for a single request
+    (across threads for ``search``, within an event loop for ``asearch``).
+    """
+
+    def __init__(self, ttl: int = 300, min_page_size: int = 20, max_searches: int = 256):
+        self.ttl = ttl
+        self.min_page_size = min_page_size
+        self.max_searches = max_searches
+        self._searches: Dict[Tuple, Tuple[float, int, List[str]]] = {}
+        self._articles: Dict[str, Dict[str, str]] = {}
+        self._fetching: Dict[Tuple, threading.Lock] = {}
+        self._async_fetching: Dict[Tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, language: str = 'en', sort_by: str = 'publishedAt',
+            domains: Optional[str] = None) -> Tuple:
+        domain_list = ','.join(sorted(d.strip().lower() for d in domains.split(',') if d.strip())) if domains else ''
+        return normalize_query(query), language.lower(), sort_by, domain_list
+
+    def _cached(self, key: Tuple, page_size: int, now: float) -> Optional[List[Dict[str, str]]]:
+        entry = self._searches.get(key)
+        if entry is None:
+            return None
+        fetched_at, fetched_size, urls = entry
+        # A short result is complete, so it answers any page size
+        if now - fetched_at >= self.ttl or (page_size > fetched_size and len(urls) >= fetched_size):
+            return None
+        return [self._articles[url] for url in urls[:page_size]]
+
+    def search(self, query: str, language: str = 'en', page_size: int = 10, sort_by: str = 'publishedAt',
+               domains: Optional[str] = None) -> List[Dict[str, str]]:
+        """Articles of a NewsAPI ``/everything`` search, newest first by default"""
+        key = self.key(query, language, sort_by, domains)
+        with self._lock:
+            articles = self._cached(key, page_size, time.time())
+            if articles is not None:
+                self.hits += 1
+                return articles
+            fetch_lock = self._fetching.setdefault(key, threading.Lock())
+
+        with fetch_lock:
+            # Another thread may have fetched it while this one waited
+            with self._lock:
+                articles = self._cached(key, page_size, time.time())
+                if articles is not None:
+                    self.hits += 1
+                    return articles
+                self.misses += 1
+            fetch_size = min(100, max(page_size, self.min_page_size))
+            try:
+                raw = self._fetch(key, fetch_size)
+                with self._lock:
+                    self._store(key, fetch_size, raw)
+                    return self._cached(key, page_size, time.time()) or []
+            finally:
+                # Only once the result is stored, so later callers find it instead of fetching again
+                with self._lock:
+                    self._fetching.pop(key, None)
+
+    async def asearch(self, query: str, language: str = 'en', page_size: int = 10, sort_by: str = 'publishedAt',
+                      domains: Optional[str] = None) -> List[Dict[str, str]]:
+        """``search`` for event loops, fetching over the shared async HTTP client"""
+        key = self.key(query, language, sort_by, domains)
+        flight = (asyncio.get_running_loop(), key)
+        with self._lock:
+            articles = self._cached(key, page_size, time.time())
+            if articles is not None:
+                self.hits += 1
+                return articles
+            task = self._async_fetching.get(flight)
+            if task is None:
+                self.misses += 1
+                fetch_size = min(100, max(page_size, self.min_page_size))
+                task = self._async_fetching[flight] = asyncio.ensure_future(self._afetch(key, fetch_size))
+                task.add_done_callback(lambda _: self._async_fetching.pop(flight, None))
+
+        # Shielded, so a cancelled request doesn't cancel the fetch other requests wait on
+        await asyncio.shield(task)
+        with self._lock:
+            return self._cached(key, page_size, time.time()) or []
+
+    @staticmethod
+    def _params(key: Tuple, page_size: int) -> Dict[str, Any]:
+        query, language, sort_by, domains = key
+        api_key = os.getenv('NEWS_API_KEY')
+        if not api_key:
+            raise ValueError("News API key not found")
+        params = {'q': query, 'language': language, 'pageSize': page_size, 'sortBy': sort_by, 'apiKey': api_key}
+        if domains:
+            params['domains'] = domains
+        return params
+
+    def _fetch(self, key: Tuple, page_size: int) -> List[Dict[str, Any]]:
+        response = http_client.get(EVERYTHING_URL, params=self._params(key, page_size))
+        response.raise_for_status()
+        return response.json().get('articles', [])
+
+    async def _afetch(self, key: Tuple, page_size: int) -> None:
+        response = await http_client.aget(EVERYTHING_URL, params=self._params(key, page_size))
+        response.raise_for_status()
+        raw = response.json().get('articles', [])
+        with self._lock:
+            self._store(key, page_size, raw)
+
+    def _store(self, key: Tuple, page_size: int, raw: List[Dict[str, Any]]) -> None:
+        urls = []
+        for article in raw:
+            record = compact_article(article)
+            url = record['url']
+            if not url or url in urls:
+                continue
+            self._articles[url] = record
+            urls.append(url)
+        self._searches[key] = (time.time(), page_size, urls)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired searches (and the oldest beyond ``max_searches``) and articles nothing refers to"""
+        now = time.time()
+        live = sorted(((entry[0], key) for key, entry in self._searches.items() if now - entry[0] < self.ttl),
+                      reverse=True)[:self.max_searches]
+        self._searches = {key: self._searches[key] for _, key in live}
+        referenced = {url for _, _, urls in self._searches.values() for url in urls}
+        self._articles = {url: record for url, record in self._articles.items() if url in referenced}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'searches': len(self._searches), 'articles': len(self._articles),
+                    'hits': self.hits, 'misses': self.misses}
+
+
+# Singleton instance
+news_cache = NewsCache(ttl=int(os.getenv('NEWS_CACHE_TTL', 300)))
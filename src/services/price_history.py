@@ -0,0 +1,227 @@
+import logging
+import os
+import re
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from .http_client import http_client
+
+BAR_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+])
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_name(symbol: str) -> str:
+    """File name for a symbol (``^GSPC`` and ``BTC-USD`` are valid tickers)"""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', symbol.upper())
+
+
+def window_days(period: str) -> Optional[int]:
+    """Calendar days covered by a yfinance-style period (``5d``, ``1mo``, ``1y``), None for ``max``"""
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        return None
+    count, unit = int(match.group(1)), match.group(2)
+    return count * {'d': 1, 'wk': 7, 'mo': 31, 'y': 366}[unit]
+
+
+class PriceHistoryStore:
+    """
+    Local daily price history, one memory-mapped NumPy file per symbol.
+
+    Each file is a structured array of daily bars sorted by date. On
+    ``update`` only bars from the last stored date onwards are downloaded
+    (the last bar is re-fetched, as it may have been an intraday snapshot),
+    in one ``yf.download`` per group of symbols, and symbols checked within
+    ``refresh_interval`` seconds are not fetched at all. Windowed queries
+    (52-week range, N-day returns) are then answered from disk.
+    """
+
+    def __init__(self, root: str, initial_period: str = '1y', refresh_interval: int = 900,
+                 batch_size: int = 50):
+        self.root = root
+        self.initial_period = initial_period
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self._arrays: Dict[str, tuple] = {}
+        self._checked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.root, _safe_name(symbol) + '.npy')
+
+    def history(self, symbol: str) -> np.ndarray:
+        """All stored bars of a symbol (empty when nothing is stored)"""
+        path = self._path(symbol)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return np.zeros(0, dtype=BAR_DTYPE)
+        cached = self._arrays.get(symbol)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        bars = np.load(path, mmap_mode='r')
+        self._arrays[symbol] = (mtime, bars)
+        return bars
+
+    def _write(self, symbol: str, bars: np.ndarray) -> None:
+        path = self._path(symbol)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, bars)
+        os.replace(tmp_path, path)
+
+    def _is_fresh(self, symbol: str, now: float) -> bool:
+        checked = self._checked.get(symbol)
+        if checked is None:
+            # Another worker may have refreshed the file recently
+            try:
+                checked = os.path.getmtime(self._path(symbol))
+            except OSError:
+                return False
+        return now - checked < self.refresh_interval
+
+    def update(self, symbols: Iterable[str], force: bool = False) -> None:
+        """Fetch missing bars for the symbols that are not fresh"""
+        symbols = [symbol.upper() for symbol in dict.fromkeys(symbols)]
+        now = time.time()
+        stale = [symbol for symbol in symbols if force or not self._is_fresh(symbol, now)]
+        if not stale:
+            return
+
+        # Symbols without history get the full initial period, the others resume from their last bar
+        groups: Dict[Optional[np.datetime64], List[str]] = {}
+        for symbol in stale:
+            bars = self.history(symbol)
+            groups.setdefault(bars['date'][-1] if len(bars) else None, []).append(symbol)
+
+        for start, group in groups.items():
+            for offset in range(0, len(group), self.batch_size):
+                batch = group[offset:offset + self.batch_size]
+                try:
+                    self._fetch(batch, start)
+                except Exception as e:
+                    logger.error(f"Error updating price history for {', '.join(batch)}: {str(e)}")
+                    continue
+                with self._lock:
+                    for symbol in batch:
+                        self._checked[symbol] = now
+
+    def _fetch(self, batch: List[str], start: Optional[np.datetime64]) -> None:
+        kwargs = {'period': self.initial_period} if start is None else {
+            'start': pd.Timestamp(start).strftime('%Y-%m-%d'),
+            'end': (pd.Timestamp.now() + timedelta(days=1)).strftime('%Y-%m-%d'),
+        }
+        data = http_client.call('yfinance', yf.download, batch, interval='1d', group_by='column',
+                                auto_adjust=False, progress=False, threads=True, timeout=http_client.timeout,
+                                **kwargs)
+        if data is None or data.empty:
+            return
+
+        index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+        dates = index.values.astype('datetime64[D]')
+        for symbol in batch:
+            columns = {}
+            for field in FIELDS:
+                if isinstance(data.columns, pd.MultiIndex):
+                    column = data[field][symbol] if (field, symbol) in data.columns else None
+                else:
+                    column = data[field] if field in data else None
+                columns[field] = column.to_numpy(dtype=float) if column is not None else np.full(len(dates), np.nan)
+
+            valid = ~np.isnan(columns['Close'])
+            if not valid.any():
+                continue
+            fetched = np.zeros(int(valid.sum()), dtype=BAR_DTYPE)
+            fetched['date'] = dates[valid]
+            for field in FIELDS:
+                fetched[field.lower()] = columns[field][valid]
+
+            with self._lock:
+                stored = np.asarray(self.history(symbol))
+                kept = stored[stored['date'] < fetched['date'][0]]
+                self._write(symbol, np.concatenate([kept, fetched]))
+
+    def window(self, symbol: str, days: Optional[int]) -> np.ndarray:
+        """Bars of the last ``days`` calendar days before the latest stored bar (all bars for None)"""
+        bars = self.history(symbol.upper())
+        if not len(bars) or days is None:
+            return bars
+        start = bars['date'][-1] - np.timedelta64(days - 1, 'D')
+        return bars[np.searchsorted(bars['date'], start):]
+
+    def week52_range(self, symbol: str) -> Optional[tuple]:
+        """``(high, low)`` over the last 52 weeks, None without history"""
+        bars = self.window(symbol, 365)
+        if not len(bars):
+            return None
+        return float(np.nanmax(bars['high'])), float(np.nanmin(bars['low']))
+
+    def n_day_return(self, symbol: str, n: int) -> Optional[float]:
+        """Percent change of the close over the last ``n`` bars"""
+        bars = self.history(symbol.upper())
+        if len(bars) <= n:
+            return None
+        start, end = bars['close'][-n - 1], bars['close'][-1]
+        return float((end - start) / start * 100) if start else None
+
+    def get_quotes(self, tickers: Iterable[str], period: str = '1y') -> Dict[str, Dict[str, float]]:
+        """
+        Same shape as ``QuoteEngine.get_quotes``, computed from the stored
+        history after an incremental update. The high/low range covers
+        ``period``; ``Nd`` periods count trading bars, like yfinance.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        self.update(tickers)
+
+        days_match = re.fullmatch(r'(\d+)d', period)
+        quotes = {}
+        for ticker in tickers:
+            bars = self.history(ticker)
+            if days_match:
+                bars = bars[-int(days_match.group(1)):]
+            else:
+                bars = self.window(ticker, window_days(period))
+            if not len(bars):
+                continue
+            current = float(bars['close'][-1])
+            previous = float(bars['close'][-2]) if len(bars) > 1 else current
+            change = current - previous
+            quotes[ticker] = {
+                'price': round(current, 2),
+                'previous_close': round(previous, 2),
+                'change': round(change, 2),
+                'change_percent': round(change / previous * 100, 2) if previous else 0.0,
+                'week52_high': round(float(np.nanmax(bars['high'])), 2),
+                'week52_low': round(float(np.nanmin(bars['low'])), 2),
+            }
+        return quotes
+
+
+def _default_root() -> str:
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    cache_dir = os.getenv('CACHE_DIR', os.path.join(project_root, '.cache'))
+    return os.getenv('PRICE_HISTORY_DIR', os.path.join(cache_dir, 'price_history'))
+
+
+# Singleton instance
+price_history = PriceHistoryStore(
+    _default_root(),
+    refresh_interval=int(os.getenv('PRICE_HISTORY_REFRESH', 900)),
+)
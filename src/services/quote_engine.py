@@ -0,0 +1,85 @@
+import contextvars
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Tuple
+
+import yfinance as yf
+
+from .http_client import http_client
+from .price_history import price_history
+
+
+class QuoteEngine:
+    """
+    Multi-ticker quote engine.
+
+    Prices come from the local price history store, which keeps daily bars
+    up to date with batched incremental downloads, and are reduced to
+    price/change/52-week range there. Slow-moving ``Ticker.info``
+    fundamentals (name, market cap, ...) are cached with a long TTL and
+    fetched concurrently on a miss.
+    """
+
+    def __init__(self, history, info_ttl: int = 6 * 3600, max_workers: int = 8):
+        self.history = history
+        self.info_ttl = info_ttl
+        self.max_workers = max_workers
+        self._info_cache: Dict[str, Tuple] = {}
+        self._info_lock = threading.Lock()
+
+    def get_quotes(self, tickers: Iterable[str], period: str = '1y') -> Dict[str, Dict[str, float]]:
+        """
+        Get price, previous close, change, change percent and the high/low
+        range over ``period`` for every ticker, keyed by symbol.
+        Symbols without any price data are left out of the result.
+        """
+        return self.history.get_quotes(tickers, period)
+
+    def get_info(self, ticker: str) -> Dict[str, Any]:
+        """Get the (cached) ``Ticker.info`` dict for a single ticker"""
+        return self.get_infos([ticker]).get(ticker, {})
+
+    def get_infos(self, tickers: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get ``Ticker.info`` for many tickers, serving fresh entries from the
+        cache and fetching the misses concurrently.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        now = time.time()
+        infos = {}
+        missing = []
+        with self._info_lock:
+            for ticker in tickers:
+                cached = self._info_cache.get(ticker)
+                if cached and now - cached[0] < self.info_ttl:
+                    infos[ticker] = cached[1]
+                else:
+                    missing.append(ticker)
+
+        if missing:
+            workers = min(self.max_workers, len(missing))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Each fetch runs in a copy of the caller's context, which carries its rate-limit wait
+                futures = [executor.submit(contextvars.copy_context().run, self._fetch_info, ticker)
+                           for ticker in missing]
+                fetched = {ticker: future.result() for ticker, future in zip(missing, futures)}
+            with self._info_lock:
+                for ticker, info in fetched.items():
+                    if info:
+                        self._info_cache[ticker] = (now, info)
+            infos.update(fetched)
+
+        return infos
+
+    @staticmethod
+    def _fetch_info(ticker: str) -> Dict[str, Any]:
+        try:
+            return http_client.call('yfinance', lambda: yf.Ticker(ticker).info) or {}
+        except Exception as e:
+            print(f"Error fetching info for {ticker}: {str(e)}")
+            return {}
+
+
+# Singleton instance
+quote_engine = QuoteEngine(history=price_history)
@@ -0,0 +1,131 @@
+import sys
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import orjson
+
+# Fields of a stock record, in the order they are serialized
+STOCK_FIELDS = (
+    'symbol', 'name', 'exchange', 'industry', 'sector', 'ceo', 'employees', 'city', 'country', 'founded',
+    'website', 'description', 'price', 'change', 'change_percent', 'market_cap', 'pe_ratio', 'eps',
+    'dividend_yield', 'week52_high', 'week52_low', 'avg_volume', 'shares_outstanding', 'revenue_ttm',
+    'gross_profit', 'profit_margin', 'return_on_equity',
+)
+
+_FIELD_SET = frozenset(STOCK_FIELDS)
+_all_values = attrgetter(*STOCK_FIELDS)
+
+
+def _number(info: Dict[str, Any], key: str, scale: float = 1) -> float:
+    """A numeric ``Ticker.info`` value, scaled and rounded; 0 when missing or not a number"""
+    value = info.get(key)
+    if not isinstance(value, (int, float)) or value != value:
+        return 0
+    return round(value * scale, 2)
+
+
+class StockRecord:
+    """
+    Stock data of one symbol, held in slots instead of a dict.
+
+    Reads like the dicts it replaces: attributes for templates,
+    ``record['price']``, ``get`` and ``keys`` for code. ``to_dict`` and
+    ``to_json`` build a dict or JSON only when asked, optionally projected
+    to some of the fields.
+    """
+
+    __slots__ = STOCK_FIELDS
+
+    def __init__(self, **fields):
+        for name in STOCK_FIELDS:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_yfinance(cls, ticker: str, info: Dict[str, Any], quote: Dict[str, float]) -> 'StockRecord':
+        """Build a record from a ``Ticker.info`` dict and a batched quote"""
+        record = cls.__new__(cls)
+        record.symbol = ticker
+        record.name = info.get('shortName', ticker)
+        # Values shared by many symbols are interned, so a large universe keeps one copy of each
+        record.exchange = sys.intern(info.get('exchange') or 'N/A')
+        record.industry = sys.intern(info.get('industry') or 'N/A')
+        record.sector = sys.intern(info.get('sector') or 'N/A')
+        record.ceo = info.get('ceo', 'N/A')
+        record.employees = info.get('fullTimeEmployees', 0)
+        record.city = sys.intern(info.get('city') or 'N/A')
+        record.country = sys.intern(info.get('country') or 'N/A')
+        record.founded = info.get('founded', 0)
+        record.website = info.get('website', '')
+        record.description = info.get('longBusinessSummary', '')
+        record.price = quote['price']
+        record.change = quote['change']
+        record.change_percent = quote['change_percent']
+        record.market_cap = _number(info, 'marketCap', 1e-9)  # In billions
+        record.pe_ratio = _number(info, 'trailingPE')
+        record.eps = _number(info, 'trailingEps')
+        record.dividend_yield = _number(info, 'dividendYield', 100)
+        record.week52_high = quote['week52_high']
+        record.week52_low = quote['week52_low']
+        record.avg_volume = info.get('averageVolume', 0)
+        record.shares_outstanding = info.get('sharesOutstanding', 0)
+        record.revenue_ttm = _number(info, 'totalRevenue', 1e-9)
+        record.gross_profit = _number(info, 'grossProfits', 1e-9)
+        record.profit_margin = _number(info, 'profitMargins', 100)
+        record.return_on_equity = _number(info, 'returnOnEquity', 100)
+        return record
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _FIELD_SET else default
+
+    def keys(self) -> Iterable[str]:
+        return STOCK_FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(STOCK_FIELDS)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _FIELD_SET
+
+    def values(self) -> tuple:
+        return _all_values(self)
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """The record as a dict, limited to ``fields`` when given"""
+        if not fields:
+            return dict(zip(STOCK_FIELDS, _all_values(self)))
+        return {name: getattr(self, name) for name in fields}
+
+    def to_json(self, fields: Optional[Iterable[str]] = None) -> bytes:
+        return orjson.dumps(self.to_dict(fields))
+
+    # Pickled (e.g. by the SQLite cache) as a plain tuple of values
+    def __reduce__(self):
+        return _from_values, (_all_values(self),)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, StockRecord) and self.values() == other.values()
+
+    # Records are mutable and compare by value, so they can't be hashed
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"StockRecord({self.symbol!r}, price={self.price!r})"
+
+
+def _from_values(values: tuple) -> StockRecord:
+    record = StockRecord.__new__(StockRecord)
+    for name, value in zip(STOCK_FIELDS, values):
+        setattr(record, name, value)
+    return record
+
+
+def json_default(obj: Any) -> Any:
+    """``default`` hook for json/orjson: stock records as dicts, anything else as its string"""
+    if isinstance(obj, StockRecord):
+        return obj.to_dict()
+    return str(obj)
@@ -1,11 +1,17 @@
 import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Tuple
-import requests
+from typing import List, Dict, Any, Tuple, Callable
 import os
 import json
+import time
 from dotenv import load_dotenv
 
+from .http_client import http_client
+from .news_cache import news_cache
+from .quote_engine import quote_engine
+from .stock_record import StockRecord
+
 load_dotenv()
 
 class StockService:
@@ -19,177 +25,230 @@ class StockService:
             '^RUT': 'Russell 2000',
             '^NDX': 'NASDAQ-100' 
         }
+        self.overview_timeout = float(os.getenv('MARKET_OVERVIEW_TIMEOUT', 8))
     
-    def get_stock_data(self, ticker: str) -> Dict[str, Any]:
+    def get_stock_data(self, ticker: str) -> StockRecord:
         """
         Get stock data for a given ticker using yfinance
         """
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
-            hist = stock.history(period="1y")
-            
-            week52_high = hist['High'].max()
-            week52_low = hist['Low'].min()
-            
-            current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
-            previous_close = info.get('previousClose', 0)
-            change = round(current_price - previous_close, 2)
-            change_percent = round((change / previous_close) * 100, 2) if previous_close else 0
-            
-            return {
-                'symbol': ticker,
-                'name': info.get('shortName', ticker),
-                'exchange': info.get('exchange', 'N/A'),
-                'industry': info.get('industry', 'N/A'),
-                'sector': info.get('sector', 'N/A'),
-                'ceo': info.get('ceo', 'N/A'),
-                'employees': info.get('fullTimeEmployees', 0),
-                'city': info.get('city', 'N/A'),
-                'country': info.get('country', 'N/A'),
-                'founded': info.get('founded', 0),
-                'website': info.get('website', ''),
-                'description': info.get('longBusinessSummary', ''),
-                'price': round(current_price, 2),
-                'change': change,
-                'change_percent': change_percent,
-                'market_cap': round(info.get('marketCap', 0) / 1_000_000_000, 2),  # In billions
-                'pe_ratio': round(info.get('trailingPE', 0), 2),
-                'eps': round(info.get('trailingEps', 0), 2),
-                'dividend_yield': round(info.get('dividendYield', 0) * 100, 2) if info.get('dividendYield') else 0,
-                'week52_high': round(week52_high, 2),
-                'week52_low': round(week52_low, 2),
-                'avg_volume': info.get('averageVolume', 0),
-                'shares_outstanding': info.get('sharesOutstanding', 0),
-                'revenue_ttm': round(info.get('totalRevenue', 0) / 1_000_000_000, 2) if info.get('totalRevenue') else 0,
-                'gross_profit': round(info.get('grossProfits', 0) / 1_000_000_000, 2) if info.get('grossProfits') else 0,
-                'profit_margin': round(info.get('profitMargins', 0) * 100, 2) if info.get('profitMargins') else 0,
-                'return_on_equity': round(info.get('returnOnEquity', 0) * 100, 2) if info.get('returnOnEquity') else 0,
-            }
+            quote = quote_engine.get_quotes([ticker], period='1y').get(ticker)
+            if quote is None:
+                raise ValueError(f"No price history returned for {ticker}")
+            return StockRecord.from_yfinance(ticker, quote_engine.get_info(ticker), quote)
         except Exception as e:
             print(f"Error fetching data for {ticker}: {str(e)}")
             return None
-    
+
     def get_market_news(self, query: str = 'stocks', language: str = 'en', page_size: int = 10) -> List[Dict[str, Any]]:
         """
-        Get market news using NewsAPI
+        Get market news using NewsAPI (through the shared news cache)
         """
         if not self.news_api_key:
             print("News API key not found")
             return []
             
         try:
-            url = 'https://newsapi.org/v2/everything'
-            params = {
-                'q': query,
-                'language': language,
-                'pageSize': page_size,
-                'apiKey': self.news_api_key,
-                'sortBy': 'publishedAt',
-                'domains': 'bloomberg.com,reuters.com,cnbc.com,wsj.com,ft.com'
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
-            articles = response.json().get('articles', [])
-            
-            # Format articles
-            formatted_articles = []
-            for article in articles:
-                formatted_articles.append({
-                    'title': article.get('title', ''),
-                    'description': article.get('description', ''),
-                    'url': article.get('url', ''),
-                    'source': article.get('source', {}).get('name', ''),
-                    'published_at': article.get('publishedAt', ''),
-                    'image_url': article.get('urlToImage', '')
-                })
-                
-            return formatted_articles
+            return news_cache.search(
+                query,
+                language=language,
+                page_size=page_size,
+                domains='bloomberg.com,reuters.com,cnbc.com,wsj.com,ft.com'
+            )
             
         except Exception as e:
             print(f"Error fetching news: {str(e)}")
             return []
     
-    def get_watchlist_data(self) -> List[Dict[str, Any]]:
+    def get_stocks_data(self, tickers: List[str]) -> Dict[str, StockRecord]:
+        """
+        Get stock data for many tickers with one batched quote download,
+        keyed by symbol. Tickers without price history are left out.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        quotes = quote_engine.get_quotes(tickers, period='1y')
+        infos = quote_engine.get_infos([ticker for ticker in tickers if ticker in quotes])
+
+        stocks = {}
+        for ticker in tickers:
+            if ticker not in quotes:
+                print(f"Error fetching data for {ticker}: no price history returned")
+                continue
+            stocks[ticker] = StockRecord.from_yfinance(ticker, infos.get(ticker, {}), quotes[ticker])
+        return stocks
+
+    def get_watchlist_data(self) -> List[StockRecord]:
         """
         Get data for the watchlist (top 5 stocks)
         """
-        watchlist = []
-        for ticker in self.top_tickers[:5]:  
-            stock_data = self.get_stock_data(ticker)
-            if stock_data:
-                watchlist.append(stock_data)
-        return watchlist
+        return list(self.get_stocks_data(self.top_tickers[:5]).values())
     
-    def get_market_overview(self) -> Dict[str, Any]:
+    def get_market_overview(self, concurrent: bool = True, timeout: float = None) -> Dict[str, Any]:
         """
         Get comprehensive market overview data including indices, market status, and crypto
+
+        With ``concurrent`` the sub-queries run side by side, one thread
+        each, and each one gets ``timeout`` seconds; a source that is
+        slower than that comes back in its degraded shape with an ``error``
+        field. Per-source wall times are returned under ``timings_ms``.
         """
+        tasks = self.overview_tasks()
+        
         try:
-            # Get major indices data
-            indices_data = self._get_indices_data()
+            if concurrent:
+                results, timings = self._fan_out(tasks, timeout if timeout is not None else self.overview_timeout)
+            else:
+                results, timings = self._run_sequential(tasks)
             
-            # Get market status (open/closed)
-            market_status = self._get_market_status()
+            return self.assemble_overview(results, timings)
             
+        except Exception as e:
+            print(f"Error in get_market_overview: {str(e)}")
+            return {}
+    
+    def overview_tasks(self) -> Dict[str, Callable[[], Any]]:
+        """The independent sub-queries making up the market overview"""
+        return {
+            # Get major indices data
+            'indices': self._get_indices_data,
+            # Get market status (open/closed)
+            'market_status': self._get_market_status,
             # Get crypto market data
-            crypto_data = self._get_crypto_market_data()
-            
+            'crypto': self._get_crypto_market_data,
             # Get market sentiment
-            market_sentiment = self._get_market_sentiment()
-            
+            'sentiment': self._get_market_sentiment,
             # Get top gainers and losers
-            gainers_losers = self._get_market_movers()
-            
-            return {
-                'indices': indices_data,
-                'market_status': market_status,
-                'crypto': crypto_data,
-                'sentiment': market_sentiment,
-                'gainers': gainers_losers.get('gainers', []),
-                'losers': gainers_losers.get('losers', []),
-                'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
+            'movers': self._get_market_movers,
+        }
+    
+    @staticmethod
+    def assemble_overview(results: Dict[str, Any], timings: Dict[str, float]) -> Dict[str, Any]:
+        """Market overview dict used by the templates, from the sub-query results"""
+        gainers_losers = results['movers']
+        
+        return {
+            'indices': results['indices'],
+            'market_status': results['market_status'],
+            'crypto': results['crypto'],
+            'sentiment': results['sentiment'],
+            'gainers': gainers_losers.get('gainers', []),
+            'losers': gainers_losers.get('losers', []),
+            'timings_ms': timings,
+            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    
+    def _run_sequential(self, tasks: Dict[str, Callable[[], Any]]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Run the overview sub-queries one after another, timing each"""
+        results, timings = {}, {}
+        for name, task in tasks.items():
+            started = time.perf_counter()
+            results[name] = task()
+            timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        return results, timings
+    
+    def _fan_out(self, tasks: Dict[str, Callable[[], Any]], timeout: float) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Run the overview sub-queries concurrently, on a pool of this call's
+        own with a thread per sub-query. Each one is given ``timeout``
+        seconds from when it starts running; late or failing ones are
+        replaced by their degraded shape. The pool is not waited on, so a
+        sub-query that overran finishes on its own thread without holding
+        up later calls.
+        """
+        started = time.perf_counter()
+        task_started: Dict[str, float] = {}
+        executor = ThreadPoolExecutor(max_workers=max(len(tasks), 1), thread_name_prefix='market-overview')
+        try:
+            futures = {name: executor.submit(self._timed, task, name, task_started) for name, task in tasks.items()}
             
-        except Exception as e:
-            print(f"Error in get_market_overview: {str(e)}")
-            return {}
+            results, timings = {}, {}
+            for name, future in futures.items():
+                try:
+                    deadline = task_started.get(name, time.perf_counter()) + timeout
+                    results[name], timings[name] = future.result(timeout=max(0, deadline - time.perf_counter()))
+                except FuturesTimeoutError:
+                    print(f"Timed out fetching {name} after {timeout}s")
+                    results[name] = self._degraded_overview_part(name, f"Timed out after {timeout}s")
+                    timings[name] = round((time.perf_counter() - started) * 1000, 1)
+                except Exception as e:
+                    print(f"Error fetching {name}: {str(e)}")
+                    results[name] = self._degraded_overview_part(name, str(e))
+                    timings[name] = round((time.perf_counter() - started) * 1000, 1)
+            return results, timings
+        finally:
+            executor.shutdown(wait=False)
+    
+    @staticmethod
+    def _timed(task: Callable[[], Any], name: str, task_started: Dict[str, float]) -> Tuple[Any, float]:
+        started = task_started[name] = time.perf_counter()
+        result = task()
+        return result, round((time.perf_counter() - started) * 1000, 1)
+    
+    def _degraded_overview_part(self, name: str, error: str) -> Any:
+        """Degraded result for an overview sub-query, matching what its helper returns on error"""
+        if name == 'indices':
+            return {index_name: self._degraded_index(ticker, error) for ticker, index_name in self.market_indices.items()}
+        if name == 'market_status':
+            return {'is_open': False, 'error': error}
+        if name == 'crypto':
+            return self._degraded_crypto(error)
+        if name == 'sentiment':
+            return self._degraded_sentiment(error)
+        return {'gainers': [], 'losers': [], 'error': error}
+    
+    @staticmethod
+    def _degraded_index(ticker: str, error: str) -> Dict[str, Any]:
+        return {
+            'price': 0,
+            'change': 0,
+            'change_percent': 0,
+            'is_positive': True,
+            'symbol': ticker,
+            'error': error
+        }
+    
+    @staticmethod
+    def _degraded_crypto(error: str) -> Dict[str, Any]:
+        return {
+            'total_market_cap': 0,
+            'btc_price': 0,
+            'btc_change': 0,
+            'btc_change_pct': 0,
+            'eth_price': 0,
+            'eth_change': 0,
+            'eth_change_pct': 0,
+            'is_positive': True,
+            'error': error
+        }
+    
+    @staticmethod
+    def _degraded_sentiment(error: str) -> Dict[str, Any]:
+        return {
+            'sentiment': 'neutral',
+            'sentiment_score': 0,
+            'vix': 20,
+            'error': error
+        }
     
     def _get_indices_data(self) -> Dict[str, Dict[str, Any]]:
         """Get data for major market indices"""
         indices_data = {}
+        quotes = quote_engine.get_quotes(self.market_indices.keys(), period='5d')
         
         for ticker, name in self.market_indices.items():
-            try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period='2d')
-                
-                if len(hist) >= 2:
-                    current = hist['Close'].iloc[-1]
-                    previous = hist['Close'].iloc[-2]
-                    change = current - previous
-                    change_percent = (change / previous) * 100 if previous != 0 else 0
-                    
-                    indices_data[name] = {
-                        'price': round(current, 2),
-                        'change': round(change, 2),
-                        'change_percent': round(change_percent, 2),
-                        'is_positive': change >= 0,
-                        'symbol': ticker
-                    }
-            except Exception as e:
-                print(f"Error fetching {name} data: {str(e)}")
-                indices_data[name] = {
-                    'price': 0,
-                    'change': 0,
-                    'change_percent': 0,
-                    'is_positive': True,
-                    'symbol': ticker,
-                    'error': str(e)
-                }
+            quote = quotes.get(ticker)
+            if quote is None:
+                print(f"Error fetching {name} data: no price history returned")
+                indices_data[name] = self._degraded_index(ticker, f"No price history returned for {ticker}")
+                continue
+            
+            indices_data[name] = {
+                'price': quote['price'],
+                'change': quote['change'],
+                'change_percent': quote['change_percent'],
+                'is_positive': quote['change'] >= 0,
+                'symbol': ticker
+            }
         
         return indices_data
     
@@ -197,7 +256,7 @@ class StockService:
         """Get current market status (open/closed)"""
         try:
             sp500 = yf.Ticker('^GSPC')
-            hist = sp500.history(period='1d')
+            hist = http_client.call('yfinance', sp500.history, period='1d')
             
             now = datetime.now()
             market_open = now.replace(hour=9, minute=30, second=0, microsecond=0)
@@ -219,57 +278,36 @@ class StockService:
         """Get cryptocurrency market data"""
         try:
             # Using yfinance for crypto data
-            btc = yf.Ticker('BTC-USD')
-            eth = yf.Ticker('ETH-USD')
-            
-            btc_hist = btc.history(period='2d')
-            eth_hist = eth.history(period='2d')
+            quotes = quote_engine.get_quotes(['BTC-USD', 'ETH-USD'], period='5d')
+            infos = quote_engine.get_infos(['BTC-USD', 'ETH-USD'])
             
-            def get_crypto_change(hist):
-                if len(hist) >= 2:
-                    current = hist['Close'].iloc[-1]
-                    previous = hist['Close'].iloc[-2]
-                    change = current - previous
-                    change_percent = (change / previous) * 100 if previous != 0 else 0
-                    return current, change, change_percent
-                return 0, 0, 0
-            
-            btc_price, btc_change, btc_change_pct = get_crypto_change(btc_hist)
-            eth_price, eth_change, eth_change_pct = get_crypto_change(eth_hist)
+            empty = {'price': 0, 'change': 0, 'change_percent': 0}
+            btc = quotes.get('BTC-USD', empty)
+            eth = quotes.get('ETH-USD', empty)
             
             # Get total crypto market cap (simplified)
-            total_market_cap = btc.info.get('marketCap', 0) + eth.info.get('marketCap', 0)
+            total_market_cap = infos['BTC-USD'].get('marketCap', 0) + infos['ETH-USD'].get('marketCap', 0)
             
             return {
                 'total_market_cap': round(total_market_cap / 1e12, 2),  # in trillions
-                'btc_price': round(btc_price, 2),
-                'btc_change': round(btc_change, 2),
-                'btc_change_pct': round(btc_change_pct, 2),
-                'eth_price': round(eth_price, 2),
-                'eth_change': round(eth_change, 2),
-                'eth_change_pct': round(eth_change_pct, 2),
-                'is_positive': btc_change_pct >= 0 or eth_change_pct >= 0
+                'btc_price': btc['price'],
+                'btc_change': btc['change'],
+                'btc_change_pct': btc['change_percent'],
+                'eth_price': eth['price'],
+                'eth_change': eth['change'],
+                'eth_change_pct': eth['change_percent'],
+                'is_positive': btc['change_percent'] >= 0 or eth['change_percent'] >= 0
             }
             
         except Exception as e:
             print(f"Error getting crypto data: {str(e)}")
-            return {
-                'total_market_cap': 0,
-                'btc_price': 0,
-                'btc_change': 0,
-                'btc_change_pct': 0,
-                'eth_price': 0,
-                'eth_change': 0,
-                'eth_change_pct': 0,
-                'is_positive': True,
-                'error': str(e)
-            }
+            return self._degraded_crypto(str(e))
     
     def _get_market_sentiment(self) -> Dict[str, Any]:
         """Get overall market sentiment"""
         try:
             vix = yf.Ticker('^VIX')
-            vix_data = vix.history(period='1d')
+            vix_data = http_client.call('yfinance', vix.history, period='1d')
             
             vix_current = vix_data['Close'].iloc[-1] if not vix_data.empty else 20
             
@@ -292,12 +330,7 @@ class StockService:
             
         except Exception as e:
             print(f"Error getting market sentiment: {str(e)}")
-            return {
-                'sentiment': 'neutral',
-                'sentiment_score': 0,
-                'vix': 20,
-                'error': str(e)
-            }
+            return self._degraded_sentiment(str(e))
     
     def _get_market_movers(self) -> Dict[str, List[Dict[str, Any]]]:
         """Get top market movers (gainers and losers)"""
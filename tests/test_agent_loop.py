@@ -0,0 +1,75 @@
+import asyncio
+import contextvars
+
+from flask import Flask, Response, jsonify
+
+from src.app.agent_loop import AgentLoop
+
+request_id = contextvars.ContextVar('request_id', default=None)
+
+
+def make_app(agent_loop):
+    app = Flask(__name__)
+    app.async_to_sync = agent_loop.async_to_sync
+    # Bound to the loop it is first waited on, like the OpenAI client's connections
+    ready = asyncio.Event()
+
+    @app.route('/chat', methods=['POST'])
+    async def chat():
+        asyncio.get_running_loop().call_soon(ready.set)
+        await ready.wait()
+        ready.clear()
+        return jsonify({'loop': id(asyncio.get_running_loop())})
+
+    @app.route('/stream')
+    def stream():
+        async def events():
+            request_id.set('r1')
+            for i in range(3):
+                await asyncio.sleep(0)
+                yield f"{i}:{request_id.get()}\n"
+
+        return Response(agent_loop.iterate(events()), mimetype='text/plain')
+
+    return app
+
+
+def test_async_views_share_one_loop_across_requests():
+    client = make_app(AgentLoop()).test_client()
+    first = client.post('/chat')
+    second = client.post('/chat')
+    assert first.status_code == second.status_code == 200
+    assert first.get_json()['loop'] == second.get_json()['loop']
+
+
+def test_iterate_keeps_the_generator_context_between_steps():
+    client = make_app(AgentLoop()).test_client()
+    assert client.get('/stream').get_data(as_text=True) == '0:r1\n1:r1\n2:r1\n'
+
+
+def test_iterate_closes_the_generator_when_the_consumer_stops():
+    closed = []
+
+    async def events():
+        try:
+            while True:
+                yield 'event'
+        finally:
+            closed.append(True)
+
+    stream = AgentLoop().iterate(events())
+    assert next(stream) == 'event'
+    stream.close()
+    assert closed == [True]
+
+
+def test_attach_uses_the_running_loop():
+    agent_loop = AgentLoop()
+
+    async def main():
+        agent_loop.attach(asyncio.get_running_loop())
+        return agent_loop.loop is asyncio.get_running_loop()
+
+    assert asyncio.run(main())
+    # A closed loop gives way to the next one
+    assert asyncio.run(main())
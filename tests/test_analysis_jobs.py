@@ -0,0 +1,121 @@
+import time
+
+import pytest
+from flask import Flask
+
+from src.app.analysis_jobs import PRIORITY_REFRESH, PRIORITY_WATCHLIST, AnalysisJobQueue, QueueFull, analysis_state
+from src.app.cache import cache
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        CACHE_TYPE='src.app.sqlite_cache.SQLiteCache',
+        CACHE_DIR=str(tmp_path),
+        CACHE_THRESHOLD=100,
+        ANALYSIS_WORKERS=1,
+        ANALYSIS_QUEUE_LIMIT=2,
+        ANALYSIS_JOB_TIMEOUT=60,
+    )
+    cache.init_app(app)
+    with app.app_context():
+        yield app
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_submit_deduplicates_and_moves_up(app):
+    queue = AnalysisJobQueue(max_queued=5)
+    queue.submit('aapl', priority=PRIORITY_REFRESH)
+    job = queue.submit('AAPL', priority=PRIORITY_WATCHLIST)
+    assert job['status'] == 'queued'
+    assert job['priority'] == PRIORITY_WATCHLIST
+    assert list(queue._jobs) == ['AAPL']
+
+
+def test_queue_limit(app):
+    queue = AnalysisJobQueue(max_queued=2)
+    queue.submit('AAPL')
+    queue.submit('MSFT')
+    with pytest.raises(QueueFull):
+        queue.submit('NVDA')
+
+
+def test_symbol_locked_by_another_process(app):
+    ours, theirs = AnalysisJobQueue(), AnalysisJobQueue()
+    theirs.submit('NVDA')
+    job = ours.submit('NVDA')
+    assert job['status'] == 'queued'
+    assert 'NVDA' not in ours._jobs
+
+
+def test_newer_job_of_another_process_wins_over_finished_local_one(app):
+    queue = AnalysisJobQueue()
+    queue._jobs['NVDA'] = {
+        'symbol': 'NVDA', 'status': 'done', 'priority': 1, 'enqueued_at': 100.0,
+        'started_at': 101.0, 'finished_at': 102.0, 'error': None,
+    }
+    cache.set('analysis_job:NVDA', {
+        'symbol': 'NVDA', 'status': 'running', 'priority': 1, 'enqueued_at': 200.0,
+        'started_at': 201.0, 'finished_at': None, 'error': None,
+    })
+    job = queue.status('NVDA')
+    assert job['status'] == 'running'
+    assert analysis_state(job, has_analysis=False) == 'running'
+
+
+def test_done_is_only_reported_with_an_analysis():
+    assert analysis_state({'status': 'done'}, has_analysis=False) == 'missing'
+    assert analysis_state({'status': 'done'}, has_analysis=True) == 'done'
+    assert analysis_state({'status': 'failed'}, has_analysis=False) == 'failed'
+    assert analysis_state(None, has_analysis=False) == 'missing'
+
+
+def test_worker_survives_a_cache_error_and_releases_the_lock(app):
+    queue = AnalysisJobQueue()
+    ran = []
+    save = queue._save
+    failed = []
+
+    def flaky_save(job):
+        # The worker's first save, when the job starts running, fails once
+        if job['status'] == 'running' and not failed:
+            failed.append(job['symbol'])
+            raise OSError('disk full')
+        save(job)
+
+    queue._save = flaky_save
+    queue.start(app, ran.append)
+
+    queue.submit('AAPL')
+    wait_for(lambda: queue._jobs['AAPL']['status'] == 'failed')
+    assert 'disk full' in queue._jobs['AAPL']['error']
+    wait_for(lambda: queue.acquire('AAPL'))
+    queue.release('AAPL')
+
+    queue.submit('MSFT')
+    wait_for(lambda: queue._jobs['MSFT']['status'] == 'done')
+    assert ran == ['MSFT']
+
+
+def finished_job(symbol, finished_at):
+    return {
+        'symbol': symbol, 'status': 'done', 'priority': 1, 'enqueued_at': finished_at - 2,
+        'started_at': finished_at - 1, 'finished_at': finished_at, 'error': None,
+    }
+
+
+def test_finished_jobs_are_pruned_after_ttl_and_beyond_the_cap(app):
+    queue = AnalysisJobQueue(record_ttl=60, max_records=3)
+    now = time.time()
+    queue._jobs['OLD'] = finished_job('OLD', now - 120)
+    for i, symbol in enumerate(['A', 'B', 'C']):
+        queue._jobs[symbol] = finished_job(symbol, now - 10 + i)
+    queue.submit('NEW')
+    assert sorted(queue._jobs) == ['B', 'C', 'NEW']
@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import Flask, Response, jsonify, request
+
+from src.app import asgi
+from src.app.agent_loop import AgentLoop
+from src.app.asgi import AsgiApp
+
+
+class Events:
+    def __init__(self, count, delay=0.0):
+        self.count = count
+        self.delay = delay
+        self.closed = False
+
+    async def __aiter__(self):
+        try:
+            for i in range(self.count):
+                await asyncio.sleep(self.delay)
+                yield f"data: {i}\n\n"
+        finally:
+            self.closed = True
+
+    def __iter__(self):
+        raise AssertionError('streamed through WSGI')
+
+
+def make_app(events):
+    app = Flask(__name__)
+
+    @app.route('/api/chat', methods=['POST'])
+    async def chat():
+        data = request.get_json()
+        if not data.get('message'):
+            return jsonify({'error': 'Empty message'}), 400
+        await asyncio.sleep(0.2)
+        return jsonify({'response': data['message'], 'trace': request.args.get('trace')})
+
+    @app.route('/api/chat/stream', methods=['POST'])
+    async def chat_stream():
+        return Response(events, mimetype='text/event-stream')
+
+    @app.route('/health')
+    def health():
+        return jsonify({'status': 'healthy'})
+
+    return app
+
+
+async def call(app, method, path, body=b'', query=b'', disconnect_after=None):
+    sent = []
+    received = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    disconnect = asyncio.Event()
+
+    async def receive():
+        if received:
+            return received.pop(0)
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+        chunks = [m for m in sent if m['type'] == 'http.response.body']
+        if disconnect_after is not None and len(chunks) >= disconnect_after:
+            disconnect.set()
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method, 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': query,
+        'headers': [(b'host', b'testserver'), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())],
+        'client': ('127.0.0.1', 5000), 'server': ('testserver', 80),
+    }
+    await app(scope, receive, send)
+    status = next(m['status'] for m in sent if m['type'] == 'http.response.start')
+    return status, b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+
+
+def make_asgi(monkeypatch, events=None):
+    monkeypatch.setattr(asgi, 'agent_loop', AgentLoop())
+    flask_app = make_app(events or Events(0))
+    return AsgiApp(flask_app, WsgiToAsgi(flask_app))
+
+
+def test_async_views_run_concurrently_on_the_server_loop(monkeypatch):
+    app = make_asgi(monkeypatch)
+
+    async def main():
+        started = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*(
+            call(app, 'POST', '/api/chat', json.dumps({'message': f"m{i}"}).encode(), b'trace=1')
+            for i in range(20)
+        ))
+        return results, asyncio.get_running_loop().time() - started
+
+    results, elapsed = asyncio.run(main())
+    assert elapsed < 1.0
+    assert [json.loads(body) for _, body in results] == [{'response': f"m{i}", 'trace': '1'} for i in range(20)]
+    assert all(status == 200 for status, _ in results)
+
+
+def test_validation_errors_come_from_the_view(monkeypatch):
+    app = make_asgi(monkeypatch)
+    status, body = asyncio.run(call(app, 'POST', '/api/chat', b'{}'))
+    assert status == 400 and json.loads(body) == {'error': 'Empty message'}
+
+
+def test_other_routes_go_through_wsgi(monkeypatch):
+    app = make_asgi(monkeypatch)
+    assert app.async_view({'type': 'http', 'path': '/health', 'method': 'GET'}) is None
+    assert app.async_view({'type': 'http', 'path': '/api/chat', 'method': 'GET'}) is None
+    status, body = asyncio.run(call(app, 'GET', '/health'))
+    assert status == 200 and json.loads(body) == {'status': 'healthy'}
+
+
+def test_event_stream_is_sent_natively(monkeypatch):
+    events = Events(3)
+    app = make_asgi(monkeypatch, events)
+    status, body = asyncio.run(call(app, 'POST', '/api/chat/stream'))
+    assert status == 200
+    assert body == b'data: 0\n\ndata: 1\n\ndata: 2\n\n'
+    assert events.closed
+
+
+def test_event_stream_stops_when_the_client_disconnects(monkeypatch):
+    events = Events(1000, delay=0.01)
+    app = make_asgi(monkeypatch, events)
+    status, body = asyncio.run(asyncio.wait_for(call(app, 'POST', '/api/chat/stream', disconnect_after=3), 5))
+    assert status == 200
+    assert body.count(b'data:') < 10
+    assert events.closed
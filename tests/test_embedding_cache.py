@@ -0,0 +1,47 @@
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from src.agent.embedding_cache import CachedEmbeddings
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.requests.append(len(texts))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        with self._lock:
+            self.in_flight -= 1
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_misses_are_split_into_concurrent_requests(tmp_path):
+    model = FakeEmbeddings()
+    embeddings = CachedEmbeddings(model, str(tmp_path / 'embeddings.sqlite3'), 'fake', batch_size=64, max_concurrency=4)
+    texts = [f'chunk {i}' for i in range(256)]
+
+    vectors = embeddings.embed_documents(texts)
+    assert vectors[10] == [float(len('chunk 10')), 1.0]
+    assert model.requests == [64] * 4
+    assert model.max_in_flight == 4
+
+
+def test_repeated_texts_are_embedded_once(tmp_path):
+    model = FakeEmbeddings()
+    embeddings = CachedEmbeddings(model, str(tmp_path / 'embeddings.sqlite3'), 'fake')
+    embeddings.embed_documents(['a', 'b', 'a'])
+    assert embeddings.embed_query('b') == [1.0, 1.0]
+    assert model.requests == [2]
+    assert embeddings.stats() == {'hits': 2, 'misses': 2}
@@ -0,0 +1,119 @@
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agent.financials import DEFAULT_LINE_ITEMS, FinancialSerializer, count_tokens
+from src.services.price_history import BAR_DTYPE, PriceHistoryStore
+
+PERIODS = pd.to_datetime(['2025-09-30', '2024-09-30', '2023-09-30', '2022-09-30', '2021-09-30'])
+
+
+def statement(values, extra_rows=0):
+    """A yfinance statement: line items as rows, fiscal years as columns (newest first)"""
+    rows = dict(values)
+    # yfinance statements carry dozens of other line items
+    for i in range(extra_rows):
+        rows[f"Other Item {i}"] = [1.5e9 + i] * len(PERIODS)
+    return pd.DataFrame.from_dict(rows, orient='index', columns=PERIODS)
+
+
+class FakeTicker:
+    ticker = 'AAPL'
+
+    def __init__(self):
+        self.income_stmt = self.financials = statement({
+            'Total Revenue': [416.16e9, 391.035e9, 383.285e9, 394.328e9, np.nan],
+            'Net Income': [112.01e9, 93.736e9, 96.995e9, 99.803e9, np.nan],
+            'Diluted EPS': [7.46, 6.08, 6.13, 6.11, np.nan],
+            'EBITDA': [np.nan] * 5,
+        }, extra_rows=40)
+        self.cash_flow = statement({
+            'Free Cash Flow': [98.767e9, 108.807e9, 99.584e9, 111.443e9, np.nan],
+            'Capital Expenditure': [-12.715e9, -9.447e9, -10.959e9, -10.708e9, np.nan],
+        }, extra_rows=40)
+        self.balance_sheet = statement({'Total Debt': [98.657e9, 106.629e9, 111.088e9, 132.48e9, np.nan]},
+                                       extra_rows=60)
+
+    def history(self, period):
+        dates = pd.bdate_range(end='2026-01-30', periods=21)
+        return pd.DataFrame({'Open': 250.0, 'High': 252.0, 'Low': 248.0, 'Close': 251.0, 'Volume': 45_123_456.0,
+                             'Dividends': 0.0, 'Stock Splits': 0.0}, index=dates)
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    store = PriceHistoryStore(str(tmp_path))
+    bars = np.zeros(2, dtype=BAR_DTYPE)
+    bars['date'] = np.array(['2026-01-29', '2026-01-30'], dtype='datetime64[D]')
+    bars['close'] = [251.234, 252.5]
+    bars['volume'] = [45_123_456, 1_250_000]
+    store._write('AAPL', bars)
+    monkeypatch.setattr('src.services.price_history.price_history', store)
+    return store
+
+
+def test_csv_keeps_configured_items_scaled_per_row(history):
+    data = FinancialSerializer(periods=4).serialize(FakeTicker())
+    assert data == (
+        "income_statement:\n"
+        "item,unit,2025-09-30,2024-09-30,2023-09-30,2022-09-30\n"
+        "Total Revenue,B,416.16,391.04,383.29,394.33\n"
+        "Net Income,B,112.01,93.74,97,99.8\n"
+        "Diluted EPS,,7.46,6.08,6.13,6.11\n"
+        "\n"
+        "cash_flow:\n"
+        "item,unit,2025-09-30,2024-09-30,2023-09-30,2022-09-30\n"
+        "Capital Expenditure,B,-12.71,-9.45,-10.96,-10.71\n"
+        "Free Cash Flow,B,98.77,108.81,99.58,111.44\n"
+        "\n"
+        "balance_sheet:\n"
+        "item,unit,2025-09-30,2024-09-30,2023-09-30,2022-09-30\n"
+        "Total Debt,B,98.66,106.63,111.09,132.48\n"
+        "\n"
+        "price_history:\n"
+        "date,close,volume\n"
+        "2026-01-29,251.23,45.12M\n"
+        "2026-01-30,252.50,1.25M"
+    )
+
+
+def test_json_format(history):
+    payload = json.loads(FinancialSerializer(periods=2, fmt='json').serialize(FakeTicker()))
+    assert payload['income_statement'] == {
+        'periods': ['2025-09-30', '2024-09-30'],
+        'items': {'Total Revenue': ['B', '416.16', '391.04'], 'Net Income': ['B', '112.01', '93.74'],
+                  'Diluted EPS': ['', '7.46', '6.08']},
+    }
+    assert payload['price_history'] == [['2026-01-29', '251.23', '45.12M'], ['2026-01-30', '252.50', '1.25M']]
+
+
+def test_env_configuration(monkeypatch):
+    monkeypatch.setenv('FINANCIAL_LINE_ITEMS', 'Total Revenue, Total Debt')
+    monkeypatch.setenv('FINANCIAL_PERIODS', '2')
+    monkeypatch.setenv('FINANCIAL_FORMAT', 'json')
+    serializer = FinancialSerializer.from_env()
+    assert (serializer.periods, serializer.fmt) == (2, 'json')
+    assert serializer.line_items['cash_flow'] == ['Total Revenue', 'Total Debt']
+
+    monkeypatch.delenv('FINANCIAL_LINE_ITEMS')
+    assert FinancialSerializer.from_env().line_items == DEFAULT_LINE_ITEMS
+    with pytest.raises(ValueError):
+        FinancialSerializer(fmt='xml')
+
+
+def test_count_tokens_estimates_without_tiktoken(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'tiktoken', None)
+    assert count_tokens('x' * 400) == 100
+
+
+def test_far_fewer_tokens_than_the_raw_statements(history):
+    stock = FakeTicker()
+    # What get_financial_data used to send: the statements' default string rendering
+    raw = (f"'income_statement':\n{stock.income_stmt}\n'cash_flow':\n{stock.cash_flow}\n"
+           f"'balance_sheet':\n{stock.balance_sheet}\n'financials':\n{stock.financials}\n"
+           f"'historical_month_data':\n{stock.history(period='1mo')}")
+    compact = FinancialSerializer().serialize(stock)
+    assert count_tokens(compact) * 5 < count_tokens(raw)
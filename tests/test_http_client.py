@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from src.services.http_client import CircuitBreaker, HttpClient, TokenBucket, Upstream, UpstreamUnavailable
+
+
+def test_aclose_drops_the_client_of_the_loop():
+    client = HttpClient()
+
+    async def request():
+        client.async_client()
+        await client.aclose()
+
+    for _ in range(3):
+        asyncio.run(request())
+    assert len(client._async_clients) == 0
+
+
+def test_clients_of_closed_loops_are_dropped():
+    client = HttpClient()
+
+    async def request():
+        return client.async_client()
+
+    loops = [asyncio.new_event_loop() for _ in range(3)]
+    for loop in loops:
+        loop.run_until_complete(request())
+        loop.close()
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(request())
+        assert list(client._async_clients) == [loop]
+    finally:
+        loop.close()
+
+
+def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == 'half-open'
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial call at a time
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.failures == 0
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=20, capacity=2)
+    assert bucket.acquire(0) and bucket.acquire(0)
+    assert not bucket.acquire(0.01)
+    started = time.monotonic()
+    assert bucket.acquire(1)
+    assert 0.02 <= time.monotonic() - started < 0.2
+
+
+def test_retries_with_backoff_then_raises(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, 'sleep', sleeps.append)
+    monkeypatch.setattr('random.uniform', lambda low, high: high)
+    upstream = Upstream('test', rate=100, burst=10, retries=2, backoff=0.5, failure_threshold=10)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise requests.ConnectionError('down')
+
+    with pytest.raises(requests.ConnectionError):
+        upstream.call(fail)
+    assert len(calls) == 3
+    assert sleeps == [0.5, 1.0]
+    assert upstream.breaker.failures == 3
+
+
+def test_unexpected_exception_in_trial_reopens_the_circuit():
+    upstream = Upstream('test', rate=100, burst=10, retries=0, failure_threshold=1, reset_timeout=0.05)
+    with pytest.raises(requests.ConnectionError):
+        upstream.call(lambda: (_ for _ in ()).throw(requests.ConnectionError()))
+    time.sleep(0.06)
+    with pytest.raises(KeyError):
+        upstream.call(lambda: {}['missing'])
+    assert upstream.breaker.state == 'open'
+    time.sleep(0.06)
+    assert upstream.call(lambda: 'ok') == 'ok'
+    assert upstream.breaker.state == 'closed'
+
+
+def test_denied_token_does_not_hold_the_trial():
+    upstream = Upstream('test', rate=0.001, burst=1, retries=0, max_wait=0,
+                        failure_threshold=1, reset_timeout=0.05)
+    with pytest.raises(requests.ConnectionError):
+        upstream.call(lambda: (_ for _ in ()).throw(requests.ConnectionError()))
+    time.sleep(0.06)
+    with pytest.raises(UpstreamUnavailable, match='rate limit'):
+        upstream.call(lambda: 'ok')
+    assert upstream.breaker.allow()
@@ -0,0 +1,84 @@
+import uuid
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.agent import instrumentation
+from src.agent.instrumentation import Metrics, instrument, record_tool_output
+
+
+def llm_result(prompt_tokens, completion_tokens):
+    message = AIMessage(content='ok', usage_metadata={
+        'input_tokens': prompt_tokens, 'output_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens,
+    })
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+
+def test_callbacks_end_up_in_the_metrics(monkeypatch):
+    metrics = Metrics()
+    monkeypatch.setattr(instrumentation, 'metrics', metrics)
+
+    with instrument('chat') as trace:
+        handler = trace.handler
+        node, inner, llm, failed_llm, tool, failed_tool = (uuid.uuid4() for _ in range(6))
+        node_meta = {'langgraph_checkpoint_ns': 'stock_agent:1', 'langgraph_node': 'stock_agent'}
+        inner_meta = {'langgraph_checkpoint_ns': 'stock_agent:1|agent:2', 'langgraph_node': 'agent',
+                      'ls_model_name': 'gpt-4.1'}
+
+        handler.on_chain_start({}, {}, run_id=node, metadata=node_meta, name='stock_agent')
+        # Inner steps of the node are not nodes of their own
+        handler.on_chain_start({}, {}, run_id=inner, metadata=inner_meta, name='agent')
+        handler.on_chat_model_start({}, [[]], run_id=llm, metadata=inner_meta)
+        handler.on_llm_end(llm_result(120, 30), run_id=llm)
+        handler.on_chat_model_start({}, [[]], run_id=failed_llm, metadata=inner_meta)
+        handler.on_llm_error(RuntimeError('429'), run_id=failed_llm)
+        handler.on_tool_start({'name': 'get_stock_data'}, 'AAPL', run_id=tool, metadata=inner_meta)
+        handler.on_tool_end('{}', run_id=tool)
+        handler.on_tool_start({'name': 'get_news_articles'}, 'AAPL', run_id=failed_tool, metadata=inner_meta)
+        handler.on_tool_error(ValueError('no key'), run_id=failed_tool)
+        record_tool_output('get_stock_data', 850)
+        handler.on_chain_end({}, run_id=inner)
+        handler.on_chain_end({}, run_id=node)
+
+    samples = {}
+    for line in metrics.render().splitlines():
+        if not line.startswith('#'):
+            sample, value = line.rsplit(' ', 1)
+            samples[sample] = value
+
+    llm_labels = 'agent="stock_agent",model="gpt-4.1"'
+    assert samples['investiq_pipeline_runs_total{pipeline="chat"}'] == '1'
+    assert samples['investiq_node_duration_seconds_count{node="stock_agent"}'] == '1'
+    assert samples[f'investiq_llm_calls_total{{{llm_labels}}}'] == '2'
+    assert samples[f'investiq_llm_errors_total{{{llm_labels}}}'] == '1'
+    assert samples[f'investiq_llm_tokens_total{{{llm_labels},type="prompt"}}'] == '120'
+    assert samples[f'investiq_llm_tokens_total{{{llm_labels},type="completion"}}'] == '30'
+    assert samples['investiq_tool_calls_total{agent="stock_agent",tool="get_stock_data"}'] == '1'
+    assert samples['investiq_tool_calls_total{agent="stock_agent",tool="get_news_articles"}'] == '1'
+    assert samples['investiq_tool_errors_total{agent="stock_agent",tool="get_news_articles"}'] == '1'
+    assert 'investiq_tool_errors_total{agent="stock_agent",tool="get_stock_data"}' not in samples
+    assert samples['investiq_tool_output_tokens_total{tool="get_stock_data"}'] == '850'
+    assert not any(name.startswith('investiq_node_duration_seconds_count{node="agent"') for name in samples)
+
+    assert trace.to_dict()['prompt_tokens'] == 120
+    assert [node['node'] for node in trace.to_dict()['nodes']] == ['stock_agent']
+
+
+def test_nested_instrument_blocks_count_one_run(monkeypatch):
+    metrics = Metrics()
+    monkeypatch.setattr(instrumentation, 'metrics', metrics)
+    with instrument('rag_query') as outer:
+        with instrument('supervisor') as inner:
+            assert inner is outer
+    assert 'investiq_pipeline_runs_total{pipeline="rag_query"} 1' in metrics.render().splitlines()
+    assert 'pipeline="supervisor"' not in metrics.render()
+
+
+def test_label_values_are_escaped():
+    metrics = Metrics()
+    trace = instrumentation.Trace('chat')
+    trace.add_tool_call('agent', 'say "hi"\n', 0.5)
+    trace.duration = 1.0
+    metrics.observe(trace)
+    assert 'investiq_tool_calls_total{agent="agent",tool="say \\"hi\\"\\n"} 1' in metrics.render()
@@ -0,0 +1,46 @@
+import pytest
+from flask import Flask
+
+from src.app.cache import cache
+from src.app.market_refresher import MarketDataRefresher
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        CACHE_TYPE='src.app.sqlite_cache.SQLiteCache',
+        CACHE_DIR=str(tmp_path),
+        CACHE_THRESHOLD=100,
+    )
+    cache.init_app(app)
+    return app
+
+
+def refresher(app, fetch):
+    refresher = MarketDataRefresher()
+    refresher._app = app
+    refresher._jobs = {'indices': (fetch, 60), 'news': (lambda: [], 60)}
+    return refresher
+
+
+def test_other_processes_pick_up_a_refresh(app):
+    ours, theirs = refresher(app, lambda: {'S&P': 1}), refresher(app, lambda: {'S&P': 2})
+    ours._refresh('indices')
+    # The part is locked for its interval, so the other process doesn't fetch it again
+    theirs._refresh('indices')
+    theirs._sync()
+    assert theirs.snapshot()['indices']['data'] == {'S&P': 1}
+    assert 'indices' not in theirs._in_flight
+
+
+def test_sync_skips_reading_parts_while_the_stamp_is_unchanged(app):
+    ours, theirs = refresher(app, lambda: {'S&P': 1}), refresher(app, lambda: {'S&P': 1})
+    ours._refresh('indices')
+    theirs._sync()
+    with app.app_context():
+        reads = cache.cache.stats()['hits']
+    theirs._sync()
+    with app.app_context():
+        # Only the stamp was read
+        assert cache.cache.stats()['hits'] == reads + 1
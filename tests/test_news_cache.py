@@ -0,0 +1,79 @@
+import threading
+import time
+
+from src.services.news_cache import NewsCache, normalize_query
+
+
+def article(url, title='Title'):
+    return {'title': title, 'description': 'About it', 'url': url, 'source': {'name': 'Wire'},
+            'publishedAt': '2026-01-05T10:00:00Z', 'urlToImage': None}
+
+
+def test_keyword_queries_normalize_to_the_same_search():
+    assert normalize_query('Stock  AAPL') == normalize_query('aapl stock') == 'aapl stock'
+    assert normalize_query('AAPL AND stock') == 'aapl AND stock'
+    assert normalize_query('stock AND AAPL') != normalize_query('AAPL AND stock')
+    assert normalize_query('"Apple Inc" earnings') == '"apple inc" earnings'
+    assert NewsCache.key('Stock AAPL', domains='Reuters.com, bloomberg.com') == \
+        NewsCache.key('aapl stock', domains='bloomberg.com,reuters.com')
+
+
+def test_articles_are_stored_once_by_url(monkeypatch):
+    news = NewsCache()
+    responses = {
+        'aapl': [article('https://a/1'), article('https://a/1'), article(''), article('https://a/2')],
+        'msft': [article('https://a/2'), article('https://a/3')],
+    }
+    monkeypatch.setattr(news, '_fetch', lambda key, page_size: responses[key[0]])
+
+    assert [a['url'] for a in news.search('AAPL')] == ['https://a/1', 'https://a/2']
+    assert [a['url'] for a in news.search('MSFT')] == ['https://a/2', 'https://a/3']
+    assert news.stats()['articles'] == 3
+    assert news.search('aapl', page_size=1)[0] == {
+        'title': 'Title', 'description': 'About it', 'url': 'https://a/1', 'source': 'Wire',
+        'published_at': '2026-01-05T10:00:00Z', 'image_url': '',
+    }
+    assert (news.hits, news.misses) == (1, 2)
+
+
+def test_expired_searches_and_their_articles_are_evicted(monkeypatch):
+    news = NewsCache(ttl=60)
+    calls = []
+    monkeypatch.setattr(news, '_fetch', lambda key, page_size: calls.append(key) or [article(f"https://{key[0]}")])
+    now = [1000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+
+    news.search('aapl')
+    news.search('aapl')
+    assert len(calls) == 1
+    now[0] += 61
+    news.search('msft')
+    assert news.stats()['searches'] == 1 and news.stats()['articles'] == 1
+    news.search('aapl')
+    assert len(calls) == 3
+
+
+def test_concurrent_misses_share_one_request(monkeypatch):
+    news = NewsCache()
+    calls = []
+    started = threading.Event()
+
+    def fetch(key, page_size):
+        calls.append(key)
+        started.set()
+        time.sleep(0.1)
+        return [article('https://a/1')]
+
+    monkeypatch.setattr(news, '_fetch', fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(news.search('AAPL stock'))) for _ in range(8)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8 and all(len(result) == 1 for result in results)
+    assert not news._fetching
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services import price_history as price_history_module
+from src.services.price_history import PriceHistoryStore
+
+
+def frame(symbols, dates, closes):
+    """A yf.download(group_by='column') result: (field, symbol) columns"""
+    columns = pd.MultiIndex.from_product([['Open', 'High', 'Low', 'Close', 'Volume'], symbols])
+    index = pd.DatetimeIndex(pd.to_datetime(dates), name='Date')
+    data = {}
+    for symbol in symbols:
+        close = np.asarray(closes[symbol], dtype=float)
+        data.update({
+            ('Open', symbol): close - 0.5, ('High', symbol): close + 1,
+            ('Low', symbol): close - 1, ('Close', symbol): close, ('Volume', symbol): np.full(len(close), 1000.0),
+        })
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Stubbed yf.download answering from a queue of frames, recording each call"""
+    calls, responses = [], []
+
+    def download(tickers, **kwargs):
+        calls.append((list(tickers), kwargs))
+        return responses.pop(0)
+
+    monkeypatch.setattr(price_history_module.yf, 'download', download)
+    return calls, responses
+
+
+def test_first_fetch_downloads_the_initial_period(tmp_path, downloads):
+    calls, responses = downloads
+    store = PriceHistoryStore(str(tmp_path), initial_period='1y')
+    responses.append(frame(['AAPL', 'MSFT'], ['2026-01-05', '2026-01-06'], {'AAPL': [10, 11], 'MSFT': [20, 21]}))
+
+    store.update(['aapl', 'MSFT'])
+
+    assert calls[0][0] == ['AAPL', 'MSFT'] and calls[0][1]['period'] == '1y'
+    assert list(store.history('AAPL')['close']) == [10, 11]
+    assert list(store.history('MSFT')['date'].astype(str)) == ['2026-01-05', '2026-01-06']
+
+
+def test_incremental_update_replaces_the_last_bar(tmp_path, downloads):
+    calls, responses = downloads
+    store = PriceHistoryStore(str(tmp_path))
+    responses.append(frame(['AAPL'], ['2026-01-05', '2026-01-06'], {'AAPL': [10, 11]}))
+    store.update(['AAPL'])
+
+    # The stored 2026-01-06 bar was an intraday snapshot
+    responses.append(frame(['AAPL'], ['2026-01-06', '2026-01-07'], {'AAPL': [12, 13]}))
+    store.update(['AAPL'], force=True)
+
+    assert calls[1][1]['start'] == '2026-01-06' and 'period' not in calls[1][1]
+    bars = store.history('AAPL')
+    assert list(bars['date'].astype(str)) == ['2026-01-05', '2026-01-06', '2026-01-07']
+    assert list(bars['close']) == [10, 12, 13]
+
+
+def test_fresh_symbols_are_not_fetched(tmp_path, downloads):
+    calls, responses = downloads
+    store = PriceHistoryStore(str(tmp_path), refresh_interval=900)
+    responses.append(frame(['AAPL'], ['2026-01-05'], {'AAPL': [10]}))
+    store.update(['AAPL'])
+    store.update(['AAPL'])
+    # Another process sees the file's modification time
+    PriceHistoryStore(str(tmp_path), refresh_interval=900).update(['AAPL'])
+    assert len(calls) == 1
+
+
+def test_quote_range_follows_the_period(tmp_path, downloads):
+    calls, responses = downloads
+    store = PriceHistoryStore(str(tmp_path))
+    dates = pd.bdate_range(end='2026-01-30', periods=300)
+    closes = np.linspace(100, 399, 300)
+    responses.append(frame(['AAPL'], dates, {'AAPL': closes}))
+
+    quotes_5d = store.get_quotes(['AAPL'], period='5d')['AAPL']
+    quotes_1y = store.get_quotes(['AAPL'], period='1y')['AAPL']
+
+    assert len(calls) == 1
+    assert quotes_5d['price'] == quotes_1y['price'] == 399.0
+    assert quotes_5d['previous_close'] == 398.0 and quotes_5d['change'] == 1.0
+    # Five trading bars for 5d; a year of calendar days (about 262 bars) for 1y
+    assert (quotes_5d['week52_high'], quotes_5d['week52_low']) == (400.0, 394.0)
+    year_start = closes[dates >= dates[-1] - pd.Timedelta(days=365)][0]
+    assert quotes_1y['week52_low'] == round(year_start - 1, 2)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from src.agent.retrieval import VectorSearchEngine
+
+
+def normalized(rows, dim=8, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def segments(tmp_path, sizes):
+    result = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f'{i}.npy'
+        np.save(path, normalized(size, seed=i))
+        records = [{'metadata': {'source': f'/data/file{i}.pdf', 'page': row % 5}} for row in range(size)]
+        result.append((np.load(path, mmap_mode='r'), records))
+    return result
+
+
+def brute_force(engine_segments, queries, k, keep=lambda metadata: True):
+    matrix = np.concatenate([vectors for vectors, _ in engine_segments])
+    metadata = [record['metadata'] for _, records in engine_segments for record in records]
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    results = []
+    for scores in queries @ matrix.T:
+        rows = [row for row in np.argsort(-scores) if keep(metadata[row])][:k]
+        results.append(rows)
+    return results
+
+
+def test_segments_are_searched_in_place(tmp_path):
+    engine_segments = segments(tmp_path, [30, 0, 7, 50])
+    engine = VectorSearchEngine.from_segments(engine_segments)
+    assert len(engine) == 87
+    non_empty = [vectors for vectors, _ in engine_segments if len(vectors)]
+    assert all(np.shares_memory(segment, vectors) for segment, vectors in zip(engine.segments, non_empty))
+
+    queries = normalized(4, seed=99)
+    hits = engine.search(queries, k=5)
+    assert [[row for row, _ in query_hits] for query_hits in hits] == brute_force(engine_segments, queries, 5)
+    assert all(a[1] >= b[1] for query_hits in hits for a, b in zip(query_hits, query_hits[1:]))
+
+
+def test_filters_apply_across_segments(tmp_path):
+    engine_segments = segments(tmp_path, [30, 7, 50])
+    engine = VectorSearchEngine.from_segments(engine_segments)
+    queries = normalized(3, seed=42)
+
+    hits = engine.search(queries, k=4, sources=['file0.pdf', 'file2.pdf'], page_range=(1, 2))
+    expected = brute_force(
+        engine_segments, queries, 4,
+        keep=lambda metadata: metadata['source'] != '/data/file1.pdf' and 1 <= metadata['page'] <= 2,
+    )
+    assert [[row for row, _ in query_hits] for query_hits in hits] == expected
+    assert engine.search(queries, k=4, sources=['missing.pdf']) == [[], [], []]
+
+
+def test_k_larger_than_the_index(tmp_path):
+    engine = VectorSearchEngine.from_segments(segments(tmp_path, [2, 1]))
+    assert len(engine.search(normalized(1, seed=5)[0], k=10)[0]) == 3
+    assert VectorSearchEngine.from_segments([]).search(normalized(1), k=3) == [[]]
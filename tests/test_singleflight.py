@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+from flask_caching import Cache
+
+from src.app.singleflight import SingleFlight
+
+
+@pytest.fixture
+def shared_cache(tmp_path):
+    app = Flask(__name__)
+    cache = Cache(app, config={
+        'CACHE_TYPE': 'src.app.sqlite_cache.SQLiteCache',
+        'CACHE_DIR': str(tmp_path),
+        'CACHE_THRESHOLD': 100,
+    })
+    with app.app_context():
+        yield cache
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def compute():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert runs == [1]
+    assert results == ['value'] * 5
+    assert not flight._calls
+
+
+def test_waiters_get_the_leaders_error():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise ValueError('boom')
+
+    errors = []
+
+    def call():
+        try:
+            flight.do('k', compute)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    waiter = threading.Thread(target=call)
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    waiter.join()
+
+    assert errors == ['boom', 'boom']
+
+
+def test_waits_for_another_process_instead_of_computing(shared_cache):
+    flight = SingleFlight(poll_interval=0.05)
+    # Another worker holds the lock and stores the value a moment later
+    assert shared_cache.add('k:inflight', 12345, timeout=60)
+    threading.Timer(0.2, lambda: shared_cache.set('k', 'theirs')).start()
+
+    assert flight.do('k', lambda: 'ours', cache=shared_cache) == 'theirs'
+
+
+def test_leader_releases_the_cross_process_lock(shared_cache):
+    flight = SingleFlight()
+
+    def compute():
+        assert shared_cache.has('k:inflight')
+        shared_cache.set('k', 'value')
+        return 'value'
+
+    assert flight.do('k', compute, cache=shared_cache) == 'value'
+    assert not shared_cache.has('k:inflight')
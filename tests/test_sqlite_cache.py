@@ -0,0 +1,85 @@
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+from src.app.sqlite_cache import SQLiteCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SQLiteCache(str(tmp_path / 'cache.sqlite3'), threshold=3)
+
+
+def test_values_round_trip_unchanged(cache):
+    value = {'at': datetime(2026, 1, 2, 3, 4, 5), 'pair': (1, 2), 'tags': {'a'}, 'raw': b'\x00'}
+    cache.set('k', value)
+    assert cache.get('k') == value
+
+
+def test_reads_do_not_take_the_write_lock(cache):
+    cache.set('k', 1)
+    writer = sqlite3.connect(cache.path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.monotonic()
+        assert cache.get('k') == 1
+        assert cache.get('missing') is None
+        assert time.monotonic() - started < 1
+    finally:
+        writer.execute("ROLLBACK")
+
+
+def test_hit_and_miss_counters(cache):
+    cache.set('k', 1)
+    cache.get('k')
+    cache.get('missing')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+
+def test_totals_follow_replace_and_delete(cache):
+    cache.set('k', 'x' * 100)
+    cache.set('k', 'x' * 10)
+    cache.set('j', 'y')
+    cache.delete('j')
+    entries, size = cache._connection().execute("SELECT COUNT(*), SUM(size) FROM cache").fetchone()
+    stats = cache.stats()
+    assert entries == 1
+    assert (stats['entries'], stats['bytes']) == (entries, size)
+
+
+def test_expired_entries_miss_and_can_be_added_again(cache):
+    cache.set('k', 1, timeout=1)
+    cache._connection().execute("UPDATE cache SET expires = ?", (time.time() - 1,))
+    assert cache.get('k') is None
+    assert cache.add('k', 2)
+    assert cache.get('k') == 2
+
+
+def test_add_does_not_replace(cache):
+    assert cache.add('lock', 'a')
+    assert not cache.add('lock', 'b')
+    assert cache.get('lock') == 'a'
+
+
+def test_eviction_keeps_recently_read_entries(cache):
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key)
+        time.sleep(0.01)
+    cache.get('a')
+    cache.set('d', 'd')
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in ('a', 'c', 'd')] == ['a', 'c', 'd']
+    assert cache.stats()['evictions'] == 1
+
+
+def test_plain_json_values_are_stored_as_json(cache):
+    analysis = {'symbol': 'AAPL', 'score': 7.5, 'signals': [{'name': 'rsi', 'value': 61}], 'note': None}
+    cache.set('json', analysis)
+    cache.set('tuple', {'pair': (1, 2)})
+    rows = dict(cache._connection().execute("SELECT key, value FROM cache").fetchall())
+    assert rows['json'][:1] == b'j' and rows['tuple'][:1] == b'p'
+    assert cache.get('json') == analysis
+    assert cache.get('tuple') == {'pair': (1, 2)}
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from src.app.cache import cache
+from src.app.stock_quotes import StockQuotes
+from src.services.stock_record import StockRecord
+
+
+class FakeService:
+    def __init__(self, price=100.0, delay=0):
+        self.price = price
+        self.delay = delay
+        self.calls = []
+
+    def get_stocks_data(self, symbols):
+        self.calls.append(list(symbols))
+        time.sleep(self.delay)
+        return {symbol: StockRecord(symbol=symbol, price=self.price) for symbol in symbols if symbol != 'NONE'}
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        CACHE_TYPE='src.app.sqlite_cache.SQLiteCache',
+        CACHE_DIR=str(tmp_path),
+        CACHE_THRESHOLD=100,
+    )
+    cache.init_app(app)
+    with app.app_context():
+        yield app
+
+
+def quotes(service, ttl=60):
+    quotes = StockQuotes(ttl)
+    quotes._service = service
+    return quotes
+
+
+def test_misses_are_fetched_in_one_batch_and_cached(app):
+    service = FakeService()
+    stock_quotes = quotes(service)
+    entries = stock_quotes.get(['MSFT', 'AAPL', 'NONE'])
+    assert entries['AAPL']['data'].price == 100.0
+    assert entries['NONE']['data'] is None and entries['NONE']['json'] == b'null'
+
+    stock_quotes.get(['AAPL', 'NONE'])
+    assert service.calls == [['AAPL', 'MSFT', 'NONE']]
+
+
+def test_concurrent_misses_share_one_download(app):
+    service = FakeService(delay=0.2)
+    stock_quotes = quotes(service)
+    results = []
+
+    def get():
+        with app.app_context():
+            results.append(stock_quotes.get(['AAPL', 'MSFT']))
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(service.calls) == 1
+    assert len({entries['AAPL']['digest'] for entries in results}) == 1
+
+
+def test_refetch_keeps_updated_at_while_the_data_is_unchanged(app):
+    service = FakeService()
+    stock_quotes = quotes(service, ttl=1)
+    first = stock_quotes.get(['AAPL'])['AAPL']
+
+    time.sleep(1.05)
+    second = stock_quotes.get(['AAPL'])['AAPL']
+    assert second['checked_at'] > first['checked_at']
+    assert second['updated_at'] == first['updated_at']
+
+    service.price = 101.0
+    time.sleep(1.05)
+    third = stock_quotes.get(['AAPL'])['AAPL']
+    assert third['digest'] != first['digest']
+    assert third['updated_at'] == third['checked_at']
+    assert len(service.calls) == 3
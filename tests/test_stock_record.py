@@ -0,0 +1,22 @@
+import pickle
+
+import pytest
+
+from src.services.stock_record import STOCK_FIELDS, StockRecord
+
+
+def test_records_compare_by_value_and_are_not_hashable():
+    record = StockRecord(symbol='AAPL', price=187.68)
+    assert record == StockRecord(symbol='AAPL', price=187.68)
+    assert record != StockRecord(symbol='AAPL', price=190.0)
+    with pytest.raises(TypeError):
+        hash(record)
+
+
+def test_records_read_like_dicts_and_pickle_as_values():
+    record = StockRecord(symbol='AAPL', name='Apple Inc.', price=187.68)
+    assert record['name'] == record.get('name') == 'Apple Inc.'
+    assert record.get('analyst_consensus') is None and 'analyst_consensus' not in record
+    assert list(record.to_dict()) == list(STOCK_FIELDS)
+    assert record.to_dict(['symbol', 'price']) == {'symbol': 'AAPL', 'price': 187.68}
+    assert pickle.loads(pickle.dumps(record)) == record
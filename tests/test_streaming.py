@@ -0,0 +1,69 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from src.agent.streaming import _EventCollector, astream_graph
+
+HANDOFF = AIMessage(content='', id='m1', name='supervisor', tool_calls=[
+    {'name': 'transfer_to_stock_agent', 'args': {}, 'id': 'c1'},
+])
+TOOL_CALL = AIMessage(content='', id='m2', name='stock_agent', tool_calls=[
+    {'name': 'get_stock_data', 'args': {'ticker': 'AAPL'}, 'id': 'c2'},
+])
+STOCK_REPORT = AIMessage(content='AAPL trades at 250', id='m3', name='stock_agent')
+HANDBACK = AIMessage(content='', id='m4', name='stock_agent', tool_calls=[
+    {'name': 'transfer_back_to_supervisor', 'args': {}, 'id': 'c3'},
+])
+ANSWER = AIMessage(content='Apple looks fairly valued.', id='m5', name='supervisor')
+
+# (namespace, mode, data) items of a supervisor run streamed with subgraphs=True
+ITEMS = [
+    ((), 'messages', (AIMessageChunk(content=''), {})),
+    ((), 'updates', {'supervisor': {'messages': [HANDOFF]}}),
+    (('stock_agent:1',), 'messages', (AIMessageChunk(content='AAPL trades'), {})),
+    (('stock_agent:1',), 'updates', {'agent': {'messages': [TOOL_CALL]}}),
+    (('stock_agent:1',), 'updates', {'tools': {'messages': [ToolMessage(content='{}', tool_call_id='c2')]}}),
+    (('stock_agent:1',), 'updates', {'agent': {'messages': [STOCK_REPORT]}}),
+    # The parent graph repeats the subgraph's messages
+    ((), 'updates', {'stock_agent': {'messages': [HANDOFF, TOOL_CALL, STOCK_REPORT, HANDBACK]}}),
+    ((), 'messages', (AIMessageChunk(content='Apple looks '), {})),
+    ((), 'messages', (AIMessageChunk(content='fairly valued.'), {})),
+    ((), 'updates', {'supervisor': {'messages': [ANSWER]}}),
+]
+
+EXPECTED = [
+    {'event': 'handoff', 'data': {'from': 'supervisor', 'to': 'stock_agent'}},
+    {'event': 'tool_call', 'data': {'agent': 'stock_agent', 'tool': 'get_stock_data', 'args': {'ticker': 'AAPL'}}},
+    {'event': 'handoff', 'data': {'from': 'stock_agent', 'to': 'supervisor'}},
+    {'event': 'token', 'data': {'agent': 'supervisor', 'content': 'Apple looks '}},
+    {'event': 'token', 'data': {'agent': 'supervisor', 'content': 'fairly valued.'}},
+    {'event': 'done', 'data': {'response': 'Apple looks fairly valued.'}},
+]
+
+
+def test_collector_turns_a_supervisor_run_into_events():
+    collector = _EventCollector('supervisor')
+    events = [event for namespace, mode, data in ITEMS for event in collector.events(namespace, mode, data)]
+    assert events + [collector.done()] == EXPECTED
+
+
+class FakeGraph:
+    def __init__(self):
+        self.kwargs = None
+
+    async def astream(self, graph_input, **kwargs):
+        self.kwargs = dict(kwargs, input=graph_input)
+        for item in ITEMS:
+            await asyncio.sleep(0)
+            yield item
+
+
+def test_astream_graph_yields_the_events_in_order():
+    graph = FakeGraph()
+
+    async def collect():
+        return [event async for event in astream_graph(graph, 'How is AAPL?', answer_agent='supervisor')]
+
+    assert asyncio.run(collect()) == EXPECTED
+    assert graph.kwargs['input'] == {'messages': [{'role': 'user', 'content': 'How is AAPL?'}]}
+    assert graph.kwargs['stream_mode'] == ['updates', 'messages'] and graph.kwargs['subgraphs']
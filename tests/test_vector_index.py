@@ -0,0 +1,47 @@
+import os
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.agent.vector_index import PersistentVectorIndex
+
+
+def make_index(tmp_path):
+    source = tmp_path / 'report.pdf'
+    source.write_bytes(b'%PDF-1.4 report')
+    index = PersistentVectorIndex(str(tmp_path / 'index'), embeddings=None, chunk_size=100, chunk_overlap=10,
+                                  model_name='test')
+    return index, str(source)
+
+
+def chunks(count):
+    return [Document(page_content=f"chunk {i}", metadata={'page': i}) for i in range(count)]
+
+
+def test_concurrent_writers_of_a_segment(tmp_path):
+    index, source = make_index(tmp_path)
+    rng = np.random.default_rng(0)
+    threads = [
+        threading.Thread(target=index.write, args=(source, chunks(50), rng.random((50, 8), dtype=np.float32)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    segment_files = [os.path.basename(path) for path in index._paths(index.segment_key(source))]
+    assert sorted(os.listdir(index.index_dir)) == sorted(segment_files)
+    index.load([source])
+    assert len(index) == 50 and index.segments[source][0].shape == (50, 8)
+
+
+def test_inconsistent_segment_is_skipped(tmp_path):
+    index, source = make_index(tmp_path)
+    index.write(source, chunks(3), np.ones((3, 4), dtype=np.float32))
+    vectors_path, _ = index._paths(index.segment_key(source))
+    np.save(vectors_path, np.ones((2, 4), dtype=np.float32))
+
+    index.load([source], prune=False)
+    assert len(index) == 0 and not index.segments
@@ -0,0 +1,70 @@
+"""
+Precompute stock analyses into the shared analysis cache ahead of market
+open, so the first page views of the day are cache hits.
+
+Usage:
+    python warmup.py                                  # watchlist and top tickers
+    python warmup.py --tickers AAPL MSFT --budget 0.5 --concurrency 3
+
+Run it from cron before the open, e.g. weekdays at 8:30:
+    30 8 * * 1-5 cd /path/to/investiq && python warmup.py
+
+Analyses still fresh in the cache are skipped. The budget is an estimate
+in USD from the token counts of each run.
+"""
+import argparse
+import sys
+
+from flask import Flask
+
+from src.app.cache import cache
+from src.config import Config
+
+
+def build_app():
+    """App with the shared cache only, without the web app's background services"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    cache.init_app(app)
+    return app
+
+
+def default_tickers():
+    from src.app.routes import mock_stock_data, stock_service
+
+    return list(dict.fromkeys(stock_service.top_tickers + list(mock_stock_data)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', nargs='+', default=Config.WARMUP_TICKERS or None,
+                        help='symbols to warm up (default: watchlist and top tickers)')
+    parser.add_argument('--concurrency', type=int, default=Config.WARMUP_CONCURRENCY)
+    parser.add_argument('--budget', type=float, default=Config.WARMUP_BUDGET_USD, help='maximum spend in USD')
+    parser.add_argument('--fresh-for', type=float, default=None,
+                        help='skip analyses younger than this many seconds (default: ANALYSIS_SOFT_TTL)')
+    args = parser.parse_args()
+
+    from src.app.routes import _compute_stock_analysis
+    from src.app.warmup import AnalysisWarmup
+
+    app = build_app()
+    if not getattr(cache.cache, 'shared', False):
+        print("Warning: the cache backend is not shared between processes, the web app will not see these analyses")
+
+    tickers = args.tickers or default_tickers()
+    print(f"Warming up {len(tickers)} analyses ({app.config['ANALYSIS_MODE']} mode), "
+          f"budget ${args.budget:.2f}, {args.concurrency} at a time")
+    warmup = AnalysisWarmup(app, _compute_stock_analysis, concurrency=args.concurrency, budget=args.budget,
+                            fresh_for=args.fresh_for)
+    results = warmup.run(tickers)
+
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    print(f"Spent ${warmup.spent:.4f}: " + ', '.join(f"{count} {status}" for status, count in counts.items()))
+    return 1 if counts.get('failed') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())